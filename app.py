@@ -1,9 +1,30 @@
-from flask import Flask, render_template, request, redirect, session, flash, url_for, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, timedelta
+from flask import Flask, current_app, render_template, request, redirect, session, flash, url_for, jsonify
+from datetime import datetime
 from dotenv import load_dotenv
 from itsdangerous import URLSafeTimedSerializer
-import mysql.connector
+from banco import get_db_login, get_db_salao
+import assets
+import avisos
+import banco
+import compressao
+import disponibilidade
+import exportacao
+import fila_email
+import historico
+import limites
+import manutencao
+import metricas
+import migracoes
+import ocupacao
+import paginas
+import permissoes
+import politicas
+import relogio
+import reservas
+import resumo
+import senhas
+import sessoes
+import logging
 import os
 import re
 
@@ -11,65 +32,25 @@ def verificar_admin():
     if "usuario_id" not in session:
         return False
 
-    db = get_db_login()
-    cursor = db.cursor(dictionary=True)
-    cursor.execute(
-        "SELECT is_admin FROM usuario WHERE codigo=%s",
-        (session["usuario_id"],)
-    )
-    user = cursor.fetchone()
-    cursor.close()
-    db.close()
-
-    return user and user["is_admin"] == 1
-
-def limpar_horarios_passados():
-    db = get_db_salao()
-    cursor = db.cursor()
-
-    agora = datetime.utcnow() - timedelta(hours=3)
-
-    cursor.execute("""
-        DELETE FROM agendamentos
-        WHERE CONCAT(data, ' ', horario) < %s
-    """, (agora,))
-
-    db.commit()
-    cursor.close()
-    db.close()
+    return permissoes.e_admin(session["usuario_id"])
 
 
 load_dotenv()
 
-app = Flask(__name__)
-
-# ================== CONFIGURAÇÃO ==================
-app.secret_key = os.getenv("SECRET_KEY") or "chave_teste_fixa"
-app.config["PROPAGATE_EXCEPTIONS"] = True
-app.config["SESSION_PERMANENT"] = False
-app.config["SESSION_TYPE"] = "filesystem"
+# ================== APLICAÇÃO ==================
+# As rotas são registradas em ROTAS e criar_app() monta o Flask com elas. O
+# "app" do fim do arquivo (app:app no gunicorn, "flask run") é criar_app()
+# com a configuração do .env.
+ROTAS = []
 
+def rota(regra, **opcoes):
+    def registrar(funcao):
+        ROTAS.append((regra, funcao, opcoes))
+        return funcao
+    return registrar
 
-serializer = URLSafeTimedSerializer(app.secret_key)
-
-# ================== BANCO DE DADOS ==================
-def get_db_login():
-    return mysql.connector.connect(
-        host=os.getenv("DB_LOGIN_HOST") or "127.0.0.1",
-        user=os.getenv("DB_LOGIN_USER") or "root",
-        password=os.getenv("DB_LOGIN_PASSWORD") or "",
-        database=os.getenv("DB_LOGIN_NAME"),
-        port=int(os.getenv("DB_LOGIN_PORT", 3306))
-    )
-
-def get_db_salao():
-    return mysql.connector.connect(
-        host=os.getenv("DB_SALAO_HOST") or "127.0.0.1",
-        user=os.getenv("DB_SALAO_USER") or "root",
-        password=os.getenv("DB_SALAO_PASSWORD") or "",
-        database=os.getenv("DB_SALAO_NAME"),
-        port=int(os.getenv("DB_SALAO_PORT", 3306))
-    )
+def serializer():
+    return URLSafeTimedSerializer(current_app.secret_key)
 
 # ================== VALIDAÇÃO ==================
 def email_valido(email):
@@ -79,15 +60,22 @@ def senha_valida(senha):
     return len(senha) >= 5 and any(c.isupper() for c in senha) and any(c.islower() for c in senha)
 
 # ================== ROTAS ==================
-@app.route("/")
+@rota("/")
+@paginas.cacheada
 def home():
     return render_template("index.html")
 
-@app.route("/index")
+@rota("/index")
+@paginas.cacheada
 def index():
     return render_template("index.html")
 
-@app.route("/registro", methods=["GET", "POST"])
+@rota("/depoimentos")
+@paginas.cacheada
+def depoimentos():
+    return render_template("depoimentos.html")
+
+@rota("/registro", methods=["GET", "POST"])
 def registro():
     if request.method == "POST":
         email = request.form.get("email")
@@ -110,7 +98,13 @@ def registro():
             db.close()
             return redirect("/registro")
 
-        senha_hash = generate_password_hash(senha)
+        try:
+            senha_hash = senhas.gerar(senha)
+        except senhas.Sobrecarga:
+            cursor.close()
+            db.close()
+            flash("Muitos acessos no momento, tente novamente", "erro")
+            return redirect("/registro")
         cursor.execute("INSERT INTO usuario (email, senha) VALUES (%s,%s)", (email, senha_hash))
         db.commit()
         cursor.close()
@@ -120,7 +114,7 @@ def registro():
 
     return render_template("registro.html")
 
-@app.route("/login", methods=["GET", "POST"])
+@rota("/login", methods=["GET", "POST"])
 def login():
 
 
@@ -133,12 +127,28 @@ def login():
         cursor.execute("SELECT * FROM usuario WHERE email=%s", (email,))
         user = cursor.fetchone()
         cursor.close()
+
+        try:
+            senha_ok = user and senhas.verificar(user["senha"], senha)
+        except senhas.Sobrecarga:
+            db.close()
+            flash("Muitos acessos no momento, tente novamente", "login")
+            return redirect("/login")
+
+        if senha_ok and senhas.precisa_atualizar(user["senha"]):
+            try:
+                senhas.atualizar(db, user["codigo"], user["senha"], senha)
+            except senhas.Sobrecarga:
+                # a senha já conferiu; o hash antigo vale até o próximo login
+                pass
         db.close()
 
-        if user and check_password_hash(user["senha"], senha):
+        if senha_ok:
+            sessoes.regenerar(session)
             session["usuario_id"] = user["codigo"]
             session["email"] = user["email"]
             session["is_admin"] = user.get("is_admin", 0)
+            permissoes.lembrar(user["codigo"], session["is_admin"])
             flash("Login realizado com sucesso!", "login")
             return redirect("/index")
         else:
@@ -147,24 +157,18 @@ def login():
 
     return render_template("login.html")
 
-@app.route("/logout")
+@rota("/logout")
 def logout():
     session.clear()
     flash("Logout realizado", "sucesso")
     return redirect("/login")
 
-@app.route("/agendamento", methods=["GET", "POST"])
+@rota("/agendamento", methods=["GET", "POST"])
 def agendamento():
-    limpar_horarios_passados()
-
-    hoje = datetime.now().strftime("%Y-%m-%d")
     if "usuario_id" not in session:
         flash("Faça login primeiro", "erro")
         return redirect("/login")
 
-    db = get_db_salao()
-    cursor = db.cursor(dictionary=True)
-
     if request.method == "POST":
         data = request.form.get("data")
         horario = request.form.get("horario")
@@ -178,10 +182,9 @@ def agendamento():
             flash("Data ou horário inválido", "erro")
             return redirect("/agendamento")
 
-        agora = datetime.utcnow() - timedelta(hours=3)
-
-        if data_hora_agendamento <= agora:
-            flash("Não é possível agendar em horários que já passaram.", "erro")
+        erro = politicas.verificar_reserva(data_hora_agendamento)
+        if erro:
+            flash(erro, "erro")
             return redirect("/agendamento")
 
         telefone = request.form.get("telefone")
@@ -192,67 +195,32 @@ def agendamento():
             flash("Preencha todos os campos", "erro")
             return redirect("/agendamento")
 
-        cursor.execute("""
-            SELECT data, horario
-            FROM agendamentos
-            WHERE usuario_id = %s
-            AND data <= %s
-            ORDER BY data DESC, horario DESC
-            LIMIT 1
-        """, (session["usuario_id"], data))
-
-        ultimo_agendamento = cursor.fetchone()
-
-        if ultimo_agendamento:
-            data_existente = ultimo_agendamento["data"]
-            horario_existente = ultimo_agendamento["horario"]
-
-            if hasattr(data_existente, "strftime"):
-                data_existente = data_existente.strftime("%Y-%m-%d")
-
-            if hasattr(horario_existente, "strftime"):
-                horario_existente = horario_existente.strftime("%H:%M:%S")
-            else:
-                horario_existente = str(horario_existente)
-
-            horario_existente = horario_existente.split(":")
-            horario_existente = f"{horario_existente[0]}:{horario_existente[1]}"
-            
-
-            agendamento_existente = datetime.strptime(
-                f"{data_existente} {horario_existente}",
-                "%Y-%m-%d %H:%M"
-            )
-
-            proximo_permitido = agendamento_existente + timedelta(days=15)
-
-            if data_hora_agendamento < proximo_permitido:
-                dias_restantes = (proximo_permitido - data_hora_agendamento).days
-
-                cursor.close()
-                db.close()
-
-                flash(
-                    f"Você só pode agendar novamente a partir de {proximo_permitido.strftime('%d/%m/%Y')}.",
-                    "erro"
-                )
-                return redirect("/agendamento")
+        db = get_db_salao()
+        status, resultado = reservas.reservar(
+            db,
+            session["usuario_id"],
+            session["email"],
+            data_hora_agendamento,
+            servicos,
+            total,
+            telefone
+        )
+        db.close()
 
+        if status == reservas.REGRA:
+            flash(
+                f"Você só pode agendar novamente a partir de {resultado.strftime('%d/%m/%Y')}.",
+                "erro"
+            )
+            return redirect("/agendamento")
 
-        cursor.execute("SELECT id FROM agendamentos WHERE data=%s AND horario=%s", (data, horario))
-        if cursor.fetchone():
-            cursor.close()
-            db.close()
+        if status == reservas.OCUPADO:
             flash("Horário já reservado", "erro")
             return redirect("/agendamento")
 
-        cursor.execute(
-            "INSERT INTO agendamentos (usuario_id, data, horario, servicos, total, telefone, email) "
-            "VALUES (%s,%s,%s,%s,%s,%s,%s)",
-            (session["usuario_id"], data, horario, ", ".join(servicos), total, telefone, session["email"])
-        )
-        
-        db.commit()
+        agendamento_id = resultado
+        ocupacao.invalidar(data)
+        avisos.publicar(data)
 
 # ================= EMAILS =================
 
@@ -297,52 +265,59 @@ Caso precise alterar, entre em contato.
             mensagem_cliente
         )
 
-        agendamento_id = cursor.lastrowid
-        cursor.close()
-        db.close()
-
         flash("Agendamento realizado!", "sucesso")
         return redirect(f"/confirmacao/{agendamento_id}")
 
 
-    # GET: horários ocupados
-    cursor.execute("SELECT data, horario FROM agendamentos")
-    ocupados = cursor.fetchall()
-    cursor.close()
-    db.close()
-
-    horarios_ocupados = {}
-    for ag in ocupados:
-        data_str = ag["data"].strftime("%Y-%m-%d") if hasattr(ag["data"], "strftime") else str(ag["data"])
-        hora_str = str(ag["horario"])[:5]
-        if data_str not in horarios_ocupados:
-            horarios_ocupados[data_str] = []
-        horarios_ocupados[data_str].append(hora_str)
-
-    return render_template("agendamento.html", horarios_ocupados=horarios_ocupados, hoje=hoje)
+    # GET: os horários ocupados são carregados pelo agendamento.js
+    # via /api/horarios/<data>, só para a data escolhida
+    hoje, limite = ocupacao.janela()
+    return render_template("agendamento.html", hoje=hoje.strftime("%Y-%m-%d"), limite=limite.strftime("%Y-%m-%d"))
 
-@app.route("/agendamentos")
+@rota("/agendamentos")
 def agendamentos():
-    limpar_horarios_passados()
     if "usuario_id" not in session:
         flash("Faça login primeiro", "erro")
         return redirect("/login")
 
+    try:
+        depois = historico.ler_marcador(request.args.get("depois"))
+    except ValueError:
+        depois = None
+
     db = get_db_salao()
     cursor = db.cursor(dictionary=True)
-    cursor.execute("SELECT id, data, horario, servicos, total, telefone, email "
-                   "FROM agendamentos WHERE usuario_id=%s ORDER BY data DESC, horario DESC",
-                   (session["usuario_id"],))
-    lista = cursor.fetchall()
+    lista, proximo = historico.do_cliente(cursor, session["usuario_id"], depois)
     cursor.close()
     db.close()
 
-    for ag in lista:
-        ag["horario"] = str(ag["horario"])[:5] if ag.get("horario") else "—"
+    return compressao.transmitir("agendamentos.html", agendamentos=lista, proximo=proximo)
+
+@rota("/api/agendamentos")
+def api_agendamentos():
+    if "usuario_id" not in session:
+        return jsonify({"erro": "Faça login primeiro"}), 401
+
+    try:
+        depois = historico.ler_marcador(request.args.get("depois"))
+    except ValueError:
+        return jsonify({"erro": "Marcador inválido"}), 400
+
+    db = get_db_salao()
+    cursor = db.cursor(dictionary=True)
+    lista, proximo = historico.do_cliente(cursor, session["usuario_id"], depois)
+    cursor.close()
+    db.close()
 
-    return render_template("agendamentos.html", agendamentos=lista)
+    response = jsonify({
+        "agendamentos": [historico.para_json(ag) for ag in lista],
+        "proximo": proximo,
+    })
+    response.cache_control.private = True
+    response.cache_control.no_store = True
+    return response
 
-@app.route("/confirmacao/<int:id>")
+@rota("/confirmacao/<int:id>")
 def confirmacao(id):
     db = get_db_salao()
     cursor = db.cursor(dictionary=True)
@@ -355,10 +330,10 @@ def confirmacao(id):
         flash("Agendamento não encontrado", "erro")
         return redirect("/agendamento")
 
-    ag["horario"] = str(ag["horario"])[:5] if ag.get("horario") else "—"
+    ag["horario"] = ocupacao.formatar_horario(ag["horario"]) if ag.get("horario") else "—"
     return render_template("confirmacao.html", agendamento=ag)
 
-@app.route("/contato", methods=["GET", "POST"])
+@rota("/contato", methods=["GET", "POST"])
 def contato():
     if request.method == "POST":
         nome = request.form.get("nome")
@@ -383,47 +358,51 @@ def contato():
 
     return render_template("contato.html")
 
-@app.route("/api/horarios/<data>")
+@rota("/api/horarios/<data>")
 def api_horarios(data):
+    try:
+        dia = datetime.strptime(data, "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"erro": "Data inválida"}), 400
 
-    db = get_db_salao()
-    cursor = db.cursor(dictionary=True)
-
-    cursor.execute("""
-        SELECT horario FROM agendamentos
-        WHERE data=%s
-    """, (data,))
-
-    resultados = cursor.fetchall()
-
-    horarios = []
+    if not ocupacao.data_na_janela(dia):
+        return jsonify([])
 
-    for r in resultados:
-        h = r["horario"]
+    etag, horarios = ocupacao.horarios_do_dia(dia)
 
-        if not h:
-            continue
+    response = jsonify(horarios)
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
-        if isinstance(h, timedelta):
-            total_minutes = h.seconds // 60
-            horas = total_minutes // 60
-            minutos = total_minutes % 60
-            horarios.append(f"{horas:02d}:{minutos:02d}")
+@rota("/api/disponibilidade")
+def api_disponibilidade():
+    hoje, limite = ocupacao.janela()
 
-        elif hasattr(h, "strftime"):
-            horarios.append(h.strftime("%H:%M"))
+    try:
+        inicio = datetime.strptime(request.args.get("inicio") or hoje.strftime("%Y-%m-%d"), "%Y-%m-%d").date()
+        dias = int(request.args.get("dias") or (limite - inicio).days + 1)
+    except ValueError:
+        return jsonify({"erro": "Parâmetros inválidos"}), 400
 
-        else:
-            horarios.append(str(h)[:5])
+    # fora da janela todo dia viria null; prender o início nela também evita
+    # o OverflowError de somar dias a datas perto de 9999-12-31
+    inicio = min(max(inicio, hoje), limite)
+    dias = max(1, min(dias, ocupacao.janela_dias() + 1))
+    payload = disponibilidade.grade(inicio, dias)
 
-    cursor.close()
-    db.close()
+    response = jsonify(payload)
+    response.set_etag(disponibilidade.gerar_etag(payload))
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
-    return jsonify(horarios)
+@rota("/api/disponibilidade/eventos")
+def api_disponibilidade_eventos():
+    return avisos.resposta()
 
 
 
-@app.route("/esqueceu-senha", methods=["GET","POST"])
+@rota("/esqueceu-senha", methods=["GET","POST"])
 def esqueceu_senha():
 
     if request.method == "POST":
@@ -443,7 +422,7 @@ def esqueceu_senha():
             flash("Email não encontrado", "erro")
             return redirect("/esqueceu-senha")
 
-        token = serializer.dumps(email, salt="reset-senha")
+        token = serializer().dumps(email, salt="reset-senha")
 
         base_url = os.getenv("BASE_URL") or request.host_url
         link = f"{base_url.rstrip('/')}{url_for('redefinir_senha', token=token)}"
@@ -468,11 +447,11 @@ def esqueceu_senha():
     return render_template("esqueceu-senha.html")
 
 
-@app.route("/redefinir-senha/<token>", methods=["GET","POST"])
+@rota("/redefinir-senha/<token>", methods=["GET","POST"])
 def redefinir_senha(token):
 
     try:
-        email = serializer.loads(
+        email = serializer().loads(
             token,
             salt="reset-senha",
             max_age=900
@@ -489,7 +468,11 @@ def redefinir_senha(token):
             flash("Senha fraca", "erro")
             return redirect(request.url)
 
-        senha_hash = generate_password_hash(nova_senha)
+        try:
+            senha_hash = senhas.gerar(nova_senha)
+        except senhas.Sobrecarga:
+            flash("Muitos acessos no momento, tente novamente", "erro")
+            return redirect(request.url)
 
         db = get_db_login()
         cursor = db.cursor()
@@ -510,60 +493,23 @@ def redefinir_senha(token):
 
     return render_template("redefinir-senha.html")
 
-@app.route("/sobre")
+@rota("/sobre")
+@paginas.cacheada
 def sobre():
     return render_template("sobre.html")
 
-from threading import Thread
-
-from sib_api_v3_sdk import Configuration, ApiClient
-from sib_api_v3_sdk.api import transactional_emails_api
-from sib_api_v3_sdk.models import SendSmtpEmail
-
 def enviar_email(destinatario, assunto, mensagem):
-
-    def enviar():
-        try:
-            api_key = os.getenv("BREVO_API_KEY")
-            if not api_key:
-                print("BREVO_API_KEY não configurada")
-                return
-
-            configuration = Configuration()
-            configuration.api_key['api-key'] = api_key
-
-            api_client = ApiClient(configuration)
-            api_instance = transactional_emails_api.TransactionalEmailsApi(api_client)
-
-            mensagem_html = mensagem.replace("\n", "<br>")
-
-            email = SendSmtpEmail(
-                to=[{"email": destinatario}],
-                subject=assunto,
-                html_content=f"<html><body><p>{mensagem_html}</p></body></html>",
-                sender={
-                    "name": "Jefferson Cabeleireiro",
-                    "email": "thalysondasilvaribeiro@gmail.com"
-                }
-            )
-
-
-            api_instance.send_transac_email(email)
-            print("Email enviado com sucesso!")
-
-        except Exception as e:
-            print("Erro ao enviar:", e)
-    
-    Thread(target=enviar, daemon=True).start()
+    fila_email.enfileirar(destinatario, assunto, mensagem)
 
 
 
-@app.route("/mensagem-enviada")
+@rota("/mensagem-enviada")
+@paginas.cacheada
 def mensagem_enviada():
     return render_template("mensagem-enviada.html")
 
 
-@app.route("/cancelar-agendamento/<int:id>")
+@rota("/cancelar-agendamento/<int:id>")
 def cancelar_agendamento(id):
     if "usuario_id" not in session:
         flash("Faça login primeiro", "erro")
@@ -585,27 +531,16 @@ def cancelar_agendamento(id):
         flash("Agendamento não encontrado", "erro")
         return redirect("/agendamentos")
 
-    data_val = ag["data"]
-    hora_val = ag["horario"]
-
-    if hasattr(data_val, "strftime"):
-        data_str = data_val.strftime("%Y-%m-%d")
-    else:
-        data_str = str(data_val)
-
-    hora_str = str(hora_val)[:8]
-
-    data_hora_agendamento = datetime.strptime(
-        f"{data_str} {hora_str}",
-        "%Y-%m-%d %H:%M:%S"
-    )
+    cursor.close()
 
-    agora = datetime.utcnow() - timedelta(hours=3)
+    data_hora_agendamento = politicas.data_hora(ag["data"], ag["horario"])
+    data_str = data_hora_agendamento.strftime("%Y-%m-%d")
+    hora_str = data_hora_agendamento.strftime("%H:%M:%S")
 
-    if data_hora_agendamento - agora < timedelta(hours=24):
-        cursor.close()
+    erro = politicas.verificar_cancelamento(data_hora_agendamento)
+    if erro:
         db.close()
-        flash("Cancelamento permitido apenas com 24 horas de antecedência.", "erro")
+        flash(erro, "erro")
         return redirect("/agendamentos")
 
     mensagem_admin = f"""
@@ -622,57 +557,53 @@ Cliente: {ag['email']}
         mensagem_admin
     )
 
-    cursor.execute("DELETE FROM agendamentos WHERE id=%s", (id,))
-    db.commit()
-
-    cursor.close()
+    reservas.cancelar(db, id, session["usuario_id"])
+    ocupacao.invalidar(data_str)
+    avisos.publicar(data_str)
     db.close()
 
     flash("Agendamento cancelado com sucesso.", "sucesso")
     return redirect("/agendamentos")
 
-@app.route("/admin")
-def admin():
-    if not verificar_admin():
-        return "Acesso negado", 403
-
+def pagina_admin():
     data = request.args.get("data")
 
     if not data:
-        data = datetime.now().strftime("%Y-%m-%d")
+        data = relogio.hoje().strftime("%Y-%m-%d")
+
+    try:
+        depois = historico.ler_marcador(request.args.get("depois"))
+    except ValueError:
+        depois = None
 
     db = get_db_salao()
     cursor = db.cursor(dictionary=True)
 
-    cursor.execute("""
-        SELECT id, email, horario, valor_pix, valor_dinheiro
-        FROM agendamentos
-        WHERE data = %s
-        ORDER BY horario
-    """, (data,))
-    agendamentos = cursor.fetchall()
+    # clientes do dia, uma página por vez
+    agendamentos, proximo = historico.do_dia(cursor, data, depois)
 
-    cursor.execute("""
-        SELECT
-            SUM(valor_pix) AS pix,
-            SUM(valor_dinheiro) AS dinheiro,
-            SUM(valor_final) AS total
-        FROM agendamentos
-        WHERE data = %s AND finalizado = 1
-    """, (data,))
-    resumo = cursor.fetchone() or {}
+    # resumo do dia
+    resumo_do_dia = resumo.resumo_dia(cursor, data)
 
     cursor.close()
     db.close()
 
-    return render_template(
+    return compressao.transmitir(
         "admin.html",
         agendamentos=agendamentos,
-        resumo=resumo,
-        hoje=data
+        resumo=resumo_do_dia,
+        hoje=data,
+        proximo=proximo
     )
 
-@app.route("/admin/finalizar", methods=["POST"])
+@rota("/admin")
+def admin():
+    if not verificar_admin():
+        return "Acesso negado", 403
+
+    return pagina_admin()
+
+@rota("/admin/finalizar", methods=["POST"])
 def finalizar_cliente():
     if not verificar_admin():
         return "Acesso Negado", 403
@@ -683,95 +614,247 @@ def finalizar_cliente():
 
     id_ag = request.form.get("id")
     pagamento = request.form.get("pagamento")
-    valor = request.form.get("valor")
+    try:
+        valor = resumo.ler_valor(request.form.get("valor"))
+    except ValueError:
+        return "Valor inválido", 400
 
     db = get_db_salao()
-    cursor = db.cursor()
+    cursor = db.cursor(dictionary=True)
 
-    cursor.execute("""
-        UPDATE agendamentos
-        SET forma_pagamento=%s,
-            valor_final=%s,
-            finalizado=1
-        WHERE id=%s
-    """,(pagamento, valor, id_ag))
+    registrado = resumo.registrar_pagamento(
+        cursor,
+        id_ag,
+        forma_pagamento=pagamento,
+        valor_final=valor
+    )
 
-    db.commit()
+    if registrado:
+        db.commit()
+    else:
+        db.rollback()
     cursor.close()
     db.close()
 
+    if not registrado:
+        return "Agendamento não encontrado", 404
     return redirect("/admin/dia")
 
-@app.route("/admin/salvar_pagamento", methods=["POST"])
+@rota("/admin/salvar_pagamento", methods=["POST"])
 def salvar_pagamento():
     if not verificar_admin():
         return "Acesso Negado", 403
 
     id_cliente = request.form["id"]
-    valor_pix = float(request.form.get("valor_pix") or 0)
-    valor_dinheiro = float(request.form.get("valor_dinheiro") or 0)
+    try:
+        valor_pix = resumo.ler_valor(request.form.get("valor_pix"))
+        valor_dinheiro = resumo.ler_valor(request.form.get("valor_dinheiro"))
+    except ValueError:
+        return "Valor inválido", 400
     total = valor_pix + valor_dinheiro
 
     db = get_db_salao()
-    cursor = db.cursor()
+    cursor = db.cursor(dictionary=True)
 
-    cursor.execute("""
-        UPDATE agendamentos
-        SET valor_pix=%s,
-            valor_dinheiro=%s,
-            valor_final=%s,
-            finalizado=1
-        WHERE id=%s
-    """, (valor_pix, valor_dinheiro, total, id_cliente))
+    registrado = resumo.registrar_pagamento(
+        cursor,
+        id_cliente,
+        valor_pix=valor_pix,
+        valor_dinheiro=valor_dinheiro,
+        valor_final=total
+    )
 
-    db.commit()
+    if registrado:
+        db.commit()
+    else:
+        db.rollback()
     cursor.close()
     db.close()
 
+    if not registrado:
+        return "Agendamento não encontrado", 404
     return redirect("/admin/dia")
 
-@app.route("/admin/dia")
-def admin_dia():
+@rota("/admin/dia/fechar", methods=["POST"])
+def fechar_dia():
     if not verificar_admin():
-        return "Acesso negado", 403
+        return jsonify({"erro": "Acesso negado"}), 403
 
-    data = request.args.get("data")
+    corpo = request.get_json(silent=True) or {}
 
-    if not data:
-        data = datetime.now().strftime("%Y-%m-%d")
+    try:
+        data = datetime.strptime(corpo.get("data") or "", "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"erro": "Data inválida"}), 400
+
+    pagamentos, invalidos = resumo.ler_pagamentos(corpo.get("pagamentos"))
+    if invalidos:
+        return jsonify({"erro": "Pagamentos inválidos", "posicoes": invalidos}), 400
+    if not pagamentos:
+        return jsonify({"erro": "Nenhum pagamento informado"}), 400
 
     db = get_db_salao()
     cursor = db.cursor(dictionary=True)
 
-    # clientes do dia
-    cursor.execute("""
-        SELECT id, email, horario, valor_pix, valor_dinheiro
-        FROM agendamentos
-        WHERE data = %s
-        ORDER BY horario
-    """, (data,))
-    agendamentos = cursor.fetchall()
+    try:
+        faltando = resumo.registrar_pagamentos(cursor, data, pagamentos)
+        if faltando:
+            db.rollback()
+            cursor.close()
+            db.close()
+            return jsonify({"erro": "Agendamentos de outro dia", "ids": faltando}), 400
+        db.commit()
+    except Exception:
+        db.rollback()
+        cursor.close()
+        db.close()
+        raise
 
-    # resumo do dia
-    cursor.execute("""
-        SELECT
-            SUM(valor_pix) AS pix,
-            SUM(valor_dinheiro) AS dinheiro,
-            SUM(valor_final) AS total
-        FROM agendamentos
-        WHERE data = %s AND finalizado = 1
-    """, (data,))
-    resumo = cursor.fetchone() or {}
+    resumo_do_dia = resumo.resumo_dia(cursor, data)
+    cursor.close()
+    db.close()
+
+    return jsonify({
+        "data": data.strftime("%Y-%m-%d"),
+        "atualizados": len(pagamentos),
+        "resumo": {campo: float(resumo_do_dia.get(campo) or 0) for campo in resumo.CAMPOS},
+    })
 
+@rota("/admin/dia")
+def admin_dia():
+    if not verificar_admin():
+        return "Acesso negado", 403
+
+    return pagina_admin()
+
+@rota("/admin/exportar")
+def admin_exportar():
+    if not verificar_admin():
+        return "Acesso negado", 403
+
+    hoje = relogio.hoje()
+    tipo = request.args.get("tipo", "agendamentos")
+    formato = request.args.get("formato", "csv")
+    pagamento = request.args.get("pagamento") or None
+
+    try:
+        inicio = datetime.strptime(request.args.get("inicio") or exportacao.inicio_padrao(tipo, hoje).strftime("%Y-%m-%d"), "%Y-%m-%d").date()
+        fim = datetime.strptime(request.args.get("fim") or hoje.strftime("%Y-%m-%d"), "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"erro": "Data inválida"}), 400
+
+    if tipo not in exportacao.COLUNAS or formato not in exportacao.FORMATOS:
+        return jsonify({"erro": "Tipo ou formato inválido"}), 400
+
+    if exportacao.historico_apagado(tipo, inicio):
+        return jsonify({
+            "erro": "Os agendamentos de antes de hoje já foram apagados pela limpeza. "
+                    "Exporte o resumo (tipo=resumo) ou ligue MANUTENCAO_ARQUIVAR=1."
+        }), 409
+
+    # o resumo diário não separa por forma de pagamento
+    if tipo != "agendamentos":
+        pagamento = None
+    if pagamento and pagamento not in exportacao.FILTROS_PAGAMENTO:
+        return jsonify({"erro": "Filtro de pagamento inválido"}), 400
+
+    return exportacao.resposta(tipo, formato, inicio, fim, pagamento)
+
+@rota("/admin/relatorio")
+def admin_relatorio():
+    if not verificar_admin():
+        return "Acesso negado", 403
+
+    hoje = relogio.hoje()
+    agrupar = request.args.get("agrupar", "dia")
+
+    try:
+        inicio = datetime.strptime(request.args.get("inicio") or hoje.replace(day=1).strftime("%Y-%m-%d"), "%Y-%m-%d").date()
+        fim = datetime.strptime(request.args.get("fim") or hoje.strftime("%Y-%m-%d"), "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"erro": "Data inválida"}), 400
+
+    if agrupar not in ("dia", "semana", "mes"):
+        return jsonify({"erro": "Agrupamento inválido"}), 400
+
+    db = get_db_salao()
+    cursor = db.cursor(dictionary=True)
+    periodos = resumo.relatorio(cursor, inicio, fim, agrupar)
+    totais = resumo.resumo_periodo(cursor, inicio, fim)
     cursor.close()
     db.close()
 
-    return render_template(
-        "admin.html",
-        agendamentos=agendamentos,
-        resumo=resumo,
-        hoje=data
+    return jsonify({
+        "inicio": inicio.strftime("%Y-%m-%d"),
+        "fim": fim.strftime("%Y-%m-%d"),
+        "agrupar": agrupar,
+        "periodos": periodos,
+        "totais": {campo: float(totais.get(campo) or 0) for campo in resumo.CAMPOS},
+    })
+
+# ================== FÁBRICA ==================
+def criar_app(config=None):
+    # as threads de fundo (fila de email, limpeza, avisos) registram erros
+    # pelo logging; sem um handler na raiz sairiam sem nível nem horário
+    logging.basicConfig(
+        level=os.getenv("LOG_NIVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
     )
+    app = Flask(__name__)
+
+    app.secret_key = os.getenv("SECRET_KEY") or "chave_teste_fixa"
+    app.config["PROPAGATE_EXCEPTIONS"] = True
+    app.config["SESSION_PERMANENT"] = False
+    app.config.update(config or {})
+
+    # limites primeiro: o pedido recusado não chega a abrir sessão nem banco
+    limites.init_app(app)
+    banco.init_app(app)
+    compressao.init_app(app)
+    sessoes.init_app(app)
+    manutencao.init_app(app)
+    migracoes.init_app(app)
+    fila_email.init_app(app)
+    permissoes.init_app(app)
+    resumo.init_app(app)
+    assets.init_app(app)
+    paginas.init_app(app)
+    metricas.init_app(app, fontes={
+        "pool": banco.metricas,
+        "limpeza": manutencao.metricas,
+        "email": fila_email.metricas,
+        "email_fila": lambda: {"profundidade": fila_email.profundidade()},
+        "cache_horarios": lambda: ocupacao.cache_horarios().metricas,
+        "cache_papeis": lambda: permissoes.cache_papeis().metricas,
+        "senhas": senhas.metricas,
+        "cache_paginas": lambda: paginas.cache_paginas().metricas,
+        "sessoes": sessoes.metricas,
+        "compressao": compressao.metricas,
+        "cache_sessoes": lambda: sessoes.cache_sessoes().metricas,
+        "avisos": avisos.metricas,
+        "limites": lambda: dict(limites.metricas, baldes=len(limites.baldes())),
+    })
+
+    for regra, funcao, opcoes in ROTAS:
+        app.add_url_rule(regra, view_func=funcao, **opcoes)
+
+    return app
+
+# ================== GUNICORN ==================
+# Com preload_app o master importa o app uma vez e os workers nascem por
+# fork. aquecer() roda no master: o que ele importa os workers herdam pronto.
+# Pools, threads e clientes de cache continuam sendo criados em cada worker
+# (todos conferem o pid); iniciar_worker() só adianta as threads para o
+# primeiro pedido não pagar por elas.
+def aquecer():
+    banco.driver()
+    fila_email.aquecer()
+
+def iniciar_worker():
+    fila_email.iniciar()
+    manutencao.iniciar()
+
+app = criar_app()
 
 if __name__ == "__main__":
     app.run()
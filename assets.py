@@ -0,0 +1,209 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+
+from flask import request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# ================== ARQUIVOS ESTÁTICOS ==================
+# "flask assets" copia static/ para static/dist/ com o hash do conteúdo no
+# nome, gera .gz/.br dos arquivos de texto e versões menores das imagens
+# grandes. Com o manifest presente, url_for('static', ...) passa a apontar
+# para a versão com hash, servida com cache imutável.
+# static/dist/ não vai para o git: o Procfile roda o "flask assets" antes de
+# subir o gunicorn, em cada instância. Os nomes só dependem do conteúdo (e o
+# gzip não grava data), então todas as instâncias geram os mesmos arquivos.
+PASTA_DIST = "dist"
+MANIFEST = "manifest.json"
+
+COMPRIMIR = (".css", ".js", ".svg", ".json", ".txt", ".html")
+REDIMENSIONAR = (".png", ".jpg", ".jpeg")
+LARGURAS = (480, 960, 1600)
+TAMANHO_MINIMO_VARIANTES = 100 * 1024
+
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+
+URL_CSS = re.compile(r"url\((['\"]?)(?!data:|https?:|/)([^'\")]+)\1\)")
+
+_manifest = {"arquivos": {}, "variantes": {}}
+
+
+def _hash(conteudo):
+    return hashlib.md5(conteudo).hexdigest()[:10]
+
+
+def _nome_com_hash(caminho, conteudo, sufixo=""):
+    base, ext = os.path.splitext(caminho)
+    return f"{base}{sufixo}.{_hash(conteudo)}{ext}"
+
+
+def _gravar(destino, conteudo):
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    with open(destino, "wb") as f:
+        f.write(conteudo)
+
+    if destino.endswith(COMPRIMIR):
+        with open(destino + ".gz", "wb") as f:
+            f.write(gzip.compress(conteudo, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(destino + ".br", "wb") as f:
+                f.write(brotli.compress(conteudo, quality=11))
+
+
+def _pillow():
+    # só o "flask assets" usa o Pillow; importar no boot de cada worker custa caro
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+def _variantes(origem, relativo, dist):
+    Image = _pillow()
+    if Image is None or os.path.getsize(origem) < TAMANHO_MINIMO_VARIANTES:
+        return []
+
+    variantes = []
+    with Image.open(origem) as imagem:
+        for largura in LARGURAS:
+            if largura >= imagem.width:
+                break
+
+            altura = round(imagem.height * largura / imagem.width)
+            copia = imagem.resize((largura, altura), Image.LANCZOS)
+
+            caminho_tmp = os.path.join(dist, "tmp.webp")
+            copia.save(caminho_tmp, "WEBP", quality=80)
+            with open(caminho_tmp, "rb") as f:
+                conteudo = f.read()
+            os.remove(caminho_tmp)
+
+            nome = _nome_com_hash(os.path.splitext(relativo)[0] + ".webp", conteudo, f".{largura}w")
+            _gravar(os.path.join(dist, nome), conteudo)
+            variantes.append([largura, f"{PASTA_DIST}/{nome}"])
+
+    return variantes
+
+
+def construir(pasta_static):
+    dist = os.path.join(pasta_static, PASTA_DIST)
+    shutil.rmtree(dist, ignore_errors=True)
+
+    manifest = {"arquivos": {}, "variantes": {}}
+    css = []
+
+    for raiz, pastas, arquivos in os.walk(pasta_static):
+        if os.path.abspath(raiz) == os.path.abspath(pasta_static) and PASTA_DIST in pastas:
+            pastas.remove(PASTA_DIST)
+
+        for nome in arquivos:
+            origem = os.path.join(raiz, nome)
+            relativo = os.path.relpath(origem, pasta_static).replace(os.sep, "/")
+
+            # o CSS é processado depois, para apontar para as imagens com hash
+            if relativo.endswith(".css"):
+                css.append(relativo)
+                continue
+
+            with open(origem, "rb") as f:
+                conteudo = f.read()
+
+            nome_hash = _nome_com_hash(relativo, conteudo)
+            _gravar(os.path.join(dist, nome_hash), conteudo)
+            manifest["arquivos"][relativo] = f"{PASTA_DIST}/{nome_hash}"
+
+            if relativo.lower().endswith(REDIMENSIONAR):
+                variantes = _variantes(origem, relativo, dist)
+                if variantes:
+                    manifest["variantes"][relativo] = variantes
+
+    for relativo in css:
+        with open(os.path.join(pasta_static, relativo), encoding="utf-8") as f:
+            texto = f.read()
+
+        pasta_css = os.path.dirname(relativo)
+
+        def trocar(m):
+            alvo = os.path.normpath(os.path.join(pasta_css, m.group(2))).replace(os.sep, "/")
+            if alvo not in manifest["arquivos"]:
+                return m.group(0)
+            # dentro de dist/ o caminho relativo entre os arquivos é o mesmo
+            destino = manifest["arquivos"][alvo][len(PASTA_DIST) + 1:]
+            return f"url({m.group(1)}{os.path.relpath(destino, pasta_css).replace(os.sep, '/')}{m.group(1)})"
+
+        conteudo = URL_CSS.sub(trocar, texto).encode("utf-8")
+        nome_hash = _nome_com_hash(relativo, conteudo)
+        _gravar(os.path.join(dist, nome_hash), conteudo)
+        manifest["arquivos"][relativo] = f"{PASTA_DIST}/{nome_hash}"
+
+    with open(os.path.join(dist, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+    return manifest
+
+
+def carregar(pasta_static):
+    global _manifest
+
+    try:
+        with open(os.path.join(pasta_static, PASTA_DIST, MANIFEST), encoding="utf-8") as f:
+            _manifest = json.load(f)
+    except FileNotFoundError:
+        _manifest = {"arquivos": {}, "variantes": {}}
+
+    return _manifest
+
+
+def srcset(filename):
+    return ", ".join(
+        f"{url_for('static', filename=caminho)} {largura}w"
+        for largura, caminho in _manifest["variantes"].get(filename, [])
+    )
+
+
+def init_app(app):
+    carregar(app.static_folder)
+    pasta_dist = os.path.join(app.static_folder, PASTA_DIST)
+
+    @app.url_defaults
+    def _url_com_hash(endpoint, values):
+        if endpoint == "static":
+            filename = values.get("filename")
+            if filename in _manifest["arquivos"]:
+                values["filename"] = _manifest["arquivos"][filename]
+
+    @app.route(f"/static/{PASTA_DIST}/<path:filename>")
+    def static_dist(filename):
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        codificacao = None
+
+        if filename.endswith(COMPRIMIR):
+            for formato, ext in (("br", ".br"), ("gzip", ".gz")):
+                if request.accept_encodings[formato] and os.path.exists(os.path.join(pasta_dist, filename + ext)):
+                    codificacao = formato
+                    filename += ext
+                    break
+
+        response = send_from_directory(pasta_dist, filename, mimetype=mimetype, max_age=31536000)
+        response.headers["Cache-Control"] = CACHE_IMUTAVEL
+        response.vary.add("Accept-Encoding")
+        if codificacao:
+            response.headers["Content-Encoding"] = codificacao
+        return response
+
+    app.jinja_env.globals["srcset"] = srcset
+
+    @app.cli.command("assets")
+    def _assets():
+        manifest = construir(app.static_folder)
+        carregar(app.static_folder)
+        print(f"{len(manifest['arquivos'])} arquivos e {len(manifest['variantes'])} imagens com variantes em static/{PASTA_DIST}")
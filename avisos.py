@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from queue import Empty, Full, Queue
+from threading import Lock, Thread
+
+from flask import Response
+
+import banco
+import disponibilidade
+from cache import cliente_compartilhado, compartilhado
+
+# ================== AVISOS DE OCUPAÇÃO (SSE) ==================
+# A página de agendamento abre um EventSource em /api/disponibilidade/eventos
+# e, a cada reserva ou cancelamento, recebe a máscara de horários livres do
+# dia que mudou (no mesmo formato da grade de /api/disponibilidade). Cada
+# conexão aberta é só uma fila pequena esperando, então um worker gevent
+# segura centenas delas.
+#   AVISOS              -> 1 liga, 0 desliga; por padrão só no modo gevent
+#                          (no sync/gthread cada conexão prende um worker) e
+#                          com CACHE_BACKEND=redis
+#   AVISOS_MAX_CONEXOES -> conexões abertas por worker (500)
+#   AVISOS_PING         -> segundos entre comentários de keep-alive (15)
+#   AVISOS_DURACAO      -> o servidor fecha a conexão depois disso e o
+#                          navegador reconecta sozinho (300)
+# Com CACHE_BACKEND=redis o aviso passa pelo pub/sub do redis e chega nas
+# conexões de todos os workers. Sem ele, uma reserva só avisaria quem está
+# conectado ao mesmo worker; AVISOS=1 sem redis só faz sentido com um worker.
+CANAL = "salao:avisos:ocupacao"
+TAMANHO_FILA = 32
+
+_ouvinte_pid = None
+_lock = Lock()
+log = logging.getLogger(__name__)
+
+
+def ativo():
+    valor = os.getenv("AVISOS")
+    if valor:
+        return valor == "1"
+    return banco.cooperativo() and compartilhado()
+
+def max_conexoes():
+    return int(os.getenv("AVISOS_MAX_CONEXOES", 500))
+
+def intervalo_ping():
+    return float(os.getenv("AVISOS_PING", 15))
+
+def duracao():
+    return float(os.getenv("AVISOS_DURACAO", 300))
+
+
+# ================== HUB ==================
+class _Assinante:
+    __slots__ = ("fila", "atrasado")
+
+    def __init__(self):
+        self.fila = Queue(maxsize=TAMANHO_FILA)
+        self.atrasado = False
+
+
+class Hub:
+    # Distribui cada aviso para as conexões abertas neste worker. Quem não
+    # consome a tempo (fila cheia) é desligado e reconecta com a grade nova.
+
+    def __init__(self):
+        self._assinantes = set()
+        self._lock = Lock()
+        self.metricas = {"enviados": 0, "atrasados": 0, "recusados": 0}
+
+    def assinar(self):
+        with self._lock:
+            if len(self._assinantes) >= max_conexoes():
+                self.metricas["recusados"] += 1
+                return None
+            assinante = _Assinante()
+            self._assinantes.add(assinante)
+            return assinante
+
+    def cancelar(self, assinante):
+        with self._lock:
+            self._assinantes.discard(assinante)
+
+    def distribuir(self, mensagem):
+        with self._lock:
+            assinantes = list(self._assinantes)
+
+        for assinante in assinantes:
+            try:
+                assinante.fila.put_nowait(mensagem)
+                self.metricas["enviados"] += 1
+            except Full:
+                assinante.atrasado = True
+                self.cancelar(assinante)
+                self.metricas["atrasados"] += 1
+
+    def conexoes(self):
+        return len(self._assinantes)
+
+
+hub = Hub()
+
+
+def metricas():
+    return dict(hub.metricas, conexoes=hub.conexoes())
+
+
+# ================== PUBLICAÇÃO ==================
+def publicar(data):
+    # chamado depois do commit da reserva ou do cancelamento; um erro aqui
+    # não desfaz a operação, no pior caso a página só vê a mudança depois
+    if isinstance(data, str):
+        data = datetime.strptime(data, "%Y-%m-%d").date()
+
+    try:
+        payload = disponibilidade.grade(data, 1)
+        mensagem = json.dumps(
+            {"data": payload["inicio"], "livres": payload["livres"][0]},
+            separators=(",", ":")
+        )
+
+        if compartilhado():
+            cliente_compartilhado().publish(CANAL, mensagem)
+        else:
+            hub.distribuir(mensagem)
+    except Exception:
+        log.exception("Erro ao publicar aviso de ocupação")
+
+
+def _ouvir():
+    # uma thread por worker repassa o pub/sub do store compartilhado ao hub
+    while True:
+        try:
+            pubsub = cliente_compartilhado().pubsub()
+            pubsub.subscribe(CANAL)
+            for item in pubsub.listen():
+                if item["type"] != "message":
+                    continue
+                dados = item["data"]
+                hub.distribuir(dados.decode() if isinstance(dados, bytes) else dados)
+        except Exception:
+            log.exception("Erro no pub/sub de avisos")
+            time.sleep(1)
+
+
+def _iniciar_ouvinte():
+    global _ouvinte_pid
+
+    with _lock:
+        # depois de um fork a thread do processo pai não existe mais
+        if _ouvinte_pid == os.getpid():
+            return
+        _ouvinte_pid = os.getpid()
+
+    Thread(target=_ouvir, name="avisos-pubsub", daemon=True).start()
+
+
+# ================== CONEXÃO SSE ==================
+def _fluxo(assinante):
+    fim = time.monotonic() + duracao()
+    try:
+        # se cair, o navegador tenta de novo em 3s
+        yield "retry: 3000\n\n"
+
+        while not assinante.atrasado and time.monotonic() < fim:
+            try:
+                mensagem = assinante.fila.get(timeout=intervalo_ping())
+            except Empty:
+                yield ": ping\n\n"
+                continue
+            yield f"event: dia\ndata: {mensagem}\n\n"
+    finally:
+        hub.cancelar(assinante)
+
+
+def resposta():
+    if not ativo():
+        # 204 faz o EventSource desistir; a página volta a pedir a grade de tempos em tempos
+        return Response(status=204)
+
+    if compartilhado() and _ouvinte_pid != os.getpid():
+        _iniciar_ouvinte()
+
+    assinante = hub.assinar()
+    if assinante is None:
+        return Response(status=503, headers={"Retry-After": "30"})
+
+    response = Response(_fluxo(assinante), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # o nginx não deve segurar os eventos no buffer
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,196 @@
+import os
+import sys
+import time
+from threading import Lock
+
+from flask import g, has_app_context
+
+from metricas import CursorMedido, registrar_checkout
+
+# ================== CONFIGURAÇÃO DO POOL ==================
+# Cada worker do gunicorn tem seu próprio pool (criado no primeiro uso,
+# então as variáveis do .env já estão carregadas)
+def cooperativo():
+    # worker gevent: o gunicorn já aplicou o monkey patch antes de carregar o app
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("socket")
+
+def pool_tamanho():
+    # com gevent um worker atende muitos requests ao mesmo tempo
+    return int(os.getenv("DB_POOL_SIZE", 20 if cooperativo() else 5))
+
+def pool_timeout():
+    return float(os.getenv("DB_POOL_TIMEOUT", 5))
+
+def pool_ping_apos():
+    return float(os.getenv("DB_POOL_PING_APOS", 30))
+
+def driver_puro():
+    # a extensão em C do mysql.connector faz I/O fora do socket do Python e
+    # travaria o loop do gevent durante cada consulta
+    valor = os.getenv("DB_DRIVER_PURO")
+    if valor:
+        return valor == "1"
+    return cooperativo()
+
+def driver():
+    # o mysql.connector só é importado no primeiro uso do banco: rotas
+    # estáticas, health check e o boot do worker não pagam por ele
+    import mysql.connector.pooling
+    return mysql.connector
+
+BANCOS = {
+    "login": "DB_LOGIN",
+    "salao": "DB_SALAO",
+}
+
+_pools = {}
+_pools_pid = None
+_lock = Lock()
+
+metricas = {
+    "checkouts": 0,
+    "esperas": 0,
+    "tempo_espera_total": 0.0,
+    "tempo_espera_max": 0.0,
+    "esgotamentos": 0,
+    "reconexoes": 0,
+}
+
+
+def _config(prefixo):
+    return {
+        "host": os.getenv(f"{prefixo}_HOST") or "127.0.0.1",
+        "user": os.getenv(f"{prefixo}_USER") or "root",
+        "password": os.getenv(f"{prefixo}_PASSWORD") or "",
+        "database": os.getenv(f"{prefixo}_NAME"),
+        "port": int(os.getenv(f"{prefixo}_PORT", 3306)),
+        "use_pure": driver_puro(),
+    }
+
+
+def _registrar(chave, valor=1):
+    with _lock:
+        metricas[chave] += valor
+
+
+def _get_pool(nome):
+    global _pools_pid
+
+    with _lock:
+        # depois de um fork o pool herdado não pode ser reutilizado
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+
+        if nome not in _pools:
+            _pools[nome] = driver().pooling.MySQLConnectionPool(
+                pool_name=f"{nome}_{os.getpid()}",
+                pool_size=pool_tamanho(),
+                pool_reset_session=True,
+                **_config(BANCOS[nome])
+            )
+        return _pools[nome]
+
+
+def _verificar_conexao(conn):
+    cnx = conn._cnx
+    ultimo_uso = getattr(cnx, "_ultimo_uso", None)
+
+    if ultimo_uso is None or time.monotonic() - ultimo_uso > pool_ping_apos():
+        try:
+            conn.ping(reconnect=False)
+        except driver().errors.Error:
+            conn.reconnect(attempts=2, delay=0)
+            _registrar("reconexoes")
+
+
+def checkout(nome):
+    pool = _get_pool(nome)
+    timeout = pool_timeout()
+    inicio = time.monotonic()
+    esgotou = False
+
+    while True:
+        try:
+            conn = pool.get_connection()
+            break
+        except driver().errors.PoolError:
+            if not esgotou:
+                esgotou = True
+                _registrar("esgotamentos")
+
+            if time.monotonic() - inicio >= timeout:
+                raise
+            time.sleep(0.01)
+
+    espera = time.monotonic() - inicio
+    with _lock:
+        metricas["checkouts"] += 1
+        if esgotou:
+            metricas["esperas"] += 1
+        metricas["tempo_espera_total"] += espera
+        metricas["tempo_espera_max"] = max(metricas["tempo_espera_max"], espera)
+
+    _verificar_conexao(conn)
+    registrar_checkout(nome, time.monotonic() - inicio)
+    return conn
+
+
+def devolver(conn):
+    try:
+        conn._cnx._ultimo_uso = time.monotonic()
+    except AttributeError:
+        pass
+    conn.close()
+
+
+class ConexaoRequisicao:
+    # Conexão presa à requisição: o close() das rotas não devolve nada,
+    # quem devolve ao pool é o teardown
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def close(self):
+        pass
+
+    def cursor(self, *args, **kwargs):
+        return CursorMedido(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+
+def _get_db(nome):
+    if not has_app_context():
+        return checkout(nome)
+
+    conexoes = g.setdefault("_conexoes", {})
+    if nome not in conexoes:
+        conexoes[nome] = ConexaoRequisicao(checkout(nome))
+    return conexoes[nome]
+
+
+def get_db_login():
+    return _get_db("login")
+
+
+def get_db_salao():
+    return _get_db("salao")
+
+
+def fechar_conexoes(exc=None):
+    conexoes = g.pop("_conexoes", {})
+    for conexao in conexoes.values():
+        conn = conexao._conn
+        try:
+            if exc is not None or conn.in_transaction:
+                conn.rollback()
+        except driver().errors.Error:
+            pass
+        devolver(conn)
+
+
+def init_app(app):
+    app.teardown_appcontext(fechar_conexoes)
@@ -0,0 +1,157 @@
+# Conexões SSE paradas num worker gevent e o tempo até o aviso chegar.
+#
+#   python bench/bench_avisos.py --conexoes 500 --reservas 20
+#
+# Sobe o gunicorn no modo gevent com um worker (como o bench/modos.py), abre
+# --conexoes EventSource em /api/disponibilidade/eventos e mede quanto a
+# memória do worker cresce por conexão. Depois faz --reservas agendamentos e
+# mede, para cada um, o tempo entre o POST e o aviso chegar em todas as
+# conexões (p50/p95 entre as conexões e o pior caso).
+import argparse
+import os
+import random
+import selectors
+import socket
+import sys
+import tempfile
+import time
+import urllib.parse
+from argparse import Namespace
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import carga
+import modos
+
+
+def rss_kb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for linha in f:
+            if linha.startswith("VmRSS:"):
+                return int(linha.split()[1])
+    return 0
+
+
+def workers(pid_mestre):
+    with open(f"/proc/{pid_mestre}/task/{pid_mestre}/children") as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def abrir(porta, quantidade):
+    seletor = selectors.DefaultSelector()
+    conexoes = []
+    for _ in range(quantidade):
+        s = socket.create_connection(("127.0.0.1", porta))
+        s.sendall(b"GET /api/disponibilidade/eventos HTTP/1.1\r\nHost: bench\r\n"
+                  b"Accept: text/event-stream\r\n\r\n")
+        conexoes.append(s)
+
+    # espera o "retry:" de todas, sinal de que já estão inscritas no hub
+    for s in conexoes:
+        s.settimeout(10)
+        recebido = b""
+        while b"retry:" not in recebido:
+            parte = s.recv(4096)
+            if not parte:
+                raise RuntimeError("o servidor fechou a conexão SSE")
+            recebido += parte
+        s.setblocking(False)
+        seletor.register(s, selectors.EVENT_READ)
+
+    return seletor, conexoes
+
+
+def esperar_aviso(seletor, quantidade, limite=10):
+    # devolve o instante em que cada conexão recebeu "event: dia"
+    chegadas = {}
+    fim = time.perf_counter() + limite
+    while len(chegadas) < quantidade and time.perf_counter() < fim:
+        for chave, _ in seletor.select(timeout=0.5):
+            try:
+                dados = chave.fileobj.recv(65536)
+            except BlockingIOError:
+                continue
+            if b"event: dia" in dados and chave.fileobj not in chegadas:
+                chegadas[chave.fileobj] = time.perf_counter()
+    return list(chegadas.values())
+
+
+def reservar(navegador, base):
+    # tenta até acertar um dia aberto com horário livre; só reserva feita gera aviso
+    while True:
+        dia = date.today() + timedelta(days=random.randint(2, 45))
+        if dia.weekday() in (0, 6):
+            continue
+        dados = urllib.parse.urlencode({
+            "data": dia.strftime("%Y-%m-%d"),
+            "horario": random.choice(carga.HORARIOS),
+            "telefone": "(11) 91234-5678",
+            "servicos": "Corte de Cabelo",
+            "total": "38.00",
+        })
+        inicio = time.perf_counter()
+        resposta = navegador.open(f"{base}/agendamento", dados.encode())
+        resposta.read()
+        if "/confirmacao/" in resposta.geturl():
+            return inicio
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conexoes", type=int, default=500)
+    parser.add_argument("--reservas", type=int, default=20)
+    parser.add_argument("--latencia", type=float, default=5, help="Latência simulada por comando SQL (ms)")
+    parser.add_argument("--porta", type=int, default=8766)
+    args = parser.parse_args()
+
+    random.seed(42)
+    # sem carência entre agendamentos: cada cliente do bench reserva uma vez
+    os.environ.update(
+        AVISOS="1",
+        AVISOS_MAX_CONEXOES=str(args.conexoes + 10),
+        CACHE_BACKEND="local",
+        AGENDAMENTO_INTERVALO_DIAS="0",
+    )
+
+    banco_sqlite = os.path.join(tempfile.mkdtemp(prefix="avisos_salao_"), "salao.db")
+    carga.popular(banco_sqlite, args.reservas + 2, 30)
+
+    config = Namespace(workers=1, threads=1, clientes=args.conexoes + 50, latencia=args.latencia)
+    processo = modos.subir("gevent", args.porta, banco_sqlite, config)
+    base = f"http://127.0.0.1:{args.porta}"
+
+    try:
+        # um request antes, para o worker já ter carregado tudo
+        navegadores = [modos.cliente(base, u) for u in range(2, args.reservas + 2)]
+        worker = workers(processo.pid)[0]
+        antes = rss_kb(worker)
+
+        seletor, conexoes = abrir(args.porta, args.conexoes)
+        depois = rss_kb(worker)
+        print(f"{args.conexoes} conexões abertas: worker {antes / 1024:.1f} MB -> {depois / 1024:.1f} MB "
+              f"({(depois - antes) / args.conexoes:.1f} KB por conexão)")
+
+        atrasos, piores, perdidos = [], [], 0
+        for navegador in navegadores:
+            inicio = reservar(navegador, base)
+            chegadas = esperar_aviso(seletor, args.conexoes)
+            perdidos += args.conexoes - len(chegadas)
+            tempos = [(t - inicio) * 1000 for t in chegadas]
+            if tempos:
+                atrasos.extend(tempos)
+                piores.append(max(tempos))
+
+        print(f"{len(navegadores)} reservas: aviso em p50 {carga.percentil(atrasos, 0.50):.1f}ms, "
+              f"p95 {carga.percentil(atrasos, 0.95):.1f}ms, pior {max(piores, default=0):.1f}ms; "
+              f"{perdidos} avisos não chegaram")
+
+        for s in conexoes:
+            s.close()
+    finally:
+        processo.terminate()
+        processo.wait()
+
+
+if __name__ == "__main__":
+    main()
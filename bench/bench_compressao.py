@@ -0,0 +1,99 @@
+# Bytes na rede e tempo até o primeiro byte, com e sem compressão.
+#
+#   python bench/bench_compressao.py --repeticoes 20
+#
+# Roda o app em processo sobre o banco do bench/carga.py (com um cliente de
+# histórico longo e um dia cheio para o admin) e pede cada rota sem
+# Accept-Encoding, com gzip e, se o pacote brotli estiver instalado, com br.
+# O "antes" é COMPRESSAO=0. O TTFB é o tempo até o app entregar o primeiro
+# pedaço do corpo; nas páginas em stream ele sai antes do template terminar.
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import carga
+import sqlite_mysql
+
+ROTAS = [
+    ("home", "/", None),
+    ("sobre", "/sobre", None),
+    ("disponibilidade", "/api/disponibilidade", None),
+    ("agendamentos", "/agendamentos", 2),
+    ("admin_dia", "/admin/dia?data={dia}", 1),
+    ("metrics", "/metrics", None),
+]
+
+
+def medir(cliente, url, encoding, repeticoes):
+    headers = {"Authorization": f"Bearer {os.environ['METRICAS_TOKEN']}"}
+    if encoding:
+        headers["Accept-Encoding"] = encoding
+    primeiros, totais, tamanho = [], [], 0
+
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resposta = cliente.get(url, headers=headers, buffered=False)
+        corpo = 0
+        primeiro = None
+        for parte in resposta.response:
+            if parte and primeiro is None:
+                primeiro = time.perf_counter() - inicio
+            corpo += len(parte)
+        resposta.close()
+        totais.append(time.perf_counter() - inicio)
+        primeiros.append(primeiro or totais[-1])
+
+        cabecalhos = sum(len(k) + len(v) + 4 for k, v in resposta.headers.items())
+        tamanho = corpo + cabecalhos
+
+    return tamanho, statistics.median(primeiros) * 1000, statistics.median(totais) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--dias", type=int, default=365)
+    args = parser.parse_args()
+
+    # /metrics só responde com o token configurado
+    os.environ.setdefault("METRICAS_TOKEN", "bench")
+
+    caminho = os.path.join(carga.PASTA, "salao.db")
+    # poucos clientes: cada um fica com um histórico de centenas de agendamentos
+    carga.popular(caminho, 3, args.dias)
+    sqlite_mysql.usar_no_app(caminho)
+
+    from app import app
+    import compressao
+    app.logger.disabled = True
+
+    dia = (date.today() - timedelta(days=1)).strftime("%Y-%m-%d")
+    clientes = {}
+    for usuario in (None, 1, 2):
+        clientes[usuario] = app.test_client()
+        if usuario:
+            with clientes[usuario].session_transaction() as s:
+                s["usuario_id"] = usuario
+                s["email"] = f"cliente{usuario}@exemplo.com"
+                s["is_admin"] = 1 if usuario == 1 else 0
+
+    modos = [("antes", "0", None), ("antes+gzip", "0", "gzip"), ("gzip", "1", "gzip")]
+    if compressao.brotli is not None:
+        modos.append(("br", "1", "br"))
+
+    print(f"{'rota':<17}{'modo':<12}{'bytes':>9}{'ttfb ms':>10}{'total ms':>10}")
+    for nome, url, usuario in ROTAS:
+        url = url.format(dia=dia)
+        for modo, ativa, encoding in modos:
+            os.environ["COMPRESSAO"] = ativa
+            tamanho, ttfb, total = medir(clientes[usuario], url, encoding, args.repeticoes)
+            print(f"{nome:<17}{modo:<12}{tamanho:>9}{ttfb:>10.2f}{total:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
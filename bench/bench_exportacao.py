@@ -0,0 +1,81 @@
+# Memória e tempo da exportação conforme o período cresce.
+#
+#   python bench/bench_exportacao.py --dias 1500
+#
+# Popula --dias dias de agendamentos no SQLite do bench/carga.py e exporta,
+# em processo e com gzip, períodos cada vez maiores. Para cada um mostra as
+# linhas, os bytes que saíram, o tempo e o pico de memória alocada durante o
+# stream (tracemalloc), que deve ficar parado enquanto as linhas crescem.
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import carga
+import sqlite_mysql
+
+
+def exportar(cliente, inicio, fim, formato):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    comeco = time.perf_counter()
+
+    resposta = cliente.get(
+        f"/admin/exportar?inicio={inicio}&fim={fim}&formato={formato}",
+        headers={"Accept-Encoding": "gzip"},
+        buffered=False,
+    )
+    enviados = 0
+    for parte in resposta.response:
+        enviados += len(parte)
+    resposta.close()
+
+    duracao = time.perf_counter() - comeco
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return enviados, duracao, pico
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dias", type=int, default=1500)
+    parser.add_argument("--formato", default="csv", choices=["csv", "json"])
+    args = parser.parse_args()
+
+    caminho = os.path.join(carga.PASTA, "salao.db")
+    carga.popular(caminho, 50, args.dias)
+    sqlite_mysql.usar_no_app(caminho)
+
+    from app import app
+    import banco
+    app.logger.disabled = True
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as s:
+        s["usuario_id"] = 1
+        s["email"] = "cliente1@exemplo.com"
+        s["is_admin"] = 1
+
+    db = banco.checkout("salao")
+    cursor = db.cursor()
+    fim = date.today()
+
+    print(f"{'dias':>6}{'linhas':>9}{'KB gzip':>10}{'ms':>9}{'pico KB':>10}")
+    for dias in (30, 365, args.dias):
+        inicio = fim - timedelta(days=dias)
+        cursor.execute("SELECT COUNT(*) FROM agendamentos WHERE data BETWEEN %s AND %s", (inicio, fim))
+        linhas = cursor.fetchone()[0]
+
+        enviados, duracao, pico = exportar(cliente, inicio, fim, args.formato)
+        print(f"{dias:>6}{linhas:>9}{enviados / 1024:>10.1f}{duracao * 1000:>9.1f}{pico / 1024:>10.1f}")
+
+    cursor.close()
+    banco.devolver(db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Custo do limite de tentativas e o que ele poupa numa rajada de logins.
+#
+#   python bench/bench_limites.py --rajada 200
+#
+# Mede o tempo de uma verificação do balde (com milhares de IPs diferentes
+# no dicionário) e depois manda --rajada POSTs de login com senha errada do
+# mesmo IP, em processo, com os limites ligados e desligados: quantos
+# chegaram a verificar a senha e quanto tempo a rajada ocupou o worker.
+import argparse
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import carga
+import sqlite_mysql
+
+
+def custo_verificacao(repeticoes, ips):
+    import limites
+
+    baldes = limites.BaldesLocais(limites.tamanho())
+    contador = iter(range(repeticoes * 10))
+
+    def gastar():
+        baldes.gastar(f"login:ip:10.0.{next(contador) % ips}", 20, 60)
+
+    return timeit.timeit(gastar, number=repeticoes) / repeticoes * 1e6
+
+
+def rajada(app, quantidade, ligado):
+    import limites
+    import senhas
+
+    for chave in ("IP", "EMAIL"):
+        os.environ[f"LIMITE_LOGIN_{chave}"] = limites.LIMITES["login"][chave.lower()] if ligado else "0"
+
+    limites._baldes = None
+    verificadas = senhas.metricas["verificacoes"]
+    cliente = app.test_client()
+
+    inicio = time.perf_counter()
+    recusados = 0
+    for _ in range(quantidade):
+        resposta = cliente.post("/login", data={"email": "cliente2@exemplo.com", "senha": "errada"})
+        recusados += resposta.status_code == 429
+    duracao = time.perf_counter() - inicio
+
+    return recusados, senhas.metricas["verificacoes"] - verificadas, duracao
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rajada", type=int, default=200)
+    parser.add_argument("--repeticoes", type=int, default=200000)
+    parser.add_argument("--ips", type=int, default=5000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SENHA_PROCESSOS", "0")
+    caminho = os.path.join(carga.PASTA, "salao.db")
+    carga.popular(caminho, 3, 5)
+    sqlite_mysql.usar_no_app(caminho)
+
+    from app import app
+    app.logger.disabled = True
+
+    print(f"verificação do balde: {custo_verificacao(args.repeticoes, args.ips):.2f} us "
+          f"({args.ips} IPs no dicionário)")
+
+    print(f"{'limites':<10}{'recusados':>10}{'senhas':>8}{'total ms':>10}")
+    for ligado in (False, True):
+        recusados, verificadas, duracao = rajada(app, args.rajada, ligado)
+        print(f"{'ligados' if ligado else 'desligados':<10}{recusados:>10}{verificadas:>8}{duracao * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Throughput de login por núcleo para cada configuração de SENHA_METODO.
+#
+#   python bench/bench_senhas.py --duracao 5
+#   python bench/bench_senhas.py --metodos scrypt:16384:8:1 pbkdf2:sha256:600000 --processos 4
+#
+# Para cada método mede a verificação de senha direto na thread (o que o
+# worker fazia antes) e pelo pool de senhas.py com várias threads pedindo ao
+# mesmo tempo, mostrando logins/s no total e por processo do pool.
+import argparse
+import os
+import sys
+import time
+from threading import Thread
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+METODOS = [
+    "pbkdf2:sha256:600000",
+    "pbkdf2:sha256:1000000",
+    "scrypt:16384:8:1",
+    "scrypt:32768:8:1",
+]
+SENHA = "Senha123"
+
+
+def direto(senha_hash, duracao):
+    total = 0
+    fim = time.perf_counter() + duracao
+    while time.perf_counter() < fim:
+        check_password_hash(senha_hash, SENHA)
+        total += 1
+    return total / duracao
+
+
+def pelo_pool(senhas, senha_hash, duracao, threads):
+    contagens = [0] * threads
+    fim = time.perf_counter() + duracao
+
+    def cliente(i):
+        while time.perf_counter() < fim:
+            senhas.verificar(senha_hash, SENHA)
+            contagens[i] += 1
+
+    # aquece o pool antes de medir
+    senhas.verificar(senha_hash, SENHA)
+
+    inicio = time.perf_counter()
+    lista = [Thread(target=cliente, args=(i,)) for i in range(threads)]
+    for t in lista:
+        t.start()
+    for t in lista:
+        t.join()
+    return sum(contagens) / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--metodos", nargs="+", default=METODOS)
+    parser.add_argument("--duracao", type=float, default=5)
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, help="Clientes simultâneos (padrão: 2x processos)")
+    args = parser.parse_args()
+
+    threads = args.threads or args.processos * 2
+    os.environ["SENHA_PROCESSOS"] = str(args.processos)
+    import senhas
+
+    print(f"pool com {args.processos} processos, {threads} clientes, {args.duracao:.0f}s por medição")
+    print(f"{'método':<24}{'hash ms':>10}{'direto/s':>11}{'pool/s':>10}{'por núcleo':>12}")
+    for metodo in args.metodos:
+        inicio = time.perf_counter()
+        senha_hash = generate_password_hash(SENHA, method=metodo)
+        ms = (time.perf_counter() - inicio) * 1000
+
+        serial = direto(senha_hash, args.duracao)
+        pool = pelo_pool(senhas, senha_hash, args.duracao, threads)
+        print(f"{metodo:<24}{ms:>10.1f}{serial:>11.1f}{pool:>10.1f}{pool / args.processos:>12.1f}")
+
+    senhas.parar()
+
+
+if __name__ == "__main__":
+    main()
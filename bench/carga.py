@@ -0,0 +1,278 @@
+# Teste de carga do fluxo de agendamento, rodando o app em processo contra
+# um SQLite populado e com o transporte de email falso.
+#
+#   python bench/carga.py --duracao 30 --threads 8
+#   python bench/carga.py --salvar-baseline bench/baseline.json
+#   python bench/carga.py --comparar bench/baseline.json --tolerancia 0.15
+#
+# Mostra p50/p95/p99 e requisições por segundo de cada endpoint. Com
+# --comparar, sai com erro se o throughput de algum endpoint cair mais que a
+# tolerância em relação à baseline.
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from threading import Lock, Thread
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import sqlite_mysql
+
+PASTA = tempfile.mkdtemp(prefix="carga_salao_")
+os.environ.setdefault("MANUTENCAO_INTERVALO", "0")
+os.environ.setdefault("EMAIL_TRANSPORTE", "fake")
+os.environ.setdefault("EMAIL_FILA_ARQUIVO", os.path.join(PASTA, "fila_email.db"))
+os.environ.setdefault("METRICAS_LENTO_MS", "")
+# todos os clientes simulados saem de 127.0.0.1: com o limite de tentativas
+# ligado os logins do bench voltariam 429 e contariam como regressão
+os.environ.setdefault("LIMITE_LOGIN_IP", "0")
+os.environ.setdefault("LIMITE_LOGIN_EMAIL", "0")
+
+from werkzeug.security import generate_password_hash
+
+HORARIOS = [
+    "07:10", "08:10", "09:00", "09:50", "10:40", "11:30", "14:00",
+    "14:50", "15:40", "16:30", "17:20", "18:10", "19:00", "19:50",
+]
+SENHA = "Senha123"
+
+# peso de cada cenário no tráfego
+MIX = {
+    "home": 35,
+    "api_horarios": 15,
+    "disponibilidade": 10,
+    "agendamentos": 8,
+    "agendamento_post": 10,
+    "cancelamento": 5,
+    "login": 5,
+    "admin_dia": 12,
+}
+
+
+def popular(caminho, usuarios, dias):
+    # as migrações rodam depois, sobre o histórico, como no banco de produção
+    sqlite_mysql.criar_banco(caminho, migrar=False)
+    db = sqlite_mysql.Conexao(caminho)
+    cursor = db.cursor()
+
+    senha_hash = generate_password_hash(SENHA)
+    cursor.executemany(
+        "INSERT INTO usuario (codigo, email, senha, is_admin) VALUES (%s,%s,%s,%s)",
+        [(i, f"cliente{i}@exemplo.com", senha_hash, 1 if i == 1 else 0) for i in range(1, usuarios + 1)]
+    )
+
+    # histórico passado e alguns horários futuros já ocupados
+    hoje = date.today()
+    linhas = []
+    for d in range(-dias, 30):
+        dia = hoje + timedelta(days=d)
+        for horario in random.sample(HORARIOS, 8 if d < 0 else 3):
+            usuario = random.randint(2, usuarios)
+            linhas.append((
+                usuario, dia, horario + ":00", "Corte de Cabelo", 38, "(11) 91234-5678",
+                f"cliente{usuario}@exemplo.com", 1 if d < 0 else 0
+            ))
+    cursor.executemany(
+        "INSERT INTO agendamentos (usuario_id, data, horario, servicos, total, telefone, email, finalizado) "
+        "VALUES (%s,%s,%s,%s,%s,%s,%s,%s)",
+        linhas
+    )
+    db.commit()
+    db.close()
+
+    sqlite_mysql.aplicar_migracoes(caminho)
+    return len(linhas)
+
+
+class Cliente:
+
+    def __init__(self, app, usuario_id):
+        self.http = app.test_client()
+        self.usuario_id = usuario_id
+        self.email = f"cliente{usuario_id}@exemplo.com"
+        self.reservas = []
+        with self.http.session_transaction() as s:
+            s["usuario_id"] = usuario_id
+            s["email"] = self.email
+            s["is_admin"] = 1 if usuario_id == 1 else 0
+
+    def data_futura(self, minimo=2):
+        return (date.today() + timedelta(days=random.randint(minimo, 45))).strftime("%Y-%m-%d")
+
+    def home(self):
+        return self.http.get("/")
+
+    def api_horarios(self):
+        return self.http.get(f"/api/horarios/{self.data_futura(0)}")
+
+    def disponibilidade(self):
+        return self.http.get(f"/api/disponibilidade?inicio={date.today().strftime('%Y-%m-%d')}")
+
+    def agendamentos(self):
+        return self.http.get("/agendamentos")
+
+    def agendamento_post(self):
+        r = self.http.post("/agendamento", data={
+            "data": self.data_futura(),
+            "horario": random.choice(HORARIOS),
+            "telefone": "(11) 91234-5678",
+            "servicos": ["Corte de Cabelo"],
+            "total": "38.00",
+        })
+        m = re.search(r"/confirmacao/(\d+)", r.headers.get("Location", ""))
+        if m:
+            self.reservas.append(int(m.group(1)))
+        return r
+
+    def cancelamento(self):
+        if not self.reservas:
+            return self.agendamentos()
+        return self.http.get(f"/cancelar-agendamento/{self.reservas.pop()}")
+
+    def login(self):
+        return self.http.post("/login", data={"email": self.email, "senha": SENHA})
+
+    def admin_dia(self):
+        dia = (date.today() - timedelta(days=random.randint(0, 30))).strftime("%Y-%m-%d")
+        return self.http.get(f"/admin/dia?data={dia}")
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def rodar(app, threads, duracao, usuarios):
+    tempos = {nome: [] for nome in MIX}
+    erros = {nome: 0 for nome in MIX}
+    lock = Lock()
+    cenarios = list(MIX)
+    pesos = list(MIX.values())
+    fim = time.perf_counter() + duracao
+
+    def trabalhador(i):
+        # o usuário 1 é o admin; cada thread usa outro cliente
+        cliente_admin = Cliente(app, 1)
+        clientes = [Cliente(app, u) for u in range(2 + i, usuarios + 1, threads)]
+        meus = {nome: [] for nome in MIX}
+        minhas_falhas = {nome: 0 for nome in MIX}
+
+        while time.perf_counter() < fim:
+            nome = random.choices(cenarios, pesos)[0]
+            cliente = cliente_admin if nome == "admin_dia" else random.choice(clientes)
+
+            inicio = time.perf_counter()
+            try:
+                resposta = getattr(cliente, nome)()
+            except Exception:
+                minhas_falhas[nome] += 1
+                continue
+            meus[nome].append(time.perf_counter() - inicio)
+            if resposta.status_code >= 400:
+                minhas_falhas[nome] += 1
+            resposta.close()
+
+        with lock:
+            for nome in MIX:
+                tempos[nome].extend(meus[nome])
+                erros[nome] += minhas_falhas[nome]
+
+    inicio = time.perf_counter()
+    lista = [Thread(target=trabalhador, args=(i,)) for i in range(threads)]
+    for t in lista:
+        t.start()
+    for t in lista:
+        t.join()
+    total = time.perf_counter() - inicio
+
+    resultado = {}
+    for nome in MIX:
+        valores = tempos[nome]
+        resultado[nome] = {
+            "requisicoes": len(valores),
+            "erros": erros[nome],
+            "rps": len(valores) / total,
+            "p50_ms": percentil(valores, 0.50) * 1000,
+            "p95_ms": percentil(valores, 0.95) * 1000,
+            "p99_ms": percentil(valores, 0.99) * 1000,
+        }
+    resultado["total"] = {
+        "requisicoes": sum(len(v) for v in tempos.values()),
+        "erros": sum(erros.values()),
+        "rps": sum(len(v) for v in tempos.values()) / total,
+    }
+    return resultado
+
+
+def imprimir(resultado):
+    print(f"{'endpoint':<18}{'reqs':>8}{'erros':>7}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for nome in MIX:
+        r = resultado[nome]
+        print(f"{nome:<18}{r['requisicoes']:>8}{r['erros']:>7}{r['rps']:>10.1f}"
+              f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+    t = resultado["total"]
+    print(f"{'total':<18}{t['requisicoes']:>8}{t['erros']:>7}{t['rps']:>10.1f}")
+
+
+def comparar(resultado, baseline, tolerancia):
+    regressoes = []
+    for nome, base in baseline.items():
+        atual = resultado.get(nome)
+        if not atual or not base.get("rps"):
+            continue
+        queda = 1 - atual["rps"] / base["rps"]
+        if queda > tolerancia:
+            regressoes.append(f"{nome}: {base['rps']:.1f} -> {atual['rps']:.1f} req/s ({queda:.0%} mais lento)")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duracao", type=float, default=15)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--usuarios", type=int, default=200)
+    parser.add_argument("--dias", type=int, default=365, help="Dias de histórico no banco")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--salvar-baseline")
+    parser.add_argument("--comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    caminho = os.path.join(PASTA, "salao.db")
+    linhas = popular(caminho, args.usuarios, args.dias)
+    sqlite_mysql.usar_no_app(caminho)
+
+    from app import app
+    app.logger.disabled = True
+
+    print(f"{args.usuarios} usuários, {linhas} agendamentos, {args.threads} threads por {args.duracao:.0f}s")
+    resultado = rodar(app, args.threads, args.duracao, args.usuarios)
+    imprimir(resultado)
+
+    if args.salvar_baseline:
+        with open(args.salvar_baseline, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, sort_keys=True)
+        print(f"Baseline salva em {args.salvar_baseline}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressoes = comparar(resultado, baseline, args.tolerancia)
+        if regressoes:
+            print("REGRESSÃO de throughput:")
+            for linha in regressoes:
+                print("  " + linha)
+            sys.exit(1)
+        print(f"OK: nenhum endpoint caiu mais de {args.tolerancia:.0%} em relação à baseline")
+
+
+if __name__ == "__main__":
+    main()
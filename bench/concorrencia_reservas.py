@@ -0,0 +1,107 @@
+# Teste de carga da reserva: centenas de clientes tentando o mesmo horário
+# ao mesmo tempo. Sai com erro se mais de uma reserva (ou nenhuma) passar.
+#
+#   python bench/concorrencia_reservas.py --clientes 300
+#   python bench/concorrencia_reservas.py --clientes 300 --mysql   # usa DB_SALAO_* do .env
+#
+# No modo --mysql a tabela agendamentos precisa existir e ter as migrações
+# aplicadas (flask migrar). Os agendamentos de teste são apagados no fim.
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, datetime, time as hora, timedelta
+from threading import Barrier, Thread
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mysql.connector
+
+import sqlite_mysql
+import reservas
+
+USUARIO_BASE = 900000
+
+
+def preparar_sqlite():
+    caminho = os.path.join(tempfile.mkdtemp(), "reservas.db")
+    sqlite_mysql.criar_banco(caminho)
+    return lambda: sqlite_mysql.Conexao(caminho)
+
+
+def preparar_mysql():
+    from dotenv import load_dotenv
+
+    import banco
+
+    load_dotenv()
+    config = banco._config("DB_SALAO")
+    return lambda: mysql.connector.connect(**config)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clientes", type=int, default=300)
+    parser.add_argument("--mysql", action="store_true")
+    args = parser.parse_args()
+
+    conectar = preparar_mysql() if args.mysql else preparar_sqlite()
+
+    data_hora = datetime.combine(date.today() + timedelta(days=7), hora(9, 0))
+    conexoes = [conectar() for _ in range(args.clientes)]
+    largada = Barrier(args.clientes)
+    resultados = [None] * args.clientes
+
+    def cliente(i):
+        largada.wait()
+        try:
+            status, _ = reservas.reservar(
+                conexoes[i],
+                USUARIO_BASE + i,
+                f"cliente{i}@exemplo.com",
+                data_hora,
+                ["Corte de Cabelo"],
+                38,
+                "(11) 91234-5678"
+            )
+        except Exception as e:
+            status = f"erro: {type(e).__name__}"
+        resultados[i] = status
+
+    threads = [Thread(target=cliente, args=(i,)) for i in range(args.clientes)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - inicio
+
+    contagem = Counter(resultados)
+    print(f"{args.clientes} clientes em {duracao:.2f}s: {dict(contagem)}")
+
+    db = conexoes[0]
+    cursor = db.cursor()
+    cursor.execute(
+        "SELECT COUNT(*) FROM agendamentos WHERE data=%s AND horario=%s",
+        (data_hora.date(), data_hora.time())
+    )
+    gravados = cursor.fetchone()[0]
+    if args.mysql:
+        cursor.execute("DELETE FROM agendamentos WHERE usuario_id >= %s", (USUARIO_BASE,))
+        cursor.execute("DELETE FROM ultimo_agendamento WHERE usuario_id >= %s", (USUARIO_BASE,))
+        db.commit()
+
+    for conn in conexoes:
+        conn.close()
+
+    if contagem[reservas.RESERVADO] != 1 or gravados != 1:
+        print("FALHOU: o horário deveria ter exatamente uma reserva")
+        sys.exit(1)
+
+    print("OK: exatamente uma reserva venceu")
+
+
+if __name__ == "__main__":
+    main()
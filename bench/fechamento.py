@@ -0,0 +1,84 @@
+# Fechamento do dia: um POST por cliente contra o POST único do admin.
+#
+#   python bench/fechamento.py --latencia 5 --dias 10
+#
+# Em processo, com SQLITE_LATENCIA_MS simulando a ida e volta ao MySQL. Para
+# cada um dos --dias dias passados, fecha o dia de um jeito: "um por um"
+# manda /admin/salvar_pagamento para cada cliente e recarrega /admin/dia
+# depois de cada um, como o navegador faz; "em lote" manda um único
+# /admin/dia/fechar. Mostra o tempo médio por dia e os comandos SQL gastos.
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import carga
+import sqlite_mysql
+
+
+def ids_do_dia(banco, dia):
+    db = banco.get_db_salao()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("SELECT id FROM agendamentos WHERE data=%s ORDER BY horario", (dia,))
+    ids = [linha["id"] for linha in cursor.fetchall()]
+    cursor.close()
+    db.close()
+    return ids
+
+
+def um_por_um(cliente, dia, ids):
+    for id_ag in ids:
+        cliente.post("/admin/salvar_pagamento", data={"id": id_ag, "valor_pix": "30", "valor_dinheiro": "8"})
+        cliente.get(f"/admin/dia?data={dia}")
+
+
+def em_lote(cliente, dia, ids):
+    pagamentos = [{"id": id_ag, "valor_pix": "30", "valor_dinheiro": "8"} for id_ag in ids]
+    resposta = cliente.post("/admin/dia/fechar", json={"data": dia, "pagamentos": pagamentos})
+    assert resposta.status_code == 200, resposta.get_json()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latencia", type=float, default=5, help="Latência simulada por comando SQL (ms)")
+    parser.add_argument("--dias", type=int, default=10)
+    args = parser.parse_args()
+
+    caminho = os.path.join(carga.PASTA, "salao.db")
+    carga.popular(caminho, 3, args.dias * 2 + 2)
+    sqlite_mysql.usar_no_app(caminho)
+    sqlite_mysql.LATENCIA = args.latencia / 1000
+
+    from app import app
+    import banco
+    import metricas
+    app.logger.disabled = True
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as s:
+        s["usuario_id"] = 1
+        s["email"] = "cliente1@exemplo.com"
+        s["is_admin"] = 1
+
+    print(f"{'modo':<12}{'clientes/dia':>13}{'ms/dia':>10}{'sql/dia':>9}")
+    for n, (nome, fechar) in enumerate((("um por um", um_por_um), ("em lote", em_lote))):
+        dias = [(date.today() - timedelta(days=1 + n * args.dias + d)).strftime("%Y-%m-%d")
+                for d in range(args.dias)]
+        ids = {dia: ids_do_dia(banco, dia) for dia in dias}
+
+        consultas = sum(metricas.queries.series.values())
+        inicio = time.perf_counter()
+        for dia in dias:
+            fechar(cliente, dia, ids[dia])
+        duracao = time.perf_counter() - inicio
+        consultas = sum(metricas.queries.series.values()) - consultas
+
+        clientes = sum(len(lista) for lista in ids.values()) / args.dias
+        print(f"{nome:<12}{clientes:>13.1f}{duracao * 1000 / args.dias:>10.1f}{consultas / args.dias:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
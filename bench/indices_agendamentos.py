@@ -0,0 +1,172 @@
+# Benchmark dos índices de agendamentos usando SQLite no lugar do MySQL.
+#
+#   python bench/indices_agendamentos.py --linhas 1000000
+#
+# Popula a tabela com agendamentos sintéticos, roda as consultas quentes do
+# app.py sem índices, aplica as migrações de migracoes.py e roda de novo,
+# mostrando o plano de execução e a latência média de cada consulta.
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migracoes import MIGRACOES
+
+SCHEMA = """
+    CREATE TABLE agendamentos (
+        id INTEGER PRIMARY KEY,
+        usuario_id INTEGER NOT NULL,
+        data TEXT NOT NULL,
+        horario TEXT NOT NULL,
+        servicos TEXT,
+        total REAL,
+        telefone TEXT,
+        email TEXT,
+        forma_pagamento TEXT,
+        valor_pix REAL,
+        valor_dinheiro REAL,
+        valor_final REAL,
+        finalizado INTEGER DEFAULT 0
+    )
+"""
+
+# um horário por minuto das 07:00 às 19:59 -> 780 por dia
+HORARIOS = [f"{h:02d}:{m:02d}:00" for h in range(7, 20) for m in range(60)]
+
+CONSULTAS = {
+    "horario duplicado": (
+        "SELECT id FROM agendamentos WHERE data=%s AND horario=%s",
+        lambda a: (a["data"], a["horario"]),
+    ),
+    "regra dos 15 dias": (
+        "SELECT data, horario FROM agendamentos WHERE usuario_id=%s AND data <= %s "
+        "ORDER BY data DESC, horario DESC LIMIT 1",
+        lambda a: (a["usuario"], a["data"]),
+    ),
+    "admin dia": (
+        "SELECT id, email, horario, valor_pix, valor_dinheiro FROM agendamentos "
+        "WHERE data = %s ORDER BY horario",
+        lambda a: (a["data"],),
+    ),
+    "api horarios": (
+        "SELECT horario FROM agendamentos WHERE data=%s",
+        lambda a: (a["data"],),
+    ),
+    "expiração antiga (CONCAT)": (
+        "SELECT COUNT(*) FROM agendamentos WHERE data || ' ' || horario < %s",
+        lambda a: (f"{a['data']} {a['horario']}",),
+    ),
+    "expiração nova": (
+        "SELECT COUNT(*) FROM agendamentos WHERE data < %s",
+        lambda a: (a["data"],),
+    ),
+}
+
+
+def sqlite(sql):
+    return sql.replace("%s", "?")
+
+
+def popular(conn, linhas, usuarios):
+    inicio = date.today() - timedelta(days=linhas // len(HORARIOS) // 2)
+
+    def gerar():
+        for i in range(linhas):
+            dia = inicio + timedelta(days=i // len(HORARIOS))
+            total = random.choice([16, 32, 38, 54, 70])
+            yield (
+                random.randint(1, usuarios),
+                dia.isoformat(),
+                HORARIOS[i % len(HORARIOS)],
+                "Corte de Cabelo",
+                total,
+                "(11) 91234-5678",
+                f"cliente{i % usuarios}@exemplo.com",
+            )
+
+    conn.executemany(
+        "INSERT INTO agendamentos (usuario_id, data, horario, servicos, total, telefone, email) "
+        "VALUES (?,?,?,?,?,?,?)",
+        gerar()
+    )
+    conn.commit()
+    return inicio, inicio + timedelta(days=linhas // len(HORARIOS))
+
+
+def amostras(n, inicio, fim, usuarios):
+    dias = (fim - inicio).days
+    return [
+        {
+            "data": (inicio + timedelta(days=random.randint(0, dias))).isoformat(),
+            "horario": random.choice(HORARIOS),
+            "usuario": random.randint(1, usuarios),
+        }
+        for _ in range(n)
+    ]
+
+
+def medir(conn, parametros):
+    resultado = {}
+    for nome, (sql, montar) in CONSULTAS.items():
+        plano = conn.execute("EXPLAIN QUERY PLAN " + sqlite(sql), montar(parametros[0])).fetchall()
+
+        inicio = time.perf_counter()
+        for p in parametros:
+            conn.execute(sqlite(sql), montar(p)).fetchall()
+        media = (time.perf_counter() - inicio) / len(parametros) * 1000
+
+        resultado[nome] = (media, "; ".join(linha[-1] for linha in plano))
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--usuarios", type=int, default=50_000)
+    parser.add_argument("--repeticoes", type=int, default=50)
+    parser.add_argument("--arquivo", default=":memory:")
+    args = parser.parse_args()
+
+    random.seed(42)
+    conn = sqlite3.connect(args.arquivo)
+    conn.execute("DROP TABLE IF EXISTS agendamentos")
+    conn.execute(SCHEMA)
+
+    t = time.perf_counter()
+    inicio, fim = popular(conn, args.linhas, args.usuarios)
+    print(f"{args.linhas} agendamentos gerados em {time.perf_counter() - t:.1f}s ({inicio} a {fim})")
+
+    parametros = amostras(args.repeticoes, inicio, fim, args.usuarios)
+    antes = medir(conn, parametros)
+
+    # os passos em Python recebem o cursor, como no migracoes.migrar
+    cursor = conn.cursor()
+    for _, _, comandos in MIGRACOES:
+        for comando in comandos:
+            if callable(comando):
+                comando(cursor)
+            else:
+                cursor.execute(comando)
+    cursor.close()
+    conn.execute("ANALYZE")
+    depois = medir(conn, parametros)
+
+    print()
+    print(f"{'consulta':<28}{'antes (ms)':>12}{'depois (ms)':>13}")
+    for nome in CONSULTAS:
+        print(f"{nome:<28}{antes[nome][0]:>12.3f}{depois[nome][0]:>13.3f}")
+
+    print()
+    for nome in CONSULTAS:
+        print(nome)
+        print("  antes: ", antes[nome][1])
+        print("  depois:", depois[nome][1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# Tempo de partida: importação do app, primeira resposta e preload do gunicorn.
+#
+#   python bench/inicio.py --workers 4 --repeticoes 5
+#
+# Primeiro, em processos novos (sem cache de import quente no interpretador),
+# mede o "import app" (que já chama criar_app), a primeira resposta de "/" e
+# de /api/horarios pelo test_client, e quais dependências pesadas já estavam
+# carregadas em cada etapa. Depois sobe o gunicorn de verdade com
+# GUNICORN_PRELOAD=0 e 1 e mede o tempo até a primeira resposta e a memória
+# dos workers (PSS, que divide as páginas compartilhadas após o fork).
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import carga
+from modos import PASTA_BENCH, RAIZ
+
+PESADOS = ["mysql.connector", "PIL.Image", "sib_api_v3_sdk"]
+
+PARTIDA = """
+import json, os, sys, time
+inicio = time.perf_counter()
+sys.path.append({pasta_bench!r})
+import app
+importado = time.perf_counter()
+carregados = {{"import": [m for m in {pesados!r} if m in sys.modules]}}
+
+cliente = app.app.test_client()
+antes = time.perf_counter()
+cliente.get("/")
+pagina = time.perf_counter()
+carregados["/"] = [m for m in {pesados!r} if m in sys.modules]
+
+# o SQLite do bench importa os erros do mysql.connector, como o app real faria
+import sqlite_mysql
+sqlite_mysql.usar_no_app({banco!r})
+pagina = time.perf_counter()
+cliente.get("/api/horarios/{dia}")
+banco = time.perf_counter()
+carregados["/api/horarios"] = [m for m in {pesados!r} if m in sys.modules]
+
+print(json.dumps({{
+    "import": importado - inicio,
+    "/": pagina - antes,
+    "/api/horarios": banco - pagina,
+    "carregados": carregados,
+}}))
+"""
+
+
+def custo_import(modulo):
+    # import isolado, num processo novo, só do módulo (sem o app)
+    codigo = f"import time; t = time.perf_counter(); import {modulo}; print(time.perf_counter() - t)"
+    try:
+        saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError:
+        return None
+    return float(saida.stdout)
+
+
+def partida(banco_sqlite):
+    dia = (date.today() + timedelta(days=3)).strftime("%Y-%m-%d")
+    codigo = PARTIDA.format(pasta_bench=PASTA_BENCH, pesados=PESADOS, banco=banco_sqlite, dia=dia)
+    ambiente = dict(os.environ, SENHA_PROCESSOS="0", MANUTENCAO_INTERVALO="0")
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo], cwd=RAIZ, env=ambiente, stdout=subprocess.PIPE, text=True, check=True
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def filhos(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as arquivo:
+        return [int(p) for p in arquivo.read().split()]
+
+
+def pss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as arquivo:
+            for linha in arquivo:
+                if linha.startswith("Pss:"):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def gunicorn(preload, modo, workers, porta, banco_sqlite):
+    ambiente = dict(
+        os.environ,
+        BENCH_BANCO=banco_sqlite,
+        GUNICORN_MODO=modo,
+        GUNICORN_PRELOAD="1" if preload else "0",
+        WEB_CONCURRENCY=str(workers),
+        PORT=str(porta),
+        SENHA_PROCESSOS="0",
+    )
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(
+        ["gunicorn", "-c", "gunicorn.conf.py", "--pythonpath", PASTA_BENCH, "servidor:app"],
+        cwd=RAIZ,
+        env=ambiente,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    try:
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{porta}/", timeout=1).read()
+                break
+            except OSError:
+                if processo.poll() is not None:
+                    raise RuntimeError("gunicorn não subiu")
+                time.sleep(0.005)
+        primeira = time.perf_counter() - inicio
+
+        # espera todos os workers e deixa cada um atender alguns pedidos
+        while len(filhos(processo.pid)) < workers:
+            time.sleep(0.05)
+        for _ in range(workers * 5):
+            urllib.request.urlopen(f"http://127.0.0.1:{porta}/", timeout=5).read()
+
+        memoria = [pss_kb(pid) for pid in filhos(processo.pid)]
+        return primeira, statistics.mean(memoria), pss_kb(processo.pid)
+    finally:
+        processo.terminate()
+        processo.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--modo", default="sync", choices=["sync", "gthread", "gevent"])
+    parser.add_argument("--porta", type=int, default=8765)
+    args = parser.parse_args()
+
+    caminho = os.path.join(carga.PASTA, "salao.db")
+    carga.popular(caminho, 3, 5)
+
+    print("import isolado de cada dependência pesada:")
+    for modulo in PESADOS:
+        custo = custo_import(modulo)
+        print(f"  {modulo:<18}{'não instalado' if custo is None else f'{custo * 1000:.1f} ms'}")
+
+    medidas = [partida(caminho) for _ in range(args.repeticoes)]
+    print(f"\nprocesso novo (mediana de {args.repeticoes}):")
+    for etapa in ("import", "/", "/api/horarios"):
+        ms = statistics.median(m[etapa] for m in medidas) * 1000
+        carregados = ", ".join(medidas[-1]["carregados"][etapa]) or "-"
+        print(f"  {etapa:<15}{ms:>8.1f} ms   já carregados: {carregados}")
+
+    print(f"\ngunicorn {args.modo}, {args.workers} workers:")
+    print(f"{'preload':<9}{'1ª resposta ms':>15}{'PSS worker KB':>15}{'PSS master KB':>15}")
+    for preload in (False, True):
+        rodadas = [
+            gunicorn(preload, args.modo, args.workers, args.porta, caminho)
+            for _ in range(args.repeticoes)
+        ]
+        primeira = statistics.median(r[0] for r in rodadas) * 1000
+        worker = statistics.median(r[1] for r in rodadas)
+        master = statistics.median(r[2] for r in rodadas)
+        print(f"{'sim' if preload else 'não':<9}{primeira:>15.1f}{worker:>15.0f}{master:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
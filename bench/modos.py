@@ -0,0 +1,154 @@
+# Compara os workers sync e gevent do gunicorn.conf.py no fluxo de agendamento.
+#
+#   python bench/modos.py --clientes 50 --duracao 20 --latencia 5
+#   python bench/modos.py --modos sync gthread gevent --workers 2
+#
+# Sobe o gunicorn de verdade para cada modo, com o banco SQLite do
+# bench/carga.py e SQLITE_LATENCIA_MS simulando a ida e volta ao MySQL.
+# Cada cliente faz login uma vez e repete: consulta /api/horarios e tenta
+# reservar um horário. Mostra fluxos/s e a latência p50/p95 de cada fluxo.
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, timedelta
+from http.cookiejar import CookieJar
+from threading import Thread
+
+PASTA_BENCH = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(PASTA_BENCH)
+sys.path.insert(0, PASTA_BENCH)
+
+import carga
+
+
+def esperar_porta(porta, limite=30):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        try:
+            socket.create_connection(("127.0.0.1", porta), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"gunicorn não respondeu na porta {porta}")
+
+
+def subir(modo, porta, banco_sqlite, args):
+    ambiente = dict(
+        os.environ,
+        BENCH_BANCO=banco_sqlite,
+        GUNICORN_MODO=modo,
+        WEB_CONCURRENCY=str(args.workers),
+        GUNICORN_THREADS=str(args.threads),
+        GUNICORN_CONEXOES=str(args.clientes),
+        PORT=str(porta),
+        SQLITE_LATENCIA_MS=str(args.latencia),
+        SENHA_PROCESSOS="0",
+    )
+    processo = subprocess.Popen(
+        ["gunicorn", "-c", "gunicorn.conf.py", "--pythonpath", PASTA_BENCH, "servidor:app"],
+        cwd=RAIZ,
+        env=ambiente,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    esperar_porta(porta)
+    return processo
+
+
+def cliente(base, usuario_id):
+    navegador = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+    dados = urllib.parse.urlencode({"email": f"cliente{usuario_id}@exemplo.com", "senha": carga.SENHA})
+    navegador.open(f"{base}/login", dados.encode()).read()
+    return navegador
+
+
+def fluxo(navegador, base):
+    dia = (date.today() + timedelta(days=random.randint(2, 45))).strftime("%Y-%m-%d")
+    navegador.open(f"{base}/api/horarios/{dia}").read()
+
+    dados = urllib.parse.urlencode({
+        "data": dia,
+        "horario": random.choice(carga.HORARIOS),
+        "telefone": "(11) 91234-5678",
+        "servicos": "Corte de Cabelo",
+        "total": "38.00",
+    })
+    navegador.open(f"{base}/agendamento", dados.encode()).read()
+
+
+def medir(base, args):
+    navegadores = [cliente(base, u) for u in range(2, args.clientes + 2)]
+    tempos = [[] for _ in navegadores]
+    erros = [0] * len(navegadores)
+    fim = time.perf_counter() + args.duracao
+
+    def trabalhador(i):
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            try:
+                fluxo(navegadores[i], base)
+            except (urllib.error.URLError, OSError):
+                erros[i] += 1
+                continue
+            tempos[i].append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    threads = [Thread(target=trabalhador, args=(i,)) for i in range(len(navegadores))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - inicio
+
+    valores = [v for lista in tempos for v in lista]
+    return {
+        "fluxos": len(valores),
+        "erros": sum(erros),
+        "por_segundo": len(valores) / total,
+        "p50_ms": carga.percentil(valores, 0.50) * 1000,
+        "p95_ms": carga.percentil(valores, 0.95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modos", nargs="+", default=["sync", "gevent"])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8, help="Threads por worker no modo gthread")
+    parser.add_argument("--clientes", type=int, default=50)
+    parser.add_argument("--duracao", type=float, default=20)
+    parser.add_argument("--latencia", type=float, default=5, help="Latência simulada por comando SQL (ms)")
+    parser.add_argument("--porta", type=int, default=8765)
+    args = parser.parse_args()
+
+    random.seed(42)
+    print(f"{args.workers} workers, {args.clientes} clientes, {args.latencia:.0f}ms por comando SQL, "
+          f"{args.duracao:.0f}s por modo")
+    print(f"{'modo':<10}{'fluxos':>8}{'erros':>7}{'fluxos/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+
+    for modo in args.modos:
+        # banco novo para cada modo, para os dois partirem do mesmo estado
+        banco_sqlite = os.path.join(tempfile.mkdtemp(prefix="modos_salao_"), "salao.db")
+        carga.popular(banco_sqlite, args.clientes + 1, 30)
+
+        processo = subir(modo, args.porta, banco_sqlite, args)
+        try:
+            r = medir(f"http://127.0.0.1:{args.porta}", args)
+        finally:
+            processo.terminate()
+            processo.wait()
+
+        print(f"{modo:<10}{r['fluxos']:>8}{r['erros']:>7}{r['por_segundo']:>10.1f}"
+              f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
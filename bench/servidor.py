@@ -0,0 +1,19 @@
+# Ponto de entrada WSGI do app apontando para o SQLite de BENCH_BANCO, usado
+# por bench/modos.py para subir o gunicorn nos dois modos.
+#
+#   BENCH_BANCO=/tmp/salao.db gunicorn -c gunicorn.conf.py --pythonpath bench servidor:app
+import os
+import sys
+
+PASTA_BENCH = os.path.dirname(os.path.abspath(__file__))
+
+# a raiz vem antes da pasta do bench (que o --pythonpath põe no começo): um
+# script do bench com o nome de um módulo do app o esconderia (por isso eles
+# se chamam bench_*.py)
+sys.path[:0] = [os.path.dirname(PASTA_BENCH), PASTA_BENCH]
+
+import sqlite_mysql
+
+sqlite_mysql.usar_no_app(os.environ["BENCH_BANCO"])
+
+from app import app  # noqa: E402
@@ -0,0 +1,199 @@
+# SQLite fazendo o papel do MySQL nos benchmarks.
+#
+# Imita o pedaço do mysql.connector que o app usa: placeholders %s, cursor
+# com dictionary=True, DATE voltando como date e TIME como timedelta, e
+# ON DUPLICATE KEY UPDATE traduzido para o ON CONFLICT do SQLite.
+# Cada checkout abre uma conexão nova no mesmo arquivo, e chave duplicada
+# vira o IntegrityError (1062) do mysql.connector.
+#
+# SQLITE_LATENCIA_MS acrescenta um sleep a cada comando, como a ida e volta
+# até um MySQL de verdade. A espera por lock também é feita com sleep (e não
+# dentro do sqlite), para funcionar com gevent.
+import os
+import re
+import sqlite3
+import sys
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from time import monotonic, sleep
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql.connector import errors
+
+import banco
+import migracoes
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS usuario (
+        codigo INTEGER PRIMARY KEY,
+        email TEXT NOT NULL,
+        senha TEXT NOT NULL,
+        is_admin INTEGER DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS agendamentos (
+        id INTEGER PRIMARY KEY,
+        usuario_id INTEGER NOT NULL,
+        data DATE NOT NULL,
+        horario TIME NOT NULL,
+        servicos TEXT,
+        total DECIMAL,
+        telefone TEXT,
+        email TEXT,
+        forma_pagamento TEXT,
+        valor_pix DECIMAL,
+        valor_dinheiro DECIMAL,
+        valor_final DECIMAL,
+        finalizado INTEGER DEFAULT 0
+    );
+"""
+
+_FOR_UPDATE = re.compile(r"\s+FOR UPDATE", re.IGNORECASE)
+_DUPLICADA = re.compile(r"ON DUPLICATE KEY UPDATE", re.IGNORECASE)
+_VALUES = re.compile(r"\bVALUES\((\w+)\)", re.IGNORECASE)
+
+LATENCIA = float(os.getenv("SQLITE_LATENCIA_MS", 0)) / 1000
+ESPERA_LOCK = 60
+
+
+def _com_espera(funcao, *args):
+    limite = monotonic() + ESPERA_LOCK
+    while True:
+        try:
+            return funcao(*args)
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) or monotonic() > limite:
+                raise
+            sleep(0.002)
+
+
+def _tempo(valor):
+    h, m, s = (int(float(x)) for x in valor.decode().split(":"))
+    return timedelta(hours=h, minutes=m, seconds=s)
+
+
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(" "))
+sqlite3.register_adapter(time, lambda t: t.strftime("%H:%M:%S"))
+sqlite3.register_adapter(timedelta, lambda t: str(datetime.min + t)[11:19])
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter("DATE", lambda v: date.fromisoformat(v.decode()))
+sqlite3.register_converter("TIME", _tempo)
+sqlite3.register_converter("DATETIME", lambda v: datetime.fromisoformat(v.decode()))
+sqlite3.register_converter("DECIMAL", lambda v: Decimal(v.decode()))
+
+
+class Cursor:
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    def _sql(self, sql):
+        sql = _FOR_UPDATE.sub("", sql)
+        if _DUPLICADA.search(sql):
+            sql = _VALUES.sub(r"excluded.\1", _DUPLICADA.sub("ON CONFLICT DO UPDATE SET", sql))
+        return sql.replace("%s", "?")
+
+    def _executar(self, metodo, sql, parametros):
+        if LATENCIA:
+            sleep(LATENCIA)
+
+        try:
+            _com_espera(metodo, self._sql(sql), parametros)
+        except sqlite3.IntegrityError as e:
+            # o app espera o erro do mysql.connector para chave duplicada
+            raise errors.IntegrityError(msg=str(e), errno=1062) from e
+
+    def execute(self, sql, parametros=()):
+        self._executar(self._cursor.execute, sql, tuple(parametros))
+
+    def executemany(self, sql, parametros):
+        parametros = [tuple(p) for p in parametros]
+        # o mysql.connector junta um INSERT em um comando só; os outros vão um
+        # por um, cada um com sua ida e volta
+        if LATENCIA and parametros and not sql.lstrip().upper().startswith("INSERT"):
+            sleep(LATENCIA * (len(parametros) - 1))
+        self._executar(self._cursor.executemany, sql, parametros)
+
+    def _linha(self, linha):
+        if linha is None or not self._dictionary:
+            return linha
+        return dict(zip([c[0] for c in self._cursor.description], linha))
+
+    def fetchone(self):
+        return self._linha(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._linha(linha) for linha in self._cursor.fetchall()]
+
+    def fetchmany(self, tamanho=1):
+        return [self._linha(linha) for linha in self._cursor.fetchmany(tamanho)]
+
+    def __iter__(self):
+        for linha in self._cursor:
+            yield self._linha(linha)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+
+class Conexao:
+
+    def __init__(self, caminho):
+        self._conn = sqlite3.connect(
+            caminho,
+            timeout=0,
+            check_same_thread=False,
+            detect_types=sqlite3.PARSE_DECLTYPES
+        )
+
+    def cursor(self, dictionary=False, **kwargs):
+        return Cursor(self._conn.cursor(), dictionary)
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def start_transaction(self, **kwargs):
+        pass
+
+    def commit(self):
+        _com_espera(self._conn.commit)
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, **kwargs):
+        pass
+
+    def close(self):
+        self._conn.close()
+
+
+def criar_banco(caminho, migrar=True):
+    conn = sqlite3.connect(caminho)
+    conn.executescript(SCHEMA)
+    conn.close()
+
+    if migrar:
+        aplicar_migracoes(caminho)
+
+
+def aplicar_migracoes(caminho):
+    db = Conexao(caminho)
+    migracoes.migrar(db)
+    db.close()
+
+
+def usar_no_app(caminho):
+    banco.checkout = lambda nome: Conexao(caminho)
+    banco.devolver = lambda conn: conn.close()
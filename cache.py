@@ -0,0 +1,216 @@
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from queue import Queue
+from threading import Lock
+
+# ================== CACHE ==================
+# Backends com a mesma interface (get / set / delete / clear):
+#   CACHE_BACKEND=local    -> dicionário LRU com TTL dentro do processo (padrão)
+#   CACHE_BACKEND=redis    -> store compartilhado entre workers (CACHE_REDIS_URL)
+#   CACHE_BACKEND=memoria  -> store compartilhado falso, para rodar localmente
+
+
+class CacheLocal:
+
+    def __init__(self, tamanho=1024, ttl=30):
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = Lock()
+        self.metricas = {"acertos": 0, "faltas": 0, "remocoes": 0}
+
+    def get(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._itens[chave]
+                self.metricas["faltas"] += 1
+                return None
+
+            self._itens.move_to_end(chave)
+            self.metricas["acertos"] += 1
+            return item[1]
+
+    def set(self, chave, valor, ttl=None):
+        expira = time.monotonic() + (ttl or self.ttl)
+
+        with self._lock:
+            self._itens[chave] = (expira, valor)
+            self._itens.move_to_end(chave)
+
+            while len(self._itens) > self.tamanho:
+                self._itens.popitem(last=False)
+                self.metricas["remocoes"] += 1
+
+    def delete(self, chave):
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def clear(self):
+        with self._lock:
+            self._itens.clear()
+
+    def limpar_expirados(self):
+        agora = time.monotonic()
+        with self._lock:
+            expirados = [chave for chave, item in self._itens.items() if item[0] < agora]
+            for chave in expirados:
+                del self._itens[chave]
+        return len(expirados)
+
+
+class ClienteMemoria:
+    # Imita o pedaço da API do redis que o CacheCompartilhado e o pub/sub
+    # dos avisos usam, inclusive nas recusas (ex só aceita int ou timedelta)
+
+    def __init__(self):
+        self._dados = {}
+        self._inscritos = {}
+        self._lock = Lock()
+
+    def get(self, chave):
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                return None
+            if item[0] is not None and item[0] < time.monotonic():
+                del self._dados[chave]
+                return None
+            return item[1]
+
+    def set(self, chave, valor, ex=None):
+        if isinstance(ex, timedelta):
+            ex = ex.total_seconds()
+        elif ex is not None and (not isinstance(ex, int) or isinstance(ex, bool)):
+            raise TypeError("ex must be datetime.timedelta or int")
+        if ex is not None and ex <= 0:
+            raise ValueError("invalid expire time in 'set' command")
+
+        # o redis devolve bytes no get
+        if isinstance(valor, str):
+            valor = valor.encode()
+
+        with self._lock:
+            expira = time.monotonic() + ex if ex else None
+            self._dados[chave] = (expira, valor)
+
+    def delete(self, *chaves):
+        with self._lock:
+            for chave in chaves:
+                self._dados.pop(chave, None)
+
+    def scan_iter(self, match):
+        prefixo = match.rstrip("*")
+        with self._lock:
+            return [chave for chave in self._dados if chave.startswith(prefixo)]
+
+    def limpar_expirados(self):
+        agora = time.monotonic()
+        with self._lock:
+            expirados = [chave for chave, item in self._dados.items() if item[0] is not None and item[0] < agora]
+            for chave in expirados:
+                del self._dados[chave]
+        return len(expirados)
+
+    def publish(self, canal, mensagem):
+        with self._lock:
+            filas = list(self._inscritos.get(canal, ()))
+        for fila in filas:
+            fila.put((canal, mensagem.encode() if isinstance(mensagem, str) else mensagem))
+        return len(filas)
+
+    def pubsub(self):
+        return PubSubMemoria(self)
+
+
+class PubSubMemoria:
+    # Imita redis.client.PubSub: subscribe() e listen()
+
+    def __init__(self, cliente):
+        self.cliente = cliente
+        self.fila = Queue()
+        self.canais = []
+
+    def subscribe(self, canal):
+        with self.cliente._lock:
+            self.cliente._inscritos.setdefault(canal, []).append(self.fila)
+        self.canais.append(canal)
+
+    def listen(self):
+        for canal in self.canais:
+            yield {"type": "subscribe", "channel": canal.encode(), "data": 1}
+        while True:
+            canal, dados = self.fila.get()
+            yield {"type": "message", "channel": canal.encode(), "data": dados}
+
+
+class CacheCompartilhado:
+
+    def __init__(self, cliente, prefixo, ttl=30):
+        self.cliente = cliente
+        self.prefixo = prefixo
+        self.ttl = ttl
+        self.metricas = {"acertos": 0, "faltas": 0, "remocoes": 0}
+
+    def get(self, chave):
+        valor = self.cliente.get(self.prefixo + chave)
+        if valor is None:
+            self.metricas["faltas"] += 1
+            return None
+
+        self.metricas["acertos"] += 1
+        return json.loads(valor)
+
+    def set(self, chave, valor, ttl=None):
+        # os TTLs vêm do .env como float; o redis só aceita segundos inteiros
+        segundos = max(1, math.ceil(ttl or self.ttl))
+        self.cliente.set(self.prefixo + chave, json.dumps(valor), ex=segundos)
+
+    def delete(self, chave):
+        self.cliente.delete(self.prefixo + chave)
+
+    def clear(self):
+        chaves = list(self.cliente.scan_iter(match=self.prefixo + "*"))
+        if chaves:
+            self.cliente.delete(*chaves)
+
+    def limpar_expirados(self):
+        # o redis expira as chaves sozinho; só o cliente falso precisa de ajuda
+        limpar = getattr(self.cliente, "limpar_expirados", None)
+        return limpar() if limpar else 0
+
+
+_cliente_compartilhado = None
+
+
+def cliente_compartilhado():
+    global _cliente_compartilhado
+
+    if _cliente_compartilhado is None:
+        if os.getenv("CACHE_BACKEND") == "redis":
+            import redis
+            _cliente_compartilhado = redis.Redis.from_url(os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+        else:
+            _cliente_compartilhado = ClienteMemoria()
+
+    return _cliente_compartilhado
+
+
+def compartilhado():
+    # só o redis é visto por todos os workers; o "memoria" vive em cada processo
+    return os.getenv("CACHE_BACKEND") == "redis"
+
+
+def criar_cache(nome, tamanho=1024, ttl=30):
+    backend = os.getenv("CACHE_BACKEND", "local")
+
+    if backend == "local":
+        return CacheLocal(tamanho=tamanho, ttl=ttl)
+
+    return CacheCompartilhado(cliente_compartilhado(), prefixo=f"salao:{nome}:", ttl=ttl)
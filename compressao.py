@@ -0,0 +1,185 @@
+import gzip
+import os
+import zlib
+
+from flask import Response, get_flashed_messages, request, stream_template
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# ================== COMPRESSÃO DAS RESPOSTAS ==================
+# HTML, JSON, CSS e JS acima de COMPRESSAO_MINIMO bytes saem com brotli (se o
+# pacote estiver instalado) ou gzip, conforme o Accept-Encoding. Respostas em
+# stream são comprimidas bloco a bloco, então o primeiro pedaço da página
+# continua saindo antes do template terminar. Os arquivos de static/dist já
+# vêm comprimidos do "flask assets" e passam direto.
+TIPOS = {
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/csv",
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "image/svg+xml",
+}
+
+metricas = {
+    "comprimidas": 0,
+    "bytes_antes": 0,
+    "bytes_depois": 0,
+}
+
+
+def ativa():
+    return os.getenv("COMPRESSAO", "1") == "1"
+
+def tamanho_minimo():
+    return int(os.getenv("COMPRESSAO_MINIMO", 500))
+
+def nivel_gzip():
+    return int(os.getenv("COMPRESSAO_NIVEL_GZIP", 6))
+
+def qualidade_brotli():
+    return int(os.getenv("COMPRESSAO_QUALIDADE_BR", 4))
+
+def tamanho_bloco():
+    return int(os.getenv("COMPRESSAO_BLOCO", 8192))
+
+
+# ================== COMPRESSORES ==================
+class _Gzip:
+    # gzip em stream: cada bloco sai com Z_SYNC_FLUSH para o navegador já
+    # conseguir descomprimir o que chegou
+
+    def __init__(self):
+        self._z = zlib.compressobj(nivel_gzip(), zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def bloco(self, dados):
+        return self._z.compress(dados) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def fim(self):
+        return self._z.flush()
+
+
+class _Brotli:
+
+    def __init__(self):
+        self._b = brotli.Compressor(quality=qualidade_brotli())
+
+    def bloco(self, dados):
+        return self._b.process(dados) + self._b.flush()
+
+    def fim(self):
+        return self._b.finish()
+
+
+def _escolher():
+    aceitos = request.accept_encodings
+    if brotli is not None and aceitos["br"]:
+        return "br"
+    if aceitos["gzip"]:
+        return "gzip"
+    return None
+
+
+def _comprimir(formato, dados):
+    if formato == "br":
+        return brotli.compress(dados, quality=qualidade_brotli())
+    return gzip.compress(dados, compresslevel=nivel_gzip(), mtime=0)
+
+
+def _fechar(partes):
+    # cliente desconectou no meio: o gerador de dentro também precisa fechar
+    fechar = getattr(partes, "close", None)
+    if fechar:
+        fechar()
+
+
+def _em_stream(formato, partes):
+    compressor = _Brotli() if formato == "br" else _Gzip()
+    try:
+        for parte in partes:
+            if isinstance(parte, str):
+                parte = parte.encode("utf-8")
+            if parte:
+                yield compressor.bloco(parte)
+        yield compressor.fim()
+    finally:
+        _fechar(partes)
+
+
+def _em_blocos(partes):
+    # o Jinja devolve pedaços muito pequenos; junta em blocos antes de enviar
+    buffer = []
+    tamanho = 0
+    limite = tamanho_bloco()
+
+    try:
+        for parte in partes:
+            if isinstance(parte, str):
+                parte = parte.encode("utf-8")
+            buffer.append(parte)
+            tamanho += len(parte)
+            if tamanho >= limite:
+                yield b"".join(buffer)
+                buffer = []
+                tamanho = 0
+
+        if buffer:
+            yield b"".join(buffer)
+    finally:
+        _fechar(partes)
+
+
+def transmitir(template, **contexto):
+    # renderiza em stream, para páginas grandes começarem a chegar logo. A
+    # sessão é salva antes do corpo sair, então as mensagens flash são tiradas
+    # dela agora; o Flask guarda a lista para o template usar depois.
+    get_flashed_messages()
+    return Response(_em_blocos(stream_template(template, **contexto)), mimetype="text/html")
+
+
+def comprimir_resposta(response):
+    if not ativa() or request.method == "HEAD":
+        return response
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return response
+    if response.direct_passthrough or "Content-Encoding" in response.headers:
+        return response
+    if response.mimetype not in TIPOS:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    formato = _escolher()
+    if formato is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _em_stream(formato, response.response)
+        response.headers.pop("Content-Length", None)
+    else:
+        dados = response.get_data()
+        if len(dados) < tamanho_minimo():
+            return response
+
+        comprimido = _comprimir(formato, dados)
+        metricas["bytes_antes"] += len(dados)
+        metricas["bytes_depois"] += len(comprimido)
+        response.set_data(comprimido)
+
+    metricas["comprimidas"] += 1
+    response.headers["Content-Encoding"] = formato
+
+    # o corpo mudou de bytes: o ETag vira fraco (If-None-Match usa comparação fraca)
+    etag, fraco = response.get_etag()
+    if etag and not fraco:
+        response.set_etag(etag, weak=True)
+
+    return response
+
+
+def init_app(app):
+    app.after_request(comprimir_resposta)
@@ -0,0 +1,58 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+import ocupacao
+import politicas
+import relogio
+
+# ================== GRADE DE HORÁRIOS ==================
+# A disponibilidade de vários dias vai numa resposta só: a lista de horários
+# de atendimento e, para cada dia a partir de `inicio`, um inteiro em que o
+# bit i ligado quer dizer que horarios[i] está livre. Dia fechado ou fora da
+# janela de agendamento vem como null.
+def _bits_por_horario(horarios):
+    return {h: 1 << i for i, h in enumerate(horarios)}
+
+
+def grade(inicio, dias, momento=None):
+    momento = momento or relogio.agora()
+    horarios = politicas.horarios()
+    bits = _bits_por_horario(horarios)
+    todos = (1 << len(horarios)) - 1
+    abertos = politicas.dias_funcionamento()
+
+    hoje, limite = ocupacao.janela(momento.date())
+    fim = inicio + timedelta(days=dias - 1)
+    primeiro, ultimo = max(inicio, hoje), min(fim, limite)
+    ocupados = ocupacao.horarios_do_periodo(primeiro, ultimo) if primeiro <= ultimo else {}
+
+    # horários de hoje que já passaram
+    passados = 0
+    for h, bit in bits.items():
+        if datetime.combine(hoje, datetime.strptime(h, "%H:%M").time()) <= momento:
+            passados |= bit
+
+    livres = []
+    for n in range(dias):
+        dia = inicio + timedelta(days=n)
+        if dia.weekday() not in abertos or not hoje <= dia <= limite:
+            livres.append(None)
+            continue
+
+        mascara = todos
+        for h in ocupados.get(dia.strftime("%Y-%m-%d"), ()):
+            mascara &= ~bits.get(h, 0)
+        if dia == hoje:
+            mascara &= ~passados
+        livres.append(mascara)
+
+    return {
+        "inicio": inicio.strftime("%Y-%m-%d"),
+        "horarios": horarios,
+        "livres": livres,
+    }
+
+
+def gerar_etag(payload):
+    return hashlib.md5(json.dumps(payload, separators=(",", ":")).encode()).hexdigest()
@@ -0,0 +1,181 @@
+import csv
+import io
+import json
+import os
+from datetime import date, timedelta
+from decimal import Decimal
+
+from flask import Response
+
+import banco
+import manutencao
+import relogio
+from metricas import CursorMedido
+from ocupacao import formatar_horario
+
+# ================== EXPORTAÇÃO ==================
+# /admin/exportar devolve agendamentos (com a divisão pix/dinheiro) ou o
+# resumo diário de um período qualquer, em CSV ou JSON. As linhas saem do
+# MySQL por um cursor sem buffer, em lotes de EXPORTACAO_LOTE (500), e vão
+# direto para a resposta em stream; a memória não cresce com o período.
+# O gzip fica por conta do compressao.py, bloco a bloco.
+# Os agendamentos de antes de hoje são apagados pela manutenção; com
+# MANUTENCAO_ARQUIVAR=1 eles também saem de agendamentos_arquivo. Sem o
+# arquivo, um período de agendamentos que pega dias já limpos é recusado em
+# vez de sair vazio; o resumo diário continua valendo para esses dias.
+COLUNAS = {
+    "agendamentos": [
+        "id", "data", "horario", "email", "telefone", "servicos", "total",
+        "forma_pagamento", "valor_pix", "valor_dinheiro", "valor_final", "finalizado",
+    ],
+    "resumo": ["data", "pix", "dinheiro", "total", "atendimentos"],
+}
+
+FILTROS_PAGAMENTO = {
+    "pix": "valor_pix > 0",
+    "dinheiro": "valor_dinheiro > 0",
+    "pendente": "finalizado = 0",
+}
+
+FORMATOS = {
+    "csv": "text/csv",
+    "json": "application/json",
+}
+
+INICIO_FORMULA = ("=", "+", "-", "@", "\t", "\r")
+
+
+def tamanho_lote():
+    return int(os.getenv("EXPORTACAO_LOTE", 500))
+
+
+def historico_apagado(tipo, inicio):
+    return tipo == "agendamentos" and not manutencao.arquivar() and inicio < relogio.hoje()
+
+
+def inicio_padrao(tipo, hoje):
+    # o mês corrente, ou só a partir de hoje se os dias anteriores já sumiram
+    inicio = hoje.replace(day=1)
+    return hoje if historico_apagado(tipo, inicio) else inicio
+
+
+def consulta(tipo, inicio, fim, pagamento=None):
+    if tipo == "resumo":
+        return (
+            "SELECT data, pix, dinheiro, total, atendimentos FROM resumo_diario "
+            "WHERE data BETWEEN %s AND %s ORDER BY data",
+            (inicio, fim),
+        )
+
+    colunas = ", ".join(COLUNAS["agendamentos"])
+    filtro = f" AND {FILTROS_PAGAMENTO[pagamento]}" if pagamento else ""
+    tabelas = ["agendamentos"]
+    if manutencao.arquivar():
+        tabelas.append("agendamentos_arquivo")
+
+    sql = " UNION ALL ".join(
+        f"SELECT {colunas} FROM {tabela} WHERE data BETWEEN %s AND %s{filtro}"
+        for tabela in tabelas
+    )
+    return sql + " ORDER BY data, horario, id", (inicio, fim) * len(tabelas)
+
+
+def _celula(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, date):
+        return valor.strftime("%Y-%m-%d")
+    if isinstance(valor, timedelta):
+        return formatar_horario(valor)
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+def _celula_csv(valor):
+    # email, telefone e serviços vêm do cliente: "=...", "+...", "-..." ou
+    # "@..." viram fórmula quando a dona abre o arquivo no Excel
+    if isinstance(valor, str) and valor.startswith(INICIO_FORMULA):
+        return "'" + valor
+    celula = _celula(valor)
+    return "" if celula is None else celula
+
+
+def _lotes(sql, parametros):
+    # conexão própria: o stream continua depois que a requisição termina
+    conn = banco.checkout("salao")
+    cursor = CursorMedido(conn.cursor())
+
+    try:
+        cursor.execute(sql, parametros)
+        while True:
+            lote = cursor.fetchmany(tamanho_lote())
+            if not lote:
+                break
+            yield lote
+    finally:
+        # cliente desconectou no meio: o resto do resultado precisa ser lido
+        # antes de a conexão voltar para o pool
+        try:
+            if getattr(conn, "unread_result", False):
+                conn.consume_results()
+            cursor.close()
+        except banco.driver().errors.Error:
+            pass
+        banco.devolver(conn)
+
+
+def _csv(colunas, lotes):
+    # ";" e BOM para o Excel em português abrir as colunas certas
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=";")
+    escritor.writerow(colunas)
+
+    try:
+        yield "\ufeff" + buffer.getvalue()
+
+        for lote in lotes:
+            buffer.seek(0)
+            buffer.truncate()
+            escritor.writerows([
+                [_celula_csv(celula) for celula in linha]
+                for linha in lote
+            ])
+            yield buffer.getvalue()
+    finally:
+        lotes.close()
+
+
+def _json(colunas, lotes):
+    separador = "\n"
+
+    try:
+        yield "["
+        for lote in lotes:
+            partes = []
+            for linha in lote:
+                partes.append(separador + json.dumps(
+                    dict(zip(colunas, map(_celula, linha))),
+                    ensure_ascii=False, separators=(",", ":")
+                ))
+                separador = ",\n"
+            yield "".join(partes)
+        yield "\n]\n"
+    finally:
+        lotes.close()
+
+
+def resposta(tipo, formato, inicio, fim, pagamento=None):
+    sql, parametros = consulta(tipo, inicio, fim, pagamento)
+    colunas = COLUNAS[tipo]
+    gerar = _csv if formato == "csv" else _json
+
+    nome = f"{tipo}_{inicio:%Y-%m-%d}_{fim:%Y-%m-%d}.{formato}"
+    return Response(
+        gerar(colunas, _lotes(sql, parametros)),
+        mimetype=FORMATOS[formato],
+        headers={
+            "Content-Disposition": f'attachment; filename="{nome}"',
+            "Cache-Control": "private, no-store",
+        },
+    )
@@ -0,0 +1,318 @@
+import logging
+import os
+import sqlite3
+import time
+from threading import Event, Lock, Thread
+
+# ================== FILA DE EMAILS ==================
+# A requisição só grava a mensagem num arquivo SQLite local; um pool pequeno
+# de threads por worker esvazia a fila usando um único cliente da API.
+# Mensagens que falham voltam para a fila com espera exponencial, e o que
+# estava pendente quando o worker reiniciou é enviado depois.
+REMETENTE = {
+    "name": "Jefferson Cabeleireiro",
+    "email": "thalysondasilvaribeiro@gmail.com"
+}
+
+_workers = []
+_workers_pid = None
+_acordar = Event()
+_parar = Event()
+_lock = Lock()
+_transporte = None
+log = logging.getLogger(__name__)
+_schema_pronto = False
+
+metricas = {
+    "enfileirados": 0,
+    "enviados": 0,
+    "falhas": 0,
+    "descartados": 0,
+    "tempo_envio_total": 0.0,
+    "tempo_envio_max": 0.0,
+}
+
+
+def arquivo():
+    return os.getenv("EMAIL_FILA_ARQUIVO", "fila_email.db")
+
+def num_workers():
+    return int(os.getenv("EMAIL_WORKERS", 2))
+
+def tamanho_lote():
+    return int(os.getenv("EMAIL_LOTE", 20))
+
+def max_tentativas():
+    return int(os.getenv("EMAIL_MAX_TENTATIVAS", 8))
+
+def backoff_base():
+    return float(os.getenv("EMAIL_BACKOFF_BASE", 5))
+
+def intervalo():
+    return float(os.getenv("EMAIL_INTERVALO", 2))
+
+
+def _conectar():
+    global _schema_pronto
+
+    conn = sqlite3.connect(arquivo(), timeout=30, isolation_level=None)
+    if _schema_pronto:
+        return conn
+
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS fila_email (
+            id INTEGER PRIMARY KEY,
+            destinatario TEXT NOT NULL,
+            assunto TEXT NOT NULL,
+            html TEXT NOT NULL,
+            tentativas INTEGER NOT NULL DEFAULT 0,
+            proxima_tentativa REAL NOT NULL,
+            reservado_ate REAL,
+            criado_em REAL NOT NULL,
+            erro TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_fila_email_proxima ON fila_email (proxima_tentativa)")
+    _schema_pronto = True
+    return conn
+
+
+# ================== TRANSPORTES ==================
+class TransporteBrevo:
+
+    def __init__(self, api_key):
+        from sib_api_v3_sdk import Configuration, ApiClient
+        from sib_api_v3_sdk.api import transactional_emails_api
+
+        configuration = Configuration()
+        configuration.api_key['api-key'] = api_key
+
+        self.api = transactional_emails_api.TransactionalEmailsApi(ApiClient(configuration))
+
+    def enviar(self, mensagens):
+        from sib_api_v3_sdk.models import SendSmtpEmail
+
+        # O messageVersions da Brevo não aceita um corpo diferente por
+        # destinatário, então cada mensagem é uma chamada, todas no mesmo cliente
+        resultados = []
+        for mensagem in mensagens:
+            try:
+                self.api.send_transac_email(SendSmtpEmail(
+                    to=[{"email": mensagem["destinatario"]}],
+                    subject=mensagem["assunto"],
+                    html_content=mensagem["html"],
+                    sender=REMETENTE
+                ))
+                resultados.append(None)
+            except Exception as e:
+                resultados.append(str(e))
+        return resultados
+
+
+class TransporteFake:
+    # Guarda as mensagens em memória; usado em desenvolvimento, nos testes e nos benchmarks
+
+    def __init__(self, falhar=0):
+        self.enviados = []
+        self.falhar = falhar
+        self._lock = Lock()
+
+    def enviar(self, mensagens):
+        resultados = []
+        with self._lock:
+            for mensagem in mensagens:
+                if self.falhar > 0:
+                    self.falhar -= 1
+                    resultados.append("falha simulada")
+                else:
+                    self.enviados.append(mensagem)
+                    resultados.append(None)
+        return resultados
+
+
+def transporte():
+    global _transporte
+
+    if _transporte is None:
+        if os.getenv("EMAIL_TRANSPORTE") == "fake":
+            _transporte = TransporteFake()
+        else:
+            api_key = os.getenv("BREVO_API_KEY")
+            if not api_key:
+                raise RuntimeError("BREVO_API_KEY não configurada")
+            _transporte = TransporteBrevo(api_key)
+
+    return _transporte
+
+
+def usar_transporte(novo):
+    global _transporte
+    _transporte = novo
+
+
+def aquecer():
+    # só importa o SDK (o mais pesado do app); o cliente HTTP é criado em
+    # cada worker, no primeiro envio
+    if os.getenv("EMAIL_TRANSPORTE") == "fake":
+        return
+    try:
+        import sib_api_v3_sdk.api.transactional_emails_api  # noqa: F401
+    except ImportError:
+        pass
+
+
+# ================== FILA ==================
+def enfileirar(destinatario, assunto, mensagem):
+    mensagem_html = mensagem.replace("\n", "<br>")
+    agora = time.time()
+
+    conn = _conectar()
+    try:
+        conn.execute(
+            "INSERT INTO fila_email (destinatario, assunto, html, proxima_tentativa, criado_em) VALUES (?,?,?,?,?)",
+            (destinatario, assunto, f"<html><body><p>{mensagem_html}</p></body></html>", agora, agora)
+        )
+    finally:
+        conn.close()
+
+    with _lock:
+        metricas["enfileirados"] += 1
+
+    iniciar()
+    _acordar.set()
+
+
+def _reservar_lote(conn):
+    agora = time.time()
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        linhas = conn.execute("""
+            SELECT id, destinatario, assunto, html, tentativas, criado_em
+            FROM fila_email
+            WHERE proxima_tentativa <= ?
+            AND (reservado_ate IS NULL OR reservado_ate < ?)
+            ORDER BY proxima_tentativa
+            LIMIT ?
+        """, (agora, agora, tamanho_lote())).fetchall()
+
+        if linhas:
+            marcadores = ", ".join("?" * len(linhas))
+            conn.execute(
+                f"UPDATE fila_email SET reservado_ate=? WHERE id IN ({marcadores})",
+                [agora + 60] + [linha[0] for linha in linhas]
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    colunas = ("id", "destinatario", "assunto", "html", "tentativas", "criado_em")
+    return [dict(zip(colunas, linha)) for linha in linhas]
+
+
+def processar_lote(conn=None):
+    proprio = conn is None
+    if proprio:
+        conn = _conectar()
+
+    try:
+        lote = _reservar_lote(conn)
+        if not lote:
+            return 0
+
+        inicio = time.monotonic()
+        try:
+            resultados = transporte().enviar(lote)
+        except Exception as e:
+            # sem BREVO_API_KEY, SDK quebrado...: conta como tentativa de cada
+            # mensagem, senão o lote volta para a fila a cada minuto para sempre
+            resultados = [str(e)] * len(lote)
+        duracao = time.monotonic() - inicio
+
+        agora = time.time()
+        for mensagem, erro in zip(lote, resultados):
+            if erro is None:
+                conn.execute("DELETE FROM fila_email WHERE id=?", (mensagem["id"],))
+                continue
+
+            tentativas = mensagem["tentativas"] + 1
+            if tentativas >= max_tentativas():
+                log.error("Email para %s descartado após %d tentativas: %s", mensagem["destinatario"], tentativas, erro)
+                conn.execute("DELETE FROM fila_email WHERE id=?", (mensagem["id"],))
+                with _lock:
+                    metricas["descartados"] += 1
+                continue
+
+            conn.execute(
+                "UPDATE fila_email SET tentativas=?, proxima_tentativa=?, reservado_ate=NULL, erro=? WHERE id=?",
+                (tentativas, agora + backoff_base() * 2 ** (tentativas - 1), erro, mensagem["id"])
+            )
+
+        falhas = sum(1 for erro in resultados if erro is not None)
+        with _lock:
+            metricas["enviados"] += len(lote) - falhas
+            metricas["falhas"] += falhas
+            metricas["tempo_envio_total"] += duracao
+            metricas["tempo_envio_max"] = max(metricas["tempo_envio_max"], duracao)
+
+        return len(lote)
+    finally:
+        if proprio:
+            conn.close()
+
+
+def profundidade():
+    conn = _conectar()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM fila_email").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _loop():
+    conn = _conectar()
+    try:
+        while not _parar.is_set():
+            try:
+                if processar_lote(conn):
+                    continue
+            except Exception:
+                log.exception("Erro na fila de emails")
+
+            _acordar.wait(intervalo())
+            _acordar.clear()
+    finally:
+        conn.close()
+
+
+def iniciar():
+    global _workers, _workers_pid
+
+    with _lock:
+        # depois de um fork as threads do processo pai não existem mais
+        if _workers_pid == os.getpid():
+            return
+
+        _parar.clear()
+        _workers = [
+            Thread(target=_loop, name=f"fila-email-{i}", daemon=True)
+            for i in range(num_workers())
+        ]
+        _workers_pid = os.getpid()
+
+    for worker in _workers:
+        worker.start()
+
+
+def parar():
+    _parar.set()
+    _acordar.set()
+
+
+def init_app(app):
+    @app.before_request
+    def _iniciar_fila():
+        if _workers_pid != os.getpid():
+            iniciar()
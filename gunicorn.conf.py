@@ -0,0 +1,56 @@
+import os
+
+from implantacao import num_workers
+
+# ================== GUNICORN ==================
+# GUNICORN_MODO escolhe o tipo de worker:
+#   sync    -> um request por worker (padrão, como antes)
+#   gthread -> GUNICORN_THREADS threads por worker
+#   gevent  -> até GUNICORN_CONEXOES requests por worker; o I/O do MySQL,
+#              da API de email e os sleeps cedem a vez em vez de travar
+# WEB_CONCURRENCY define o número de workers (2 por padrão, ver implantacao.py).
+modo = os.getenv("GUNICORN_MODO", "sync")
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8000)}"
+workers = num_workers()
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+# Conexões keep-alive só valem nos modos gthread e gevent (o worker sync
+# fecha a conexão a cada resposta). Atrás de um proxy reverso o keep-alive
+# precisa ser maior que o tempo ocioso do proxy (60s no upstream do nginx),
+# senão o proxy reaproveita uma conexão que o gunicorn acabou de fechar.
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 75))
+
+if modo == "gevent":
+    worker_class = "gevent"
+    worker_connections = int(os.getenv("GUNICORN_CONEXOES", 100))
+elif modo == "gthread":
+    worker_class = "gthread"
+    threads = int(os.getenv("GUNICORN_THREADS", 4))
+else:
+    worker_class = "sync"
+
+# ================== PRELOAD ==================
+# Com preload o master importa o app uma vez antes do fork: os workers nascem
+# com tudo carregado (e compartilham essas páginas de memória) em vez de cada
+# um importar o app de novo. GUNICORN_PRELOAD=0 volta ao carregamento por
+# worker. Pools, threads e clientes do cache são criados depois do fork.
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+if preload_app and modo == "gevent":
+    # os Locks e Events de módulo são criados na importação; no master eles
+    # precisam já nascer cooperativos, senão travariam o loop do worker
+    from gevent import monkey
+    monkey.patch_all()
+
+
+def when_ready(server):
+    if preload_app:
+        import app
+        app.aquecer()
+
+
+def post_worker_init(worker):
+    import app
+    app.iniciar_worker()
@@ -0,0 +1,110 @@
+import os
+from datetime import date
+
+from ocupacao import formatar_horario
+
+# ================== HISTÓRICO PAGINADO ==================
+# Listagens de agendamentos em páginas por chave (data, horario, id), em vez
+# de OFFSET: a página seguinte começa logo depois do último item da anterior,
+# então o custo não cresce com o tamanho do histórico e um agendamento novo
+# não empurra itens de uma página para a outra.
+#   HISTORICO_POR_PAGINA -> agendamentos por página em /agendamentos (20)
+#   ADMIN_POR_PAGINA     -> clientes por página na visão do dia (50)
+# O marcador da próxima página vai na URL como "2024-05-10_14:00:00_123".
+def por_pagina():
+    return int(os.getenv("HISTORICO_POR_PAGINA", 20))
+
+def por_pagina_admin():
+    return int(os.getenv("ADMIN_POR_PAGINA", 50))
+
+
+def marcador(data, horario, id):
+    return f"{data.strftime('%Y-%m-%d')}_{_segundos_para_texto(horario)}_{id}"
+
+
+def ler_marcador(texto):
+    # None para a primeira página; ValueError se o marcador não veio daqui
+    if not texto:
+        return None
+    data, horario, id = texto.split("_")
+    h, m, s = (int(parte) for parte in horario.split(":"))
+    if not (0 <= h < 24 and 0 <= m < 60 and 0 <= s < 60):
+        raise ValueError(texto)
+    return date.fromisoformat(data), f"{h:02d}:{m:02d}:{s:02d}", int(id)
+
+
+def _segundos_para_texto(horario):
+    # TIME vem do mysql.connector como timedelta
+    if hasattr(horario, "total_seconds"):
+        total = int(horario.total_seconds())
+        return f"{total // 3600:02d}:{total // 60 % 60:02d}:{total % 60:02d}"
+    return horario.strftime("%H:%M:%S")
+
+
+def _pagina(cursor, sql, parametros, limite):
+    # pede um item a mais só para saber se existe próxima página; as linhas
+    # são lidas uma a uma do cursor, sem fetchall
+    cursor.execute(sql, parametros + (limite + 1,))
+
+    itens = []
+    ultimo = None
+    proximo = None
+    for ag in cursor:
+        if len(itens) == limite:
+            proximo = marcador(*ultimo)
+            continue
+        ultimo = (ag["data"], ag["horario"], ag["id"])
+        ag["horario"] = formatar_horario(ag["horario"])
+        itens.append(ag)
+
+    return itens, proximo
+
+
+def do_cliente(cursor, usuario_id, depois=None, limite=None):
+    # mais recentes primeiro; usa idx_agendamentos_usuario_data
+    limite = limite or por_pagina()
+    sql = """
+        SELECT id, data, horario, servicos, total
+        FROM agendamentos
+        WHERE usuario_id = %s
+    """
+    parametros = (usuario_id,)
+
+    if depois:
+        data, horario, id = depois
+        sql += """
+          AND (data < %s OR (data = %s AND (horario < %s OR (horario = %s AND id < %s))))
+        """
+        parametros += (data, data, horario, horario, id)
+
+    sql += " ORDER BY data DESC, horario DESC, id DESC LIMIT %s"
+    return _pagina(cursor, sql, parametros, limite)
+
+
+def do_dia(cursor, data, depois=None, limite=None):
+    # visão do dia no admin, por ordem de horário; usa uq_agendamentos_data_horario
+    limite = limite or por_pagina_admin()
+    sql = """
+        SELECT id, data, email, horario, valor_pix, valor_dinheiro
+        FROM agendamentos
+        WHERE data = %s
+    """
+    parametros = (data,)
+
+    if depois:
+        _, horario, id = depois
+        sql += " AND (horario > %s OR (horario = %s AND id > %s))"
+        parametros += (horario, horario, id)
+
+    sql += " ORDER BY horario, id LIMIT %s"
+    return _pagina(cursor, sql, parametros, limite)
+
+
+def para_json(ag):
+    return {
+        "id": ag["id"],
+        "data": ag["data"].strftime("%Y-%m-%d"),
+        "horario": ag["horario"],
+        "servicos": ag["servicos"],
+        "total": str(ag["total"]) if ag["total"] is not None else None,
+    }
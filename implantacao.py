@@ -0,0 +1,8 @@
+import os
+
+# ================== IMPLANTAÇÃO ==================
+# Quantos workers o gunicorn sobe. O gunicorn.conf.py e quem divide recursos
+# entre os workers (pool de senhas, checagem das sessões) leem daqui, com o
+# mesmo padrão.
+def num_workers():
+    return max(1, int(os.getenv("WEB_CONCURRENCY", 2)))
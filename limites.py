@@ -0,0 +1,206 @@
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from flask import Response, request
+
+from cache import criar_cache
+
+# ================== LIMITE DE TENTATIVAS ==================
+# Baldes de fichas por IP e por email nos POSTs que custam caro (hash de
+# senha, consulta ao banco, email). O pedido que passa do limite volta 429
+# antes de qualquer outro trabalho.
+# Cada limite é "capacidade/segundos": até `capacidade` pedidos seguidos, e
+# as fichas voltam aos poucos até encher de novo em `segundos`. O .env
+# troca o padrão por rota e chave, e "0" desliga:
+#   LIMITE_LOGIN_IP=20/60  LIMITE_LOGIN_EMAIL=5/60
+#   LIMITES_TAMANHO -> baldes guardados por worker (10000)
+#   LIMITES_PROXIES -> proxies na frente do app; o IP vem do X-Forwarded-For (1)
+# O padrão é o roteador da plataforma na frente do gunicorn: sem ele, todo
+# cliente teria o IP do roteador e dividiria o mesmo balde. Com o app exposto
+# direto, use 0, senão o cliente escolhe o próprio IP no X-Forwarded-For.
+# Com CACHE_BACKEND=redis os baldes ficam no store compartilhado e o limite
+# vale para todos os workers juntos; com o backend local, é por worker.
+LIMITES = {
+    "login": {"ip": "20/60", "email": "5/60"},
+    "esqueceu_senha": {"ip": "5/300", "email": "3/900"},
+    "contato": {"ip": "5/300", "email": "3/300"},
+}
+
+_baldes = None
+
+metricas = {
+    "permitidos": 0,
+    "recusados": 0,
+}
+
+
+def tamanho():
+    return int(os.getenv("LIMITES_TAMANHO", 10000))
+
+def proxies():
+    return int(os.getenv("LIMITES_PROXIES", 1))
+
+
+def limite(rota, chave):
+    # (capacidade, segundos) ou None se desligado
+    valor = os.getenv(f"LIMITE_{rota.upper()}_{chave.upper()}", LIMITES[rota][chave])
+    if valor == "0":
+        return None
+    capacidade, segundos = valor.split("/")
+    return int(capacidade), float(segundos)
+
+
+def _encher(balde, capacidade, segundos, agora):
+    fichas, antes = balde
+    return min(capacidade, fichas + (agora - antes) * capacidade / segundos)
+
+
+def _falta(fichas, capacidade, segundos):
+    return 0 if fichas >= 1 else (1 - fichas) * segundos / capacidade
+
+
+# ================== BALDES ==================
+class BaldesLocais:
+    # chave -> [fichas, instante]. Balde cheio é igual a balde que não existe,
+    # então perder os mais antigos quando passa do tamanho não muda nada para
+    # quem está parado.
+
+    def __init__(self, tamanho=10000):
+        self.tamanho = tamanho
+        self._baldes = OrderedDict()
+        self._lock = Lock()
+
+    def espera(self, chave, capacidade, segundos):
+        # quanto falta para a próxima ficha, sem gastar nada
+        with self._lock:
+            balde = self._baldes.get(chave)
+            if balde is None:
+                return 0
+            fichas = _encher(balde, capacidade, segundos, time.monotonic())
+        return _falta(fichas, capacidade, segundos)
+
+    def gastar(self, chave, capacidade, segundos):
+        # devolve 0 se passou, ou quantos segundos faltam para a próxima ficha
+        agora = time.monotonic()
+
+        with self._lock:
+            balde = self._baldes.get(chave)
+            fichas = capacidade if balde is None else _encher(balde, capacidade, segundos, agora)
+
+            if fichas < 1:
+                return _falta(fichas, capacidade, segundos)
+
+            if balde is None:
+                self._baldes[chave] = [fichas - 1, agora]
+                if len(self._baldes) > self.tamanho:
+                    self._baldes.popitem(last=False)
+            else:
+                balde[0] = fichas - 1
+                balde[1] = agora
+                self._baldes.move_to_end(chave)
+            return 0
+
+    def __len__(self):
+        return len(self._baldes)
+
+
+class BaldesCompartilhados:
+    # Mesmo balde guardado no store compartilhado. Ler e gravar não é uma
+    # operação só, então dois workers podem gastar a mesma ficha ao mesmo
+    # tempo; o limite fica aproximado, mas vale para o conjunto.
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def espera(self, chave, capacidade, segundos):
+        balde = self.cache.get(chave)
+        if balde is None:
+            return 0
+        return _falta(_encher(balde, capacidade, segundos, time.time()), capacidade, segundos)
+
+    def gastar(self, chave, capacidade, segundos):
+        agora = time.time()
+        balde = self.cache.get(chave)
+        fichas = capacidade if balde is None else _encher(balde, capacidade, segundos, agora)
+
+        if fichas < 1:
+            return _falta(fichas, capacidade, segundos)
+
+        # depois de `segundos` parado o balde está cheio de novo e pode sumir
+        self.cache.set(chave, [fichas - 1, agora], ttl=segundos)
+        return 0
+
+    def __len__(self):
+        return 0
+
+
+def baldes():
+    global _baldes
+
+    if _baldes is None:
+        if os.getenv("CACHE_BACKEND", "local") == "local":
+            _baldes = BaldesLocais(tamanho())
+        else:
+            _baldes = BaldesCompartilhados(criar_cache("limites", tamanho=tamanho(), ttl=60))
+    return _baldes
+
+
+# ================== VERIFICAÇÃO ==================
+def ip_cliente():
+    n = proxies()
+    encaminhado = request.headers.get("X-Forwarded-For")
+    if n and encaminhado:
+        encaminhado = encaminhado.split(",")
+        if len(encaminhado) >= n:
+            return encaminhado[-n].strip()
+    return request.remote_addr or "-"
+
+
+def verificar(rota):
+    # o maior tempo de espera entre as chaves da rota, ou 0 se pode seguir.
+    # Confere todos os baldes antes de gastar: um pedido recusado pelo balde
+    # do IP não pode consumir a ficha do email (e vice-versa).
+    chaves = {"ip": ip_cliente()}
+
+    email = (request.form.get("email") or "").strip().lower()
+    if email:
+        chaves["email"] = email
+
+    pedidos = []
+    for tipo, valor in chaves.items():
+        config = limite(rota, tipo)
+        if config is not None:
+            pedidos.append((f"{rota}:{tipo}:{valor}", config))
+
+    espera = max((baldes().espera(chave, *config) for chave, config in pedidos), default=0)
+    if espera:
+        return espera
+
+    for chave, config in pedidos:
+        espera = max(espera, baldes().gastar(chave, *config))
+    return espera
+
+
+def _limitar():
+    if request.method != "POST" or request.endpoint not in LIMITES:
+        return None
+
+    espera = verificar(request.endpoint)
+    if not espera:
+        metricas["permitidos"] += 1
+        return None
+
+    metricas["recusados"] += 1
+    segundos = int(espera) + 1
+    return Response(
+        f"Muitas tentativas. Tente novamente em {segundos} segundos.",
+        status=429,
+        mimetype="text/plain",
+        headers={"Retry-After": str(segundos)},
+    )
+
+
+def init_app(app):
+    app.before_request(_limitar)
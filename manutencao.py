@@ -0,0 +1,153 @@
+import logging
+import os
+import time
+from threading import Lock, Thread, Event
+
+import banco
+import relogio
+
+# ================== LIMPEZA DE HORÁRIOS PASSADOS ==================
+# Roda numa thread própria em cada worker, mas o GET_LOCK do MySQL garante
+# que só um worker por vez faz a limpeza.
+NOME_LOCK = "salao_limpeza_agendamentos"
+
+_thread = None
+_thread_pid = None
+_parar = Event()
+_lock = Lock()
+log = logging.getLogger(__name__)
+
+metricas = {
+    "execucoes": 0,
+    "ignoradas": 0,
+    "erros": 0,
+    "linhas_removidas": 0,
+    "duracao_total": 0.0,
+    "ultima_duracao": 0.0,
+    "ultima_execucao": None,
+}
+
+
+def intervalo():
+    return float(os.getenv("MANUTENCAO_INTERVALO", 300))
+
+def tamanho_lote():
+    return int(os.getenv("MANUTENCAO_LOTE", 500))
+
+def arquivar():
+    return os.getenv("MANUTENCAO_ARQUIVAR", "0") == "1"
+
+
+def _remover_lote(cursor, agora, lote, arquivo):
+    # só dias anteriores: os atendimentos de hoje ficam até o fechamento do
+    # dia, quando o admin registra o pagamento e o resumo_diario recebe o valor
+    cursor.execute("""
+        SELECT id FROM agendamentos
+        WHERE data < %s
+        ORDER BY data, horario
+        LIMIT %s
+    """, (agora.date(), lote))
+    ids = [linha[0] for linha in cursor.fetchall()]
+
+    if not ids:
+        return 0
+
+    marcadores = ", ".join(["%s"] * len(ids))
+
+    if arquivo:
+        cursor.execute(
+            f"INSERT IGNORE INTO agendamentos_arquivo SELECT * FROM agendamentos WHERE id IN ({marcadores})",
+            ids
+        )
+
+    cursor.execute(f"DELETE FROM agendamentos WHERE id IN ({marcadores})", ids)
+    return cursor.rowcount
+
+
+def limpar_horarios_passados():
+    inicio = time.monotonic()
+    removidas = 0
+
+    db = banco.checkout("salao")
+    cursor = db.cursor()
+
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (NOME_LOCK,))
+        if cursor.fetchone()[0] != 1:
+            with _lock:
+                metricas["ignoradas"] += 1
+            return 0
+
+        try:
+            agora = relogio.agora()
+            lote = tamanho_lote()
+            arquivo = arquivar()
+
+            if arquivo:
+                cursor.execute("CREATE TABLE IF NOT EXISTS agendamentos_arquivo LIKE agendamentos")
+
+            # lotes pequenos para não segurar lock de escrita na tabela
+            while True:
+                apagadas = _remover_lote(cursor, agora, lote, arquivo)
+                db.commit()
+                removidas += apagadas
+                if apagadas < lote:
+                    break
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (NOME_LOCK,))
+            cursor.fetchone()
+    finally:
+        cursor.close()
+        banco.devolver(db)
+
+    duracao = time.monotonic() - inicio
+    with _lock:
+        metricas["execucoes"] += 1
+        metricas["linhas_removidas"] += removidas
+        metricas["duracao_total"] += duracao
+        metricas["ultima_duracao"] = duracao
+        metricas["ultima_execucao"] = agora.strftime("%Y-%m-%d %H:%M:%S")
+
+    return removidas
+
+
+def _loop():
+    while not _parar.wait(intervalo()):
+        try:
+            limpar_horarios_passados()
+        except Exception:
+            with _lock:
+                metricas["erros"] += 1
+            log.exception("Erro na limpeza de agendamentos")
+
+
+def iniciar():
+    global _thread, _thread_pid
+
+    if intervalo() <= 0:
+        return
+
+    with _lock:
+        # depois de um fork a thread do processo pai não existe mais
+        if _thread_pid == os.getpid() and _thread.is_alive():
+            return
+        _parar.clear()
+        _thread = Thread(target=_loop, name="limpeza-agendamentos", daemon=True)
+        _thread_pid = os.getpid()
+        _thread.start()
+
+
+def parar():
+    _parar.set()
+
+
+def init_app(app):
+    @app.before_request
+    def _iniciar_limpeza():
+        if _thread_pid != os.getpid():
+            iniciar()
+
+    @app.cli.command("limpar-agendamentos")
+    def _limpar_agendamentos():
+        removidas = limpar_horarios_passados()
+        print(f"{removidas} agendamentos removidos")
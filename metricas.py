@@ -0,0 +1,274 @@
+import hmac
+import os
+import re
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+from flask import Response, g, has_request_context, request, template_rendered, before_render_template
+
+# ================== MÉTRICAS ==================
+# Tudo fica em memória, por processo (cada worker do gunicorn tem as suas).
+# /metrics exporta no formato texto do Prometheus, só com METRICAS_TOKEN
+# configurado e o cabeçalho "Authorization: Bearer <token>".
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = Lock()
+
+
+class Histograma:
+
+    def __init__(self, nome, ajuda, buckets=BUCKETS):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.buckets = buckets
+        self.series = {}
+
+    def observar(self, valor, **rotulos):
+        chave = tuple(sorted(rotulos.items()))
+
+        with _lock:
+            serie = self.series.get(chave)
+            if serie is None:
+                serie = self.series[chave] = [[0] * len(self.buckets), 0.0, 0]
+
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[0][i] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+
+        with _lock:
+            series = [(chave, list(s[0]), s[1], s[2]) for chave, s in self.series.items()]
+
+        for chave, contagens, soma, total in series:
+            for limite, contagem in zip(self.buckets, contagens):
+                linhas.append(f"{self.nome}_bucket{_rotulos(chave + (('le', limite),))} {contagem}")
+            linhas.append(f"{self.nome}_bucket{_rotulos(chave + (('le', '+Inf'),))} {total}")
+            linhas.append(f"{self.nome}_sum{_rotulos(chave)} {soma}")
+            linhas.append(f"{self.nome}_count{_rotulos(chave)} {total}")
+
+        return linhas
+
+
+class Contador:
+
+    def __init__(self, nome, ajuda):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.series = {}
+
+    def somar(self, valor=1, **rotulos):
+        chave = tuple(sorted(rotulos.items()))
+        with _lock:
+            self.series[chave] = self.series.get(chave, 0) + valor
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} counter"]
+        with _lock:
+            series = list(self.series.items())
+        for chave, valor in series:
+            linhas.append(f"{self.nome}{_rotulos(chave)} {valor}")
+        return linhas
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _rotulos(chave):
+    if not chave:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in chave) + "}"
+
+
+requisicoes = Histograma("salao_http_request_duration_seconds", "Tempo de resposta por rota")
+queries = Contador("salao_db_queries_total", "Consultas executadas por SQL")
+queries_tempo = Contador("salao_db_query_seconds_total", "Tempo gasto por SQL")
+conexoes = Histograma("salao_db_checkout_seconds", "Tempo para obter uma conexão do pool")
+templates = Histograma("salao_template_render_seconds", "Tempo de renderização por template")
+senhas = Histograma("salao_password_hash_seconds", "Tempo de hash/verificação de senha")
+
+HISTOGRAMAS = [requisicoes, conexoes, templates, senhas]
+CONTADORES = [queries, queries_tempo]
+
+
+# ================== REGISTRO ==================
+_ESPACOS = re.compile(r"\s+")
+_LISTA_IN = re.compile(r"IN \((?:%s, )*%s\)", re.IGNORECASE)
+_LITERAIS = re.compile(r"'[^']*'|\b\d+\b")
+
+
+def fingerprint(sql):
+    sql = _ESPACOS.sub(" ", sql).strip()
+    sql = _LISTA_IN.sub("IN (...)", sql)
+    return _LITERAIS.sub("?", sql)[:200]
+
+
+def _tempos():
+    return g.setdefault("_tempos", {"db": 0.0, "queries": 0, "conexao": 0.0, "template": 0.0, "senha": 0.0})
+
+
+def _acumular(campo, valor):
+    if has_request_context():
+        _tempos()[campo] += valor
+
+
+def registrar_query(sql, duracao):
+    chave = fingerprint(sql)
+    queries.somar(1, sql=chave)
+    queries_tempo.somar(duracao, sql=chave)
+    _acumular("db", duracao)
+    _acumular("queries", 1)
+
+
+def registrar_checkout(nome, duracao):
+    conexoes.observar(duracao, banco=nome)
+    _acumular("conexao", duracao)
+
+
+@contextmanager
+def medir_senha(operacao):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        senhas.observar(duracao, operacao=operacao)
+        _acumular("senha", duracao)
+
+
+class CursorMedido:
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, *args, **kwargs)
+        finally:
+            registrar_query(sql, time.perf_counter() - inicio)
+
+    def executemany(self, sql, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, *args, **kwargs)
+        finally:
+            registrar_query(sql, time.perf_counter() - inicio)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+
+# ================== EXPORTAÇÃO ==================
+# Os números das fontes (dicionários de métricas dos módulos) são totais que
+# só crescem e saem como counter, para o rate() funcionar; estes, e os
+# "_max" e "ultima_", são o retrato do momento e saem como gauge.
+MEDIDAS = {"pendentes", "profundidade", "conexoes", "baldes"}
+
+
+def _nome_metrica(*partes):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", "_".join(partes))
+
+
+def _tipo(chave):
+    if chave in MEDIDAS or chave.endswith("_max") or chave.startswith("ultima_"):
+        return "gauge"
+    return "counter"
+
+
+def exportar(fontes):
+    linhas = []
+    for metrica in HISTOGRAMAS + CONTADORES:
+        linhas.extend(metrica.exportar())
+
+    for nome, fonte in fontes.items():
+        valores = fonte() if callable(fonte) else fonte
+        for chave, valor in valores.items():
+            if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+                continue
+            metrica = _nome_metrica("salao", nome, chave)
+            linhas.append(f"# TYPE {metrica} {_tipo(chave)}")
+            linhas.append(f"{metrica} {valor}")
+
+    return "\n".join(linhas) + "\n"
+
+
+def lento_ms():
+    valor = os.getenv("METRICAS_LENTO_MS")
+    return float(valor) if valor else None
+
+
+def init_app(app, fontes=None):
+    fontes = fontes or {}
+
+    @app.before_request
+    def _inicio_requisicao():
+        g._inicio = time.perf_counter()
+
+    def _registrar(inicio, rota, metodo, caminho, status, tempos):
+        duracao = time.perf_counter() - inicio
+        requisicoes.observar(duracao, rota=rota, metodo=metodo)
+
+        limite = lento_ms()
+        if limite is not None and duracao * 1000 >= limite:
+            app.logger.warning(
+                "Requisição lenta: %s %s %.1fms (status %s, db %.1fms em %d consultas, "
+                "conexão %.1fms, template %.1fms, senha %.1fms)",
+                metodo, caminho, duracao * 1000, status,
+                tempos.get("db", 0) * 1000, tempos.get("queries", 0),
+                tempos.get("conexao", 0) * 1000, tempos.get("template", 0) * 1000,
+                tempos.get("senha", 0) * 1000
+            )
+
+    @app.after_request
+    def _fim_requisicao(response):
+        inicio = g.pop("_inicio", None)
+        if inicio is None:
+            return response
+
+        dados = (
+            inicio, request.endpoint or "desconhecida", request.method, request.path,
+            response.status_code, _tempos(),
+        )
+        if response.is_streamed:
+            # exportações e o transmitir() do compressao continuam gerando o
+            # corpo depois da view: o tempo vai até o servidor fechar a resposta
+            response.call_on_close(lambda: _registrar(*dados))
+        else:
+            _registrar(*dados)
+
+        return response
+
+    def _antes_template(sender, template, context, **extra):
+        g.setdefault("_templates", []).append(time.perf_counter())
+
+    def _depois_template(sender, template, context, **extra):
+        pilha = g.get("_templates")
+        if not pilha:
+            return
+        duracao = time.perf_counter() - pilha.pop()
+        templates.observar(duracao, template=template.name)
+        _acumular("template", duracao)
+
+    before_render_template.connect(_antes_template, app, weak=False)
+    template_rendered.connect(_depois_template, app, weak=False)
+
+    @app.route("/metrics")
+    def metrics():
+        # SQL, filas e caches internos: sem METRICAS_TOKEN a rota não existe
+        token = os.getenv("METRICAS_TOKEN")
+        if not token:
+            return "Não encontrado", 404
+        enviado = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(enviado.encode(), f"Bearer {token}".encode()):
+            return "Acesso negado", 403
+
+        return Response(exportar(fontes), mimetype="text/plain; version=0.0.4")
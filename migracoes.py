@@ -0,0 +1,176 @@
+from datetime import datetime
+
+import click
+
+import banco
+from ocupacao import formatar_horario
+
+# ================== MIGRAÇÕES DO BANCO DO SALÃO ==================
+# Cada migração roda uma única vez; a versão aplicada fica em schema_versao.
+# Para mudar o schema, acrescente uma nova entrada no fim da lista. Um passo
+# é um comando SQL ou uma função que recebe o cursor (e as opções do migrar).
+
+
+class MigracaoBloqueada(Exception):
+    pass
+
+
+def _sem_horarios_duplicados(cursor, mover_duplicados=False):
+    # antes do índice único, a corrida entre conferir e inserir pode ter
+    # deixado dois agendamentos no mesmo horário
+    cursor.execute("""
+        SELECT id, data, horario FROM agendamentos
+        WHERE (data, horario) IN (
+            SELECT data, horario FROM agendamentos GROUP BY data, horario HAVING COUNT(*) > 1
+        )
+        ORDER BY data, horario, id
+    """)
+    horarios = {}
+    for id_ag, data, horario in cursor.fetchall():
+        horarios.setdefault((data, horario), []).append(id_ag)
+
+    if not horarios:
+        return
+
+    if not mover_duplicados:
+        linhas = [f"  {data} {formatar_horario(horario)}: ids {', '.join(map(str, ids))}" for (data, horario), ids in horarios.items()]
+        raise MigracaoBloqueada(
+            f"{len(horarios)} horário(s) com mais de um agendamento, o índice único não pode ser criado:\n"
+            + "\n".join(linhas)
+            + "\nRemova os que sobram ou rode \"flask migrar --mover-duplicados\" para levar todos "
+            "menos o mais antigo de cada horário para agendamentos_duplicados."
+        )
+
+    sobras = [id_ag for ids in horarios.values() for id_ag in ids[1:]]
+    marcadores = ", ".join(["%s"] * len(sobras))
+    cursor.execute("CREATE TABLE IF NOT EXISTS agendamentos_duplicados AS SELECT * FROM agendamentos WHERE 1 = 0")
+    cursor.execute(f"INSERT INTO agendamentos_duplicados SELECT * FROM agendamentos WHERE id IN ({marcadores})", sobras)
+    cursor.execute(f"DELETE FROM agendamentos WHERE id IN ({marcadores})", sobras)
+
+
+MIGRACOES = [
+    (
+        1,
+        "índices compostos de agendamentos",
+        [
+            _sem_horarios_duplicados,
+            # verificação de horário duplicado, /api/horarios/<data>,
+            # visão do dia no admin e limpeza de horários passados
+            "CREATE UNIQUE INDEX uq_agendamentos_data_horario ON agendamentos (data, horario)",
+            # carência entre agendamentos e histórico do cliente
+            "CREATE INDEX idx_agendamentos_usuario_data ON agendamentos (usuario_id, data, horario)",
+        ],
+    ),
+    (
+        2,
+        "resumo diário de faturamento",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS resumo_diario (
+                data DATE PRIMARY KEY,
+                pix DECIMAL(10,2) NOT NULL DEFAULT 0,
+                dinheiro DECIMAL(10,2) NOT NULL DEFAULT 0,
+                total DECIMAL(10,2) NOT NULL DEFAULT 0,
+                atendimentos INT NOT NULL DEFAULT 0
+            )
+            """,
+            # preenche com o histórico que ainda está em agendamentos
+            """
+            INSERT INTO resumo_diario (data, pix, dinheiro, total, atendimentos)
+            SELECT data, COALESCE(SUM(valor_pix), 0), COALESCE(SUM(valor_dinheiro), 0),
+                   COALESCE(SUM(valor_final), 0), COUNT(*)
+            FROM agendamentos
+            WHERE finalizado = 1
+            GROUP BY data
+            """,
+        ],
+    ),
+    (
+        3,
+        "último agendamento por cliente",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS ultimo_agendamento (
+                usuario_id INT PRIMARY KEY,
+                data DATE NULL,
+                horario TIME NULL
+            )
+            """,
+            # o horário mais tarde do dia mais recente de cada cliente
+            """
+            INSERT INTO ultimo_agendamento (usuario_id, data, horario)
+            SELECT a.usuario_id, a.data, MAX(a.horario)
+            FROM agendamentos a
+            JOIN (
+                SELECT usuario_id, MAX(data) AS data
+                FROM agendamentos
+                GROUP BY usuario_id
+            ) recente ON recente.usuario_id = a.usuario_id AND recente.data = a.data
+            GROUP BY a.usuario_id, a.data
+            """,
+        ],
+    ),
+]
+
+
+def versao_atual(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_versao (
+            versao INT PRIMARY KEY,
+            descricao VARCHAR(255) NOT NULL,
+            aplicada_em DATETIME NOT NULL
+        )
+    """)
+    cursor.execute("SELECT MAX(versao) FROM schema_versao")
+    versao = cursor.fetchone()[0]
+    return versao or 0
+
+
+def migrar(db=None, mover_duplicados=False):
+    proprio = db is None
+    if proprio:
+        db = banco.checkout("salao")
+
+    cursor = db.cursor()
+    aplicadas = []
+
+    try:
+        atual = versao_atual(cursor)
+
+        for versao, descricao, comandos in MIGRACOES:
+            if versao <= atual:
+                continue
+
+            for comando in comandos:
+                if callable(comando):
+                    comando(cursor, mover_duplicados=mover_duplicados)
+                else:
+                    cursor.execute(comando)
+
+            cursor.execute(
+                "INSERT INTO schema_versao (versao, descricao, aplicada_em) VALUES (%s,%s,%s)",
+                (versao, descricao, datetime.now())
+            )
+            db.commit()
+            aplicadas.append((versao, descricao))
+    finally:
+        cursor.close()
+        if proprio:
+            banco.devolver(db)
+
+    return aplicadas
+
+
+def init_app(app):
+    @app.cli.command("migrar")
+    @click.option("--mover-duplicados", is_flag=True,
+                  help="Leva agendamentos no mesmo horário para agendamentos_duplicados")
+    def _migrar(mover_duplicados):
+        try:
+            aplicadas = migrar(mover_duplicados=mover_duplicados)
+        except MigracaoBloqueada as e:
+            raise click.ClickException(str(e))
+        if not aplicadas:
+            print("Banco já está atualizado")
+        for versao, descricao in aplicadas:
+            print(f"Migração {versao} aplicada: {descricao}")
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+from datetime import timedelta
+
+from banco import get_db_salao
+from cache import criar_cache
+import relogio
+
+# ================== OCUPAÇÃO POR DIA ==================
+# Janela de datas que o cliente pode agendar (hoje + N dias)
+def janela_dias():
+    return int(os.getenv("AGENDAMENTO_JANELA_DIAS", 60))
+
+
+def janela(hoje=None):
+    hoje = hoje or relogio.hoje()
+    return hoje, hoje + timedelta(days=janela_dias())
+
+
+def data_na_janela(dia, hoje=None):
+    inicio, fim = janela(hoje)
+    return inicio <= dia <= fim
+
+
+def formatar_horario(h):
+    if isinstance(h, timedelta):
+        total_minutes = h.seconds // 60
+        return f"{total_minutes // 60:02d}:{total_minutes % 60:02d}"
+
+    if hasattr(h, "strftime"):
+        return h.strftime("%H:%M")
+
+    return str(h)[:5]
+
+
+def ocupados_por_dia(cursor, inicio, fim):
+    cursor.execute("""
+        SELECT data, horario FROM agendamentos
+        WHERE data BETWEEN %s AND %s
+    """, (inicio, fim))
+
+    ocupados = {}
+    for data, horario in cursor.fetchall():
+        if not horario:
+            continue
+        data_str = data.strftime("%Y-%m-%d") if hasattr(data, "strftime") else str(data)
+        ocupados.setdefault(data_str, []).append(formatar_horario(horario))
+
+    for horarios in ocupados.values():
+        horarios.sort()
+
+    return ocupados
+
+
+def ocupados_no_dia(cursor, dia):
+    return ocupados_por_dia(cursor, dia, dia).get(dia.strftime("%Y-%m-%d"), [])
+
+
+# ================== CACHE DE HORÁRIOS ==================
+# Guarda (etag, horários) por data. A reserva e o cancelamento invalidam a
+# data na hora; o TTL cobre as alterações feitas por outros workers quando o
+# backend é o local.
+_cache = None
+
+
+def cache_horarios():
+    global _cache
+
+    if _cache is None:
+        _cache = criar_cache(
+            "horarios",
+            tamanho=int(os.getenv("CACHE_HORARIOS_TAMANHO", 256)),
+            ttl=float(os.getenv("CACHE_HORARIOS_TTL", 30))
+        )
+    return _cache
+
+
+def gerar_etag(horarios):
+    return hashlib.md5(json.dumps(horarios).encode()).hexdigest()
+
+
+def horarios_do_dia(dia):
+    chave = dia.strftime("%Y-%m-%d")
+    cache = cache_horarios()
+
+    item = cache.get(chave)
+    if item is not None:
+        return item
+
+    db = get_db_salao()
+    cursor = db.cursor()
+    horarios = ocupados_no_dia(cursor, dia)
+    cursor.close()
+    db.close()
+
+    item = [gerar_etag(horarios), horarios]
+    cache.set(chave, item)
+    return item
+
+
+def horarios_do_periodo(inicio, fim):
+    # dias que estão no cache saem de lá; os que faltam vêm numa consulta só
+    cache = cache_horarios()
+    resultado = {}
+    faltando = []
+
+    dia = inicio
+    while dia <= fim:
+        chave = dia.strftime("%Y-%m-%d")
+        item = cache.get(chave)
+        if item is None:
+            faltando.append(dia)
+        else:
+            resultado[chave] = item[1]
+        dia += timedelta(days=1)
+
+    if faltando:
+        db = get_db_salao()
+        cursor = db.cursor()
+        ocupados = ocupados_por_dia(cursor, faltando[0], faltando[-1])
+        cursor.close()
+        db.close()
+
+        for dia in faltando:
+            chave = dia.strftime("%Y-%m-%d")
+            horarios = ocupados.get(chave, [])
+            cache.set(chave, [gerar_etag(horarios), horarios])
+            resultado[chave] = horarios
+
+    return resultado
+
+
+def invalidar(data):
+    if hasattr(data, "strftime"):
+        data = data.strftime("%Y-%m-%d")
+    cache_horarios().delete(str(data))
@@ -0,0 +1,96 @@
+import hashlib
+import os
+import time
+from functools import wraps
+
+from flask import current_app, make_response, render_template, request, session
+from markupsafe import Markup
+
+from cache import criar_cache
+
+# ================== CACHE DE PÁGINAS ==================
+# As páginas institucionais só mudam com o estado do login (o menu mostra
+# Logout e o link do painel). O HTML pronto fica em cache por rota e estado,
+# com ETag/Last-Modified para o navegador revalidar com um 304; o menu é um
+# fragmento separado, também em cache por estado.
+_paginas = None
+_fragmentos = None
+
+
+def cache_paginas():
+    global _paginas
+
+    if _paginas is None:
+        _paginas = criar_cache(
+            "paginas",
+            tamanho=int(os.getenv("CACHE_PAGINAS_TAMANHO", 64)),
+            ttl=float(os.getenv("CACHE_PAGINAS_TTL", 300))
+        )
+    return _paginas
+
+
+def cache_fragmentos():
+    global _fragmentos
+
+    if _fragmentos is None:
+        _fragmentos = criar_cache(
+            "fragmentos",
+            tamanho=int(os.getenv("CACHE_PAGINAS_TAMANHO", 64)),
+            ttl=float(os.getenv("CACHE_PAGINAS_TTL", 300))
+        )
+    return _fragmentos
+
+
+def estado_login():
+    if session.get("is_admin") == 1:
+        return "admin"
+    if session.get("usuario_id"):
+        return "cliente"
+    return "anonimo"
+
+
+def fragmento(nome):
+    chave = f"{nome}:{estado_login()}"
+    html = None if current_app.debug else cache_fragmentos().get(chave)
+
+    if html is None:
+        html = render_template(f"fragmentos/{nome}.html")
+        cache_fragmentos().set(chave, html)
+    return Markup(html)
+
+
+def _renderizar(view, args, kwargs):
+    corpo = view(*args, **kwargs)
+    return {
+        "corpo": corpo,
+        "etag": hashlib.md5(corpo.encode()).hexdigest(),
+        "modificado": int(time.time()),
+    }
+
+
+def cacheada(view):
+    @wraps(view)
+    def _view(*args, **kwargs):
+        # com mensagens flash pendentes a página precisa renderizar para
+        # consumi-las; sem cache no modo debug para ver os templates mudando
+        if current_app.debug or "_flashes" in session:
+            return view(*args, **kwargs)
+
+        chave = f"{request.endpoint}:{estado_login()}"
+        pagina = cache_paginas().get(chave)
+        if pagina is None:
+            pagina = _renderizar(view, args, kwargs)
+            cache_paginas().set(chave, pagina)
+
+        response = make_response(pagina["corpo"])
+        response.set_etag(pagina["etag"])
+        response.last_modified = pagina["modificado"]
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    return _view
+
+
+def init_app(app):
+    app.jinja_env.globals["fragmento"] = fragmento
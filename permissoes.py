@@ -0,0 +1,94 @@
+import os
+
+import click
+
+from banco import get_db_login
+from cache import compartilhado, criar_cache
+
+# ================== PAPÉIS DOS USUÁRIOS ==================
+# is_admin fica em cache por alguns segundos por usuário; o login já preenche
+# o cache e quem altera o papel chama invalidar(). O "flask definir-admin"
+# roda em outro processo, então o invalidar() dele só alcança os workers com
+# CACHE_BACKEND=redis. Com o cache local o "é admin" vale só por
+# CACHE_PAPEIS_ADMIN_TTL: um admin removido perde o acesso em até esse tempo,
+# e um admin novo espera no máximo CACHE_PAPEIS_TTL.
+_cache = None
+
+
+def ttl_admin():
+    return float(os.getenv("CACHE_PAPEIS_ADMIN_TTL", 15))
+
+
+def cache_papeis():
+    global _cache
+
+    if _cache is None:
+        _cache = criar_cache(
+            "papeis",
+            tamanho=int(os.getenv("CACHE_PAPEIS_TAMANHO", 1024)),
+            ttl=float(os.getenv("CACHE_PAPEIS_TTL", 60))
+        )
+    return _cache
+
+
+def lembrar(usuario_id, is_admin):
+    if is_admin == 1 and not compartilhado():
+        cache_papeis().set(str(usuario_id), 1, ttl=ttl_admin())
+        return
+    cache_papeis().set(str(usuario_id), 1 if is_admin == 1 else 0)
+
+
+def invalidar(usuario_id):
+    cache_papeis().delete(str(usuario_id))
+
+
+def e_admin(usuario_id):
+    papel = cache_papeis().get(str(usuario_id))
+    if papel is not None:
+        return papel == 1
+
+    db = get_db_login()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute(
+        "SELECT is_admin FROM usuario WHERE codigo=%s",
+        (usuario_id,)
+    )
+    user = cursor.fetchone()
+    cursor.close()
+    db.close()
+
+    if not user:
+        return False
+
+    lembrar(usuario_id, user["is_admin"])
+    return user["is_admin"] == 1
+
+
+def definir_admin(email, is_admin):
+    db = get_db_login()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("SELECT codigo FROM usuario WHERE email=%s", (email,))
+    user = cursor.fetchone()
+
+    if user:
+        cursor.execute(
+            "UPDATE usuario SET is_admin=%s WHERE codigo=%s",
+            (1 if is_admin else 0, user["codigo"])
+        )
+        db.commit()
+        invalidar(user["codigo"])
+
+    cursor.close()
+    db.close()
+    return user is not None
+
+
+def init_app(app):
+    @app.cli.command("definir-admin")
+    @click.argument("email")
+    @click.option("--remover", is_flag=True, help="Tira o acesso de admin")
+    def _definir_admin(email, remover):
+        if definir_admin(email, not remover):
+            print(f"{email}: admin {'removido' if remover else 'concedido'}")
+        else:
+            print(f"{email}: usuário não encontrado")
@@ -0,0 +1,94 @@
+import os
+from datetime import datetime, time, timedelta
+
+import ocupacao
+from relogio import agora
+
+# ================== POLÍTICAS DE AGENDAMENTO ==================
+# As regras do salão ficam aqui e vêm do .env:
+#   AGENDAMENTO_INTERVALO_DIAS      -> dias entre dois agendamentos do cliente (15)
+#   CANCELAMENTO_ANTECEDENCIA_HORAS -> antecedência mínima para cancelar (24)
+#   AGENDAMENTO_DIAS                -> dias de funcionamento ("ter,qua,qui,sex,sab")
+#   AGENDAMENTO_HORARIOS            -> horários de atendimento ("07:10,08:10,...")
+#   SALAO_FUSO_HORAS                -> fuso do salão em relação ao UTC (-3, ver relogio.py)
+# Cada regra recebe o horário pedido e o "agora" do salão e devolve a
+# mensagem de erro, ou None se o pedido passa.
+DIAS_SEMANA = ["seg", "ter", "qua", "qui", "sex", "sab", "dom"]
+HORARIOS = (
+    "07:10,08:10,09:00,09:50,10:40,11:30,14:00,"
+    "14:50,15:40,16:30,17:20,18:10,19:00,19:50"
+)
+
+
+def intervalo_dias():
+    return int(os.getenv("AGENDAMENTO_INTERVALO_DIAS", 15))
+
+def antecedencia_cancelamento():
+    return float(os.getenv("CANCELAMENTO_ANTECEDENCIA_HORAS", 24))
+
+def dias_funcionamento():
+    dias = os.getenv("AGENDAMENTO_DIAS", "ter,qua,qui,sex,sab")
+    return {DIAS_SEMANA.index(dia.strip()) for dia in dias.split(",") if dia.strip()}
+
+def horarios():
+    return sorted(h.strip() for h in os.getenv("AGENDAMENTO_HORARIOS", HORARIOS).split(",") if h.strip())
+
+def data_hora(data, horario):
+    # DATE/TIME como o mysql.connector devolve (TIME vem como timedelta)
+    if data is None or horario is None:
+        return None
+    if isinstance(horario, timedelta):
+        return datetime.combine(data, time.min) + horario
+    return datetime.combine(data, horario)
+
+
+def proximo_permitido(ultimo):
+    return ultimo + timedelta(days=intervalo_dias())
+
+
+# ================== REGRAS ==================
+def _nao_passou(pedido, agora):
+    if pedido <= agora:
+        return "Não é possível agendar em horários que já passaram."
+
+
+def _dentro_da_janela(pedido, agora):
+    if not ocupacao.data_na_janela(pedido.date(), agora.date()):
+        return f"Só é possível agendar com até {ocupacao.janela_dias()} dias de antecedência."
+
+
+def _dia_de_funcionamento(pedido, agora):
+    if pedido.weekday() not in dias_funcionamento():
+        return "O salão não abre nesse dia."
+
+
+def _horario_de_atendimento(pedido, agora):
+    if pedido.strftime("%H:%M") not in horarios():
+        return "Horário fora do atendimento."
+
+
+def _antecedencia(agendado, agora):
+    if agendado - agora < timedelta(hours=antecedencia_cancelamento()):
+        return f"Cancelamento permitido apenas com {antecedencia_cancelamento():g} horas de antecedência."
+
+
+REGRAS_RESERVA = [_nao_passou, _dentro_da_janela, _dia_de_funcionamento, _horario_de_atendimento]
+REGRAS_CANCELAMENTO = [_antecedencia]
+
+
+def _verificar(regras, pedido, momento):
+    momento = momento or agora()
+    for regra in regras:
+        erro = regra(pedido, momento)
+        if erro:
+            return erro
+    return None
+
+
+def verificar_reserva(pedido, momento=None):
+    # a carência entre agendamentos precisa do banco e fica em reservas.reservar()
+    return _verificar(REGRAS_RESERVA, pedido, momento)
+
+
+def verificar_cancelamento(agendado, momento=None):
+    return _verificar(REGRAS_CANCELAMENTO, agendado, momento)
@@ -0,0 +1,17 @@
+import os
+from datetime import datetime, timedelta
+
+# ================== RELÓGIO DO SALÃO ==================
+# O "agora" e o "hoje" do salão, no fuso de SALAO_FUSO_HORAS (-3, em relação
+# ao UTC). Janela de agendamento, regras, limpeza, resumo e exportação leem
+# daqui, para todos concordarem sobre que dia é hoje.
+def fuso_horas():
+    return float(os.getenv("SALAO_FUSO_HORAS", -3))
+
+
+def agora():
+    return datetime.utcnow() + timedelta(hours=fuso_horas())
+
+
+def hoje():
+    return agora().date()
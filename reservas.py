@@ -0,0 +1,130 @@
+import banco
+import politicas
+
+# ================== RESERVA DE HORÁRIO ==================
+# ultimo_agendamento guarda, por cliente, a data/hora do agendamento mais
+# recente. A reserva trava essa linha (FOR UPDATE), então dois pedidos do
+# mesmo cliente viram fila, e a carência é uma comparação com esse valor;
+# só quando o cliente já tem um agendamento depois do horário pedido é que
+# a consulta pelo índice (usuario_id, data, horario) entra. O índice UNIQUE
+# (data, horario) recusa o horário já pego.
+RESERVADO = "reservado"
+OCUPADO = "ocupado"
+REGRA = "regra"
+
+TENTATIVAS = 3
+ERROS_DEADLOCK = (1205, 1213)
+ERRO_DUPLICADO = 1062
+
+
+def _travar_ultimo(cursor, usuario_id):
+    # cria a linha do cliente na primeira vez, para sempre haver o que travar
+    cursor.execute("""
+        INSERT INTO ultimo_agendamento (usuario_id) VALUES (%s)
+        ON DUPLICATE KEY UPDATE usuario_id = usuario_id
+    """, (usuario_id,))
+    cursor.execute(
+        "SELECT data, horario FROM ultimo_agendamento WHERE usuario_id = %s FOR UPDATE",
+        (usuario_id,)
+    )
+    return politicas.data_hora(*cursor.fetchone())
+
+
+def _anterior_ate(cursor, usuario_id, data):
+    cursor.execute("""
+        SELECT data, horario
+        FROM agendamentos
+        WHERE usuario_id = %s
+        AND data <= %s
+        ORDER BY data DESC, horario DESC
+        LIMIT 1
+    """, (usuario_id, data))
+    linha = cursor.fetchone()
+    return politicas.data_hora(*linha) if linha else None
+
+
+def _em_carencia(cursor, usuario_id, ultimo, data_hora):
+    # devolve a partir de quando o cliente pode agendar, ou None se já pode
+    if ultimo is None:
+        return None
+
+    if ultimo > data_hora:
+        ultimo = _anterior_ate(cursor, usuario_id, data_hora.date())
+        if ultimo is None:
+            return None
+
+    proximo = politicas.proximo_permitido(ultimo)
+    return proximo if data_hora < proximo else None
+
+
+def _atualizar_ultimo(cursor, usuario_id):
+    cursor.execute("""
+        SELECT data, horario FROM agendamentos
+        WHERE usuario_id = %s
+        ORDER BY data DESC, horario DESC
+        LIMIT 1
+    """, (usuario_id,))
+    data, horario = cursor.fetchone() or (None, None)
+    cursor.execute(
+        "UPDATE ultimo_agendamento SET data = %s, horario = %s WHERE usuario_id = %s",
+        (data, horario, usuario_id)
+    )
+
+
+def reservar(db, usuario_id, email, data_hora, servicos, total, telefone):
+    data = data_hora.date()
+    horario = data_hora.time()
+
+    cursor = db.cursor()
+
+    try:
+        for tentativa in range(TENTATIVAS):
+            try:
+                ultimo = _travar_ultimo(cursor, usuario_id)
+
+                proximo = _em_carencia(cursor, usuario_id, ultimo, data_hora)
+                if proximo:
+                    db.rollback()
+                    return REGRA, proximo
+
+                cursor.execute(
+                    "INSERT INTO agendamentos (usuario_id, data, horario, servicos, total, telefone, email) "
+                    "VALUES (%s,%s,%s,%s,%s,%s,%s)",
+                    (usuario_id, data, horario, ", ".join(servicos), total, telefone, email)
+                )
+                agendamento_id = cursor.lastrowid
+
+                if ultimo is None or data_hora > ultimo:
+                    cursor.execute(
+                        "UPDATE ultimo_agendamento SET data = %s, horario = %s WHERE usuario_id = %s",
+                        (data, horario, usuario_id)
+                    )
+
+                db.commit()
+                return RESERVADO, agendamento_id
+            except banco.driver().errors.IntegrityError as e:
+                db.rollback()
+                if getattr(e, "errno", ERRO_DUPLICADO) != ERRO_DUPLICADO:
+                    raise
+                return OCUPADO, None
+            except banco.driver().errors.DatabaseError as e:
+                db.rollback()
+                if e.errno not in ERROS_DEADLOCK or tentativa == TENTATIVAS - 1:
+                    raise
+    finally:
+        cursor.close()
+
+
+def cancelar(db, agendamento_id, usuario_id):
+    cursor = db.cursor()
+
+    try:
+        _travar_ultimo(cursor, usuario_id)
+        cursor.execute("DELETE FROM agendamentos WHERE id = %s", (agendamento_id,))
+        _atualizar_ultimo(cursor, usuario_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
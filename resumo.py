@@ -0,0 +1,276 @@
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+import click
+
+import banco
+import manutencao
+import relogio
+
+# ================== RESUMO DIÁRIO DE FATURAMENTO ==================
+# resumo_diario guarda, por data, a soma dos atendimentos finalizados.
+# Cada pagamento aplica só a diferença em relação ao que já estava gravado,
+# na mesma transação do UPDATE em agendamentos.
+CAMPOS = ("pix", "dinheiro", "total", "atendimentos")
+
+
+def _valor(v):
+    return Decimal(str(v)) if v not in (None, "") else Decimal(0)
+
+
+def contribuicao(ag):
+    if not ag or ag["finalizado"] != 1:
+        return (Decimal(0), Decimal(0), Decimal(0), 0)
+
+    return (_valor(ag["valor_pix"]), _valor(ag["valor_dinheiro"]), _valor(ag["valor_final"]), 1)
+
+
+def aplicar_diferenca(cursor, data, antes, depois):
+    diferenca = [d - a for a, d in zip(antes, depois)]
+    if not any(diferenca):
+        return
+
+    cursor.execute("""
+        INSERT INTO resumo_diario (data, pix, dinheiro, total, atendimentos)
+        VALUES (%s,%s,%s,%s,%s)
+        ON DUPLICATE KEY UPDATE
+            pix = pix + VALUES(pix),
+            dinheiro = dinheiro + VALUES(dinheiro),
+            total = total + VALUES(total),
+            atendimentos = atendimentos + VALUES(atendimentos)
+    """, (data, *diferenca))
+
+
+def registrar_pagamento(cursor, id_ag, **campos):
+    # campos: valor_pix, valor_dinheiro, valor_final, forma_pagamento
+    cursor.execute("""
+        SELECT data, valor_pix, valor_dinheiro, valor_final, finalizado
+        FROM agendamentos
+        WHERE id=%s
+        FOR UPDATE
+    """, (id_ag,))
+    ag = cursor.fetchone()
+
+    if not ag:
+        return False
+
+    atribuicoes = ", ".join(f"{campo}=%s" for campo in campos)
+    cursor.execute(
+        f"UPDATE agendamentos SET {atribuicoes}, finalizado=1 WHERE id=%s",
+        (*campos.values(), id_ag)
+    )
+
+    novo = dict(ag, finalizado=1)
+    novo.update((campo, valor) for campo, valor in campos.items() if campo in novo)
+
+    aplicar_diferenca(cursor, ag["data"], contribuicao(ag), contribuicao(novo))
+    return True
+
+
+# ================== FECHAMENTO DO DIA ==================
+# O admin manda os pagamentos de todos os clientes do dia de uma vez: tudo é
+# validado antes, os UPDATEs vão num executemany só e o resumo recebe uma
+# única diferença, tudo na mesma transação.
+MAX_PAGAMENTOS = 200
+# maior valor que cabe nas colunas DECIMAL(10,2)
+VALOR_MAXIMO = Decimal("99999999.99")
+
+
+def ler_valor(texto):
+    # "" vale 0; ValueError se não for um valor que caiba nas colunas
+    try:
+        valor = _valor(texto)
+    except InvalidOperation:
+        raise ValueError(f"valor inválido: {texto!r}")
+
+    if not valor.is_finite() or not 0 <= valor <= VALOR_MAXIMO:
+        raise ValueError(f"valor inválido: {texto!r}")
+    return valor.quantize(Decimal("0.01"))
+
+
+def ler_pagamentos(itens):
+    # [{"id", "valor_pix", "valor_dinheiro"}] -> ({id: (pix, dinheiro)}, posições inválidas)
+    pagamentos = {}
+    invalidos = []
+
+    if not isinstance(itens, list) or len(itens) > MAX_PAGAMENTOS:
+        return {}, ["pagamentos"]
+
+    for posicao, item in enumerate(itens):
+        try:
+            id_ag = int(item["id"])
+            pix, dinheiro = (ler_valor(item.get(campo)) for campo in ("valor_pix", "valor_dinheiro"))
+        except (KeyError, TypeError, AttributeError, ValueError):
+            invalidos.append(posicao)
+            continue
+
+        if id_ag in pagamentos:
+            invalidos.append(posicao)
+            continue
+
+        pagamentos[id_ag] = (pix, dinheiro)
+
+    return pagamentos, invalidos
+
+
+def _somar(a, b):
+    return tuple(x + y for x, y in zip(a, b))
+
+
+def registrar_pagamentos(cursor, data, pagamentos):
+    # devolve os ids que não são agendamentos de `data`; nesse caso nada é gravado
+    ids = list(pagamentos)
+    marcadores = ", ".join(["%s"] * len(ids))
+    cursor.execute(f"""
+        SELECT id, valor_pix, valor_dinheiro, valor_final, finalizado
+        FROM agendamentos
+        WHERE data = %s AND id IN ({marcadores})
+        FOR UPDATE
+    """, (data, *ids))
+    atuais = {ag["id"]: ag for ag in cursor.fetchall()}
+
+    faltando = [id_ag for id_ag in ids if id_ag not in atuais]
+    if faltando:
+        return faltando
+
+    antes = depois = (Decimal(0), Decimal(0), Decimal(0), 0)
+    linhas = []
+    for id_ag, (pix, dinheiro) in pagamentos.items():
+        ag = atuais[id_ag]
+        novo = dict(ag, valor_pix=pix, valor_dinheiro=dinheiro, valor_final=pix + dinheiro, finalizado=1)
+
+        antes = _somar(antes, contribuicao(ag))
+        depois = _somar(depois, contribuicao(novo))
+        linhas.append((pix, dinheiro, pix + dinheiro, id_ag))
+
+    cursor.executemany(
+        "UPDATE agendamentos SET valor_pix=%s, valor_dinheiro=%s, valor_final=%s, finalizado=1 WHERE id=%s",
+        linhas
+    )
+    aplicar_diferenca(cursor, data, antes, depois)
+    return []
+
+
+def resumo_periodo(cursor, inicio, fim):
+    cursor.execute("""
+        SELECT
+            SUM(pix) AS pix,
+            SUM(dinheiro) AS dinheiro,
+            SUM(total) AS total,
+            SUM(atendimentos) AS atendimentos
+        FROM resumo_diario
+        WHERE data BETWEEN %s AND %s
+    """, (inicio, fim))
+    return cursor.fetchone() or {}
+
+
+def resumo_dia(cursor, data):
+    cursor.execute(
+        "SELECT pix, dinheiro, total, atendimentos FROM resumo_diario WHERE data=%s",
+        (data,)
+    )
+    return cursor.fetchone() or {}
+
+
+def _chave_grupo(data, agrupar):
+    if agrupar == "semana":
+        return (data - timedelta(days=data.weekday())).strftime("%Y-%m-%d")
+    if agrupar == "mes":
+        return data.strftime("%Y-%m")
+    return data.strftime("%Y-%m-%d")
+
+
+def relatorio(cursor, inicio, fim, agrupar="dia"):
+    cursor.execute("""
+        SELECT data, pix, dinheiro, total, atendimentos
+        FROM resumo_diario
+        WHERE data BETWEEN %s AND %s
+        ORDER BY data
+    """, (inicio, fim))
+
+    grupos = {}
+    for linha in cursor.fetchall():
+        data = linha["data"]
+        if not hasattr(data, "strftime"):
+            data = datetime.strptime(str(data), "%Y-%m-%d").date()
+
+        grupo = grupos.setdefault(_chave_grupo(data, agrupar), dict.fromkeys(CAMPOS, 0))
+        for campo in CAMPOS:
+            grupo[campo] += linha[campo] or 0
+
+    return [
+        {
+            "periodo": periodo,
+            "pix": float(valores["pix"]),
+            "dinheiro": float(valores["dinheiro"]),
+            "total": float(valores["total"]),
+            "atendimentos": int(valores["atendimentos"]),
+        }
+        for periodo, valores in grupos.items()
+    ]
+
+
+def reconstruir(db, inicio=None, fim=None):
+    # Recalcula a partir dos agendamentos. A limpeza apaga os dias anteriores
+    # a hoje, então um dia passado pode estar só em parte na tabela. Com
+    # MANUTENCAO_ARQUIVAR=1 os apagados entram na conta pelo
+    # agendamentos_arquivo (o que foi limpo antes de ligar o arquivo continua
+    # faltando); sem o arquivo só hoje e os dias seguintes são refeitos e o
+    # resumo dos outros é mantido como está.
+    filtro = ""
+    parametros = []
+    if inicio:
+        filtro += " AND data >= %s"
+        parametros.append(inicio)
+    if fim:
+        filtro += " AND data <= %s"
+        parametros.append(fim)
+
+    cursor = db.cursor()
+    tabelas = ["agendamentos"]
+    if manutencao.arquivar():
+        cursor.execute("CREATE TABLE IF NOT EXISTS agendamentos_arquivo LIKE agendamentos")
+        tabelas.append("agendamentos_arquivo")
+    else:
+        filtro += " AND data >= %s"
+        parametros.append(relogio.hoje())
+
+    origem = " UNION ALL ".join(
+        f"SELECT data, valor_pix, valor_dinheiro, valor_final FROM {tabela} WHERE finalizado = 1{filtro}"
+        for tabela in tabelas
+    )
+    cursor.execute(f"""
+        INSERT INTO resumo_diario (data, pix, dinheiro, total, atendimentos)
+        SELECT
+            data,
+            COALESCE(SUM(valor_pix), 0),
+            COALESCE(SUM(valor_dinheiro), 0),
+            COALESCE(SUM(valor_final), 0),
+            COUNT(*)
+        FROM ({origem}) finalizados
+        GROUP BY data
+        ON DUPLICATE KEY UPDATE
+            pix = VALUES(pix),
+            dinheiro = VALUES(dinheiro),
+            total = VALUES(total),
+            atendimentos = VALUES(atendimentos)
+    """, parametros * len(tabelas))
+    linhas = cursor.rowcount
+    db.commit()
+    cursor.close()
+    return linhas
+
+
+def init_app(app):
+    @app.cli.command("reconstruir-resumo")
+    @click.option("--inicio", help="Primeira data (AAAA-MM-DD)")
+    @click.option("--fim", help="Última data (AAAA-MM-DD)")
+    def _reconstruir_resumo(inicio, fim):
+        db = banco.checkout("salao")
+        try:
+            reconstruir(db, inicio, fim)
+        finally:
+            banco.devolver(db)
+        print("Resumo diário reconstruído")
+        if not manutencao.arquivar():
+            print("Dias antes de hoje mantidos: sem MANUTENCAO_ARQUIVAR=1 a limpeza já apagou parte deles")
@@ -0,0 +1,183 @@
+import multiprocessing
+import os
+from concurrent import futures
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import BoundedSemaphore, Lock
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from implantacao import num_workers
+from metricas import medir_senha
+
+# ================== HASH DE SENHAS ==================
+# O hash roda num pool de processos por worker, com limite de tarefas
+# pendentes: uma rajada de logins espera na fila (ou recebe Sobrecarga) em
+# vez de ocupar todos os workers com CPU. Os CPUs são divididos entre os
+# workers do gunicorn (WEB_CONCURRENCY). O algoritmo e o custo vêm de
+# SENHA_METODO, no formato do werkzeug ("scrypt:32768:8:1",
+# "pbkdf2:sha256:600000"...); hashes antigos são refeitos no próximo login.
+_pool = None
+_pool_pid = None
+_vagas = None
+_lock = Lock()
+_prefixo = {}
+
+metricas = {
+    "hashes": 0,
+    "verificacoes": 0,
+    "atualizados": 0,
+    "pendentes": 0,
+    "sobrecargas": 0,
+    "pools_refeitos": 0,
+}
+
+
+class Sobrecarga(Exception):
+    pass
+
+
+def metodo():
+    return os.getenv("SENHA_METODO", "scrypt")
+
+def num_processos():
+    valor = os.getenv("SENHA_PROCESSOS")
+    if valor is not None:
+        return int(valor)
+    # cada worker do gunicorn tem o seu pool: divide os CPUs entre eles
+    return max(1, (os.cpu_count() or 1) // num_workers())
+
+def max_pendentes():
+    return int(os.getenv("SENHA_MAX_PENDENTES", num_processos() * 4))
+
+def timeout():
+    return float(os.getenv("SENHA_TIMEOUT", 10))
+
+
+def _gerar(senha, metodo):
+    return generate_password_hash(senha, method=metodo)
+
+
+def _verificar(senha_hash, senha):
+    return check_password_hash(senha_hash, senha)
+
+
+def _get_pool():
+    global _pool, _pool_pid, _vagas
+
+    with _lock:
+        # o pool do processo pai não serve depois de um fork, e um pool
+        # quebrado (processo filho morto) é descartado por _descartar()
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(
+                max_workers=num_processos(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _vagas = BoundedSemaphore(max_pendentes())
+            _pool_pid = os.getpid()
+        return _pool, _vagas
+
+
+def _descartar(pool):
+    global _pool, _pool_pid
+
+    with _lock:
+        if _pool is pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+            _pool_pid = None
+            metricas["pools_refeitos"] += 1
+
+
+def _liberar(vagas):
+    metricas["pendentes"] -= 1
+    vagas.release()
+
+
+def _executar(funcao, *args):
+    if num_processos() <= 0:
+        return funcao(*args)
+
+    # um pool quebrado é refeito uma vez; se quebrar de novo, vira Sobrecarga
+    for _ in range(2):
+        pool, vagas = _get_pool()
+        if not vagas.acquire(timeout=timeout()):
+            metricas["sobrecargas"] += 1
+            raise Sobrecarga()
+
+        try:
+            futuro = pool.submit(funcao, *args)
+        except (BrokenProcessPool, RuntimeError):
+            vagas.release()
+            _descartar(pool)
+            continue
+
+        # a vaga só volta quando a tarefa termina no pool, não quando
+        # a requisição desiste de esperar por ela
+        metricas["pendentes"] += 1
+        futuro.add_done_callback(lambda _: _liberar(vagas))
+
+        try:
+            return futuro.result(timeout=timeout())
+        except futures.TimeoutError:
+            futuro.cancel()
+            metricas["sobrecargas"] += 1
+            raise Sobrecarga()
+        except BrokenProcessPool:
+            _descartar(pool)
+
+    metricas["sobrecargas"] += 1
+    raise Sobrecarga()
+
+
+def gerar(senha):
+    with medir_senha("gerar"):
+        senha_hash = _executar(_gerar, senha, metodo())
+    metricas["hashes"] += 1
+    return senha_hash
+
+
+def verificar(senha_hash, senha):
+    with medir_senha("verificar"):
+        ok = _executar(_verificar, senha_hash, senha)
+    metricas["verificacoes"] += 1
+    return ok
+
+
+def prefixo_atual():
+    # o werkzeug completa os parâmetros que faltam ("scrypt" vira
+    # "scrypt:32768:8:1"); um hash de teste mostra o prefixo final
+    atual = metodo()
+    if atual not in _prefixo:
+        _prefixo[atual] = generate_password_hash("", method=atual).split("$", 1)[0]
+    return _prefixo[atual]
+
+
+def precisa_atualizar(senha_hash):
+    return senha_hash.split("$", 1)[0] != prefixo_atual()
+
+
+def atualizar(db, codigo, senha_hash_antigo, senha):
+    # só troca se ninguém mudou a senha entre o login e aqui
+    cursor = db.cursor()
+    cursor.execute(
+        "UPDATE usuario SET senha=%s WHERE codigo=%s AND senha=%s",
+        (gerar(senha), codigo, senha_hash_antigo)
+    )
+    db.commit()
+    atualizado = cursor.rowcount == 1
+    cursor.close()
+
+    if atualizado:
+        metricas["atualizados"] += 1
+    return atualizado
+
+
+def parar():
+    global _pool, _pool_pid
+
+    with _lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+        _pool_pid = None
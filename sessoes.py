@@ -0,0 +1,215 @@
+import json
+import os
+import secrets
+import time
+from threading import Lock
+
+from flask.sessions import SessionInterface, SessionMixin
+
+from cache import compartilhado, criar_cache
+from implantacao import num_workers
+
+# ================== SESSÕES NO SERVIDOR ==================
+# O cookie leva só um id aleatório (sem assinatura para calcular); os dados
+# ficam num cache de criar_cache(). Isso só vale com um store que todos os
+# workers enxergam (CACHE_BACKEND=redis): com o LRU local cada worker teria
+# as suas sessões, e o login feito num worker não existiria no outro.
+# Sem redis o app fica com o cookie assinado do Flask, a não ser que
+# SESSAO_SERVIDOR=1 (um worker só). A sessão só é buscada quando a rota toca
+# em `session`, e as expiradas são varridas de tempos em tempos.
+_cache = None
+_lock = Lock()
+_ultima_limpeza = 0.0
+
+# nomes curtos no armazenamento para as chaves que o app usa
+ABREVIACOES = {
+    "usuario_id": "u",
+    "email": "e",
+    "is_admin": "a",
+    "_flashes": "f",
+}
+EXPANSOES = {curta: longa for longa, curta in ABREVIACOES.items()}
+CAMPO_SALVO_EM = "t"
+
+metricas = {
+    "criadas": 0,
+    "removidas": 0,
+    "carregadas": 0,
+    "expiradas_varridas": 0,
+}
+
+
+def no_servidor():
+    valor = os.getenv("SESSAO_SERVIDOR")
+    if valor:
+        return valor == "1"
+    return compartilhado()
+
+def tamanho():
+    return int(os.getenv("SESSAO_TAMANHO", 10000))
+
+def ttl():
+    return float(os.getenv("SESSAO_TTL", 86400))
+
+def intervalo_limpeza():
+    return float(os.getenv("SESSAO_LIMPEZA", 300))
+
+
+def cache_sessoes():
+    global _cache
+
+    if _cache is None:
+        _cache = criar_cache("sessoes", tamanho=tamanho(), ttl=ttl())
+    return _cache
+
+
+def serializar(dados):
+    compacto = {ABREVIACOES.get(chave, chave): valor for chave, valor in dados.items()}
+    compacto[CAMPO_SALVO_EM] = int(time.time())
+    return json.dumps(compacto, separators=(",", ":"), ensure_ascii=False)
+
+
+def desserializar(texto):
+    compacto = json.loads(texto)
+    salvo_em = compacto.pop(CAMPO_SALVO_EM, 0)
+    return {EXPANSOES.get(chave, chave): valor for chave, valor in compacto.items()}, salvo_em
+
+
+def limpar_expirados():
+    global _ultima_limpeza
+
+    with _lock:
+        if time.monotonic() - _ultima_limpeza < intervalo_limpeza():
+            return 0
+        _ultima_limpeza = time.monotonic()
+
+    removidas = cache_sessoes().limpar_expirados()
+    metricas["expiradas_varridas"] += removidas
+    return removidas
+
+
+class SessaoServidor(SessionMixin):
+    # Só vai ao cache no primeiro acesso aos dados
+
+    def __init__(self, sid=None):
+        self.sid = sid
+        self.sid_antigo = None
+        self.modified = False
+        self.accessed = False
+        self.renovar = False
+        self._dados = None
+
+    @property
+    def carregada(self):
+        return self._dados is not None
+
+    @property
+    def dados(self):
+        if self._dados is None:
+            self.accessed = True
+            self._dados = {}
+
+            texto = cache_sessoes().get(self.sid) if self.sid else None
+            if texto is None:
+                # id expirado ou inventado: uma sessão nova ganha outro id
+                self.sid = None
+            else:
+                self._dados, salvo_em = desserializar(texto)
+                metricas["carregadas"] += 1
+                # regrava quando passou metade do TTL, para a sessão em uso não expirar
+                self.renovar = time.time() - salvo_em > ttl() / 2
+        return self._dados
+
+    def regenerar(self):
+        # novo id depois do login, para um id conhecido antes não valer mais
+        self.dados
+        if self.sid:
+            self.sid_antigo = self.sid
+        self.sid = None
+        self.modified = True
+
+    def __getitem__(self, chave):
+        return self.dados[chave]
+
+    def __setitem__(self, chave, valor):
+        self.dados[chave] = valor
+        self.modified = True
+
+    def __delitem__(self, chave):
+        del self.dados[chave]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self.dados)
+
+    def __len__(self):
+        return len(self.dados)
+
+
+class InterfaceSessao(SessionInterface):
+
+    def open_session(self, app, request):
+        limpar_expirados()
+        return SessaoServidor(request.cookies.get(self.get_cookie_name(app)))
+
+    def save_session(self, app, session, response):
+        if not session.carregada:
+            return
+
+        cache = cache_sessoes()
+        nome = self.get_cookie_name(app)
+        dominio = self.get_cookie_domain(app)
+        caminho = self.get_cookie_path(app)
+
+        if session.sid_antigo:
+            cache.delete(session.sid_antigo)
+            session.sid_antigo = None
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if not session:
+            if session.sid and session.modified:
+                cache.delete(session.sid)
+                metricas["removidas"] += 1
+                response.delete_cookie(nome, domain=dominio, path=caminho)
+            return
+
+        if not (session.modified or session.renovar):
+            return
+
+        novo = session.sid is None
+        if novo:
+            session.sid = secrets.token_urlsafe(32)
+            metricas["criadas"] += 1
+
+        cache.set(session.sid, serializar(session.dados))
+
+        if novo:
+            response.set_cookie(
+                nome,
+                session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=dominio,
+                path=caminho,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app)
+            )
+
+
+def regenerar(sessao):
+    # no cookie assinado não há id para trocar: o conteúdo novo já é outro cookie
+    if isinstance(sessao, SessaoServidor):
+        sessao.regenerar()
+
+
+def init_app(app):
+    if not no_servidor():
+        return
+
+    if not compartilhado() and num_workers() > 1:
+        raise RuntimeError(
+            "SESSAO_SERVIDOR=1 com mais de um worker precisa de CACHE_BACKEND=redis"
+        )
+    app.session_interface = InterfaceSessao()
@@ -0,0 +1,76 @@
+// Fechamento do dia: em vez de salvar cliente por cliente (um POST e uma
+// página recarregada para cada um), o botão manda os pagamentos de todos os
+// cards alterados ou com valor numa requisição só e atualiza o resumo.
+document.addEventListener("DOMContentLoaded", function () {
+
+    const botao = document.getElementById("fechar-dia");
+    const msg = document.getElementById("msg-fechar");
+
+    if (!botao) return;
+
+    const cards = Array.from(document.querySelectorAll(".cliente-card"));
+
+    function campo(card, nome) {
+        return card.querySelector(`input[name="${nome}"]`);
+    }
+
+    function alterado(card) {
+        const pix = campo(card, "valor_pix");
+        const dinheiro = campo(card, "valor_dinheiro");
+        return pix.value !== pix.defaultValue
+            || dinheiro.value !== dinheiro.defaultValue
+            || Number(pix.value) > 0
+            || Number(dinheiro.value) > 0;
+    }
+
+    botao.addEventListener("click", async () => {
+        const enviados = cards.filter(alterado);
+        cards.forEach(card => card.classList.remove("invalido"));
+
+        if (enviados.length === 0) {
+            msg.textContent = "Nenhum pagamento para salvar.";
+            return;
+        }
+
+        const pagamentos = enviados.map(card => ({
+            id: campo(card, "id").value,
+            valor_pix: campo(card, "valor_pix").value,
+            valor_dinheiro: campo(card, "valor_dinheiro").value,
+        }));
+
+        botao.disabled = true;
+        msg.textContent = "Salvando...";
+
+        try {
+            const resposta = await fetch("/admin/dia/fechar", {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                credentials: "same-origin",
+                body: JSON.stringify({ data: botao.dataset.data, pagamentos }),
+            });
+            const corpo = await resposta.json();
+
+            if (!resposta.ok) {
+                (corpo.posicoes || []).forEach(i => enviados[i] && enviados[i].classList.add("invalido"));
+                msg.textContent = corpo.erro || "Não foi possível salvar.";
+                return;
+            }
+
+            enviados.forEach(card => {
+                card.classList.add("pago");
+                ["valor_pix", "valor_dinheiro"].forEach(nome => {
+                    campo(card, nome).defaultValue = campo(card, nome).value;
+                });
+            });
+
+            document.getElementById("resumo-pix").textContent = corpo.resumo.pix.toFixed(2);
+            document.getElementById("resumo-dinheiro").textContent = corpo.resumo.dinheiro.toFixed(2);
+            document.getElementById("resumo-total").textContent = corpo.resumo.total.toFixed(2);
+            msg.textContent = `${corpo.atualizados} pagamento(s) salvos.`;
+        } catch (erro) {
+            msg.textContent = "Não foi possível salvar.";
+        } finally {
+            botao.disabled = false;
+        }
+    });
+});
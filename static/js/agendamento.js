@@ -48,57 +48,131 @@ const msgData = document.getElementById("msgData");
 const horariosContainer = document.getElementById("horarios");
 
 
-dataInput.addEventListener("change", async () => {
+// A disponibilidade da janela inteira vem de uma vez: a lista de horários e,
+// por dia, um número em que o bit i ligado quer dizer horarios[i] livre
+// (null = salão fechado). Com os avisos do servidor (SSE) ligados, cada
+// reserva ou cancelamento chega na hora e atualiza o dia na grade, que
+// ainda é pedida de novo a cada 2 minutos caso um aviso se perca; sem eles,
+// a grade é pedida de novo depois de 30s. O servidor responde 304 se nada
+// mudou.
+let grade = null;
+let gradeCarregadaEm = 0;
+let avisosAtivos = false;
+
+async function carregarGrade() {
+  const validade = avisosAtivos ? 120000 : 30000;
+  if (!grade || Date.now() - gradeCarregadaEm > validade) {
+    const response = await fetch(`/api/disponibilidade?inicio=${dataInput.min}`);
+    grade = await response.json();
+    gradeCarregadaEm = Date.now();
+  }
+  return grade;
+}
+
+function indiceDoDia(data, inicio) {
+  return Math.round((Date.parse(data) - Date.parse(inicio)) / 86400000);
+}
+
+// duas colunas: manhã à esquerda, tarde à direita
+function ordemDasColunas(total) {
+  const metade = Math.ceil(total / 2);
+  const ordem = [];
+  for (let i = 0; i < metade; i++) {
+    ordem.push(i);
+    if (i + metade < total) ordem.push(i + metade);
+  }
+  return ordem;
+}
+
+async function mostrarDia() {
 
   const dataSelecionada = dataInput.value;
+  const selecionado = document.getElementById("horarioSelecionado");
 
   horariosContainer.innerHTML = "";
   msgData.textContent = "";
 
-  const dataObj = new Date(dataSelecionada);
-  const diaSemana = dataObj.getDay();
+  if (!dataSelecionada) return;
+
+  const { inicio, horarios, livres } = await carregarGrade();
+  const mascara = livres[indiceDoDia(dataSelecionada, inicio)];
 
-  if (diaSemana === 6 || diaSemana === 0) {
-    msgData.textContent = "Trabalhamos apenas de terça a sábado.";
+  if (mascara === undefined) {
+    msgData.textContent = "Escolha uma data dentro do período de agendamento.";
     return;
   }
 
-  const response = await fetch(`/api/horarios/${dataSelecionada}`);
-  const horariosOcupados = await response.json();
-
-  const horarios = [
-    "07:10","14:50","08:10","15:40","09:00","16:30",
-    "09:50","17:20","10:40","18:10","11:30","19:00",
-    "14:00","19:50",
-  ];
+  if (mascara === null) {
+    msgData.textContent = "O salão não abre nesse dia.";
+    return;
+  }
 
-  horarios.forEach(h => {
+  ordemDasColunas(horarios.length).forEach(i => {
 
+    const h = horarios[i];
     const btn = document.createElement("div");
     btn.classList.add("horario-btn");
     btn.textContent = h;
 
-    const ocupado = horariosOcupados.some(hOcupado => hOcupado.slice(0,5) === h);
+    const ocupado = (mascara & (1 << i)) === 0;
 
     if (ocupado) {
         btn.classList.add("ocupado");
         btn.style.backgroundColor = "grey";
         btn.style.cursor = "not-allowed";
+
+        if (selecionado.value === h) {
+            selecionado.value = "";
+            msgData.textContent = "O horário escolhido acabou de ser reservado. Escolha outro.";
+        }
     } else {
+        if (selecionado.value === h) btn.classList.add("active");
+
         btn.addEventListener("click", () => {
             document.querySelectorAll(".horario-btn")
               .forEach(b => b.classList.remove("active"));
 
             btn.classList.add("active");
-            document.getElementById("horarioSelecionado").value = h;
+            selecionado.value = h;
         });
     }
 
     horariosContainer.appendChild(btn);
   });
 
+}
+
+dataInput.addEventListener("change", () => {
+  document.getElementById("horarioSelecionado").value = "";
+  mostrarDia();
 });
 
+if (window.EventSource) {
+  const avisos = new EventSource("/api/disponibilidade/eventos");
+
+  avisos.addEventListener("open", () => {
+    // (re)conectou: algum aviso pode ter se perdido, a grade é pedida de novo
+    avisosAtivos = true;
+    grade = null;
+  });
+
+  avisos.addEventListener("dia", (e) => {
+    const { data, livres } = JSON.parse(e.data);
+    if (!grade) return;
+
+    const i = indiceDoDia(data, grade.inicio);
+    if (i < 0 || i >= grade.livres.length) return;
+
+    grade.livres[i] = livres;
+    if (dataInput.value === data) mostrarDia();
+  });
+
+  avisos.addEventListener("error", () => {
+    // caiu ou o servidor recusou (204/503): volta para a grade de 30s
+    avisosAtivos = false;
+  });
+}
+
 
 const form = document.querySelector("form");
 
@@ -0,0 +1,69 @@
+// Histórico paginado: o botão "Carregar mais" busca a próxima página em
+// /api/agendamentos e acrescenta os cards na lista, sem recarregar a página.
+// Sem JavaScript, o mesmo botão é um link para /agendamentos?depois=...
+document.addEventListener("DOMContentLoaded", function () {
+
+    const botao = document.getElementById("carregar-mais");
+    const lista = document.querySelector(".lista-agendamentos");
+
+    if (!botao || !lista) return;
+
+    function formatarData(iso) {
+        const [ano, mes, dia] = iso.split("-");
+        return `${dia}/${mes}/${ano}`;
+    }
+
+    function paragrafo(rotulo, valor) {
+        const p = document.createElement("p");
+        const strong = document.createElement("strong");
+        strong.textContent = rotulo;
+        p.append(strong, " " + valor);
+        return p;
+    }
+
+    function adicionar(ag) {
+        const card = document.createElement("div");
+        card.className = "card-agendamento";
+        card.append(
+            paragrafo("📅 Data:", formatarData(ag.data)),
+            paragrafo("⏰ Horário:", ag.horario),
+            paragrafo("✂️ Serviços:", ag.servicos),
+            paragrafo("💰 Total:", "R$ " + ag.total)
+        );
+
+        const cancelar = document.createElement("a");
+        cancelar.href = `/cancelar-agendamento/${ag.id}`;
+        cancelar.className = "btn-cancelar";
+        cancelar.textContent = "Cancelar";
+        cancelar.onclick = () => confirm("Tem certeza que deseja cancelar este agendamento?");
+
+        lista.append(card, cancelar);
+    }
+
+    botao.addEventListener("click", async (e) => {
+        e.preventDefault();
+        if (botao.dataset.carregando) return;
+        botao.dataset.carregando = "1";
+
+        try {
+            const url = `${botao.dataset.api}?depois=${encodeURIComponent(botao.dataset.proximo)}`;
+            const resposta = await fetch(url, { credentials: "same-origin" });
+            if (!resposta.ok) throw new Error(resposta.status);
+
+            const pagina = await resposta.json();
+            pagina.agendamentos.forEach(adicionar);
+
+            if (pagina.proximo) {
+                botao.dataset.proximo = pagina.proximo;
+                botao.href = `?depois=${encodeURIComponent(pagina.proximo)}`;
+            } else {
+                botao.remove();
+            }
+        } catch (erro) {
+            // deixa o link seguir para a página seguinte
+            window.location = botao.href;
+        } finally {
+            delete botao.dataset.carregando;
+        }
+    });
+});
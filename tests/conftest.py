@@ -0,0 +1,39 @@
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# nada de API de email, pool de processos nem thread de limpeza nos testes
+os.environ.setdefault("EMAIL_TRANSPORTE", "fake")
+os.environ.setdefault("SENHA_PROCESSOS", "0")
+os.environ.setdefault("MANUTENCAO_INTERVALO", "0")
+
+# o SQLite que imita o MySQL mora em bench/; vai no fim do sys.path para não
+# esconder nenhum módulo do app
+sys.path.append(os.path.join(RAIZ, "bench"))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def banco_sqlite(tmp_path, monkeypatch):
+    import banco
+    import sqlite_mysql
+
+    caminho = str(tmp_path / "salao.db")
+    sqlite_mysql.criar_banco(caminho)
+    monkeypatch.setattr(banco, "checkout", lambda nome: sqlite_mysql.Conexao(caminho))
+    monkeypatch.setattr(banco, "devolver", lambda conn: conn.close())
+    return caminho
+
+
+def executar(caminho, sql, parametros=()):
+    import sqlite_mysql
+
+    db = sqlite_mysql.Conexao(caminho)
+    cursor = db.cursor()
+    cursor.execute(sql, parametros)
+    db.commit()
+    cursor.close()
+    db.close()
@@ -0,0 +1,89 @@
+import os
+import time
+
+import pytest
+
+import cache
+import limites
+
+# O CacheCompartilhado roda contra o ClienteMemoria (que recusa o que o
+# redis recusa) e, se CACHE_REDIS_URL apontar para um redis de pé, contra
+# o cliente de verdade.
+
+
+def _redis():
+    url = os.getenv("CACHE_REDIS_URL")
+    if not url:
+        return None
+    try:
+        import redis
+        cliente = redis.Redis.from_url(url)
+        cliente.ping()
+    except Exception:
+        return None
+    return cliente
+
+
+@pytest.fixture(params=["memoria", "redis"])
+def cliente(request):
+    if request.param == "memoria":
+        return cache.ClienteMemoria()
+
+    cliente = _redis()
+    if cliente is None:
+        pytest.skip("sem redis em CACHE_REDIS_URL")
+    return cliente
+
+
+def test_ttl_float_do_env(cliente):
+    compartilhado = cache.CacheCompartilhado(cliente, prefixo="teste:ttl:", ttl=2.5)
+
+    compartilhado.set("a", {"x": 1})
+    compartilhado.set("b", [1, 2], ttl=0.2)
+
+    assert compartilhado.get("a") == {"x": 1}
+    assert compartilhado.get("b") == [1, 2]
+    compartilhado.clear()
+
+
+def test_delete_e_clear(cliente):
+    compartilhado = cache.CacheCompartilhado(cliente, prefixo="teste:limpar:", ttl=30)
+
+    compartilhado.set("a", 1)
+    compartilhado.set("b", 2)
+    compartilhado.delete("a")
+    assert compartilhado.get("a") is None
+
+    compartilhado.clear()
+    assert compartilhado.get("b") is None
+
+
+def test_baldes_compartilhados(cliente):
+    baldes = limites.BaldesCompartilhados(
+        cache.CacheCompartilhado(cliente, prefixo="teste:baldes:", ttl=60)
+    )
+
+    assert baldes.gastar("login:ip:1", 2, 60.0) == 0
+    assert baldes.gastar("login:ip:1", 2, 60.0) == 0
+    assert baldes.gastar("login:ip:1", 2, 60.0) > 0
+    baldes.cache.clear()
+
+
+def test_memoria_recusa_o_que_o_redis_recusa():
+    cliente = cache.ClienteMemoria()
+
+    with pytest.raises(TypeError):
+        cliente.set("a", "1", ex=1.5)
+    with pytest.raises(ValueError):
+        cliente.set("a", "1", ex=0)
+
+    cliente.set("a", "1", ex=1)
+    assert cliente.get("a") == b"1"
+
+
+def test_memoria_expira():
+    cliente = cache.ClienteMemoria()
+    cliente.set("a", "1", ex=1)
+    cliente._dados["a"] = (time.monotonic() - 1, b"1")
+
+    assert cliente.get("a") is None
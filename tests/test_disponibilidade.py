@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+import ocupacao
+import relogio
+
+
+def _grade(inicio):
+    from app import app
+
+    return app.test_client().get("/api/disponibilidade", query_string={"inicio": inicio})
+
+
+def test_inicio_no_fim_do_calendario(banco_sqlite):
+    _, limite = ocupacao.janela()
+
+    resposta = _grade("9999-12-31")
+
+    assert resposta.status_code == 200
+    assert resposta.get_json()["inicio"] == limite.strftime("%Y-%m-%d")
+
+
+def test_inicio_no_passado_comeca_hoje(banco_sqlite):
+    hoje, limite = ocupacao.janela()
+
+    resposta = _grade("0001-01-01")
+
+    assert resposta.status_code == 200
+    payload = resposta.get_json()
+    assert payload["inicio"] == hoje.strftime("%Y-%m-%d")
+    assert len(payload["livres"]) == (limite - hoje).days + 1
+
+
+def test_dias_invalidos(banco_sqlite):
+    from app import app
+
+    hoje = relogio.hoje() + timedelta(days=1)
+    resposta = app.test_client().get("/api/disponibilidade", query_string={"inicio": hoje, "dias": "x"})
+
+    assert resposta.status_code == 400
@@ -0,0 +1,77 @@
+import csv
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+
+import exportacao
+import relogio
+from conftest import executar
+
+
+def _lotes(*lotes):
+    # _csv e _json fecham o gerador de lotes no fim, como o de _lotes()
+    yield from lotes
+
+
+def _ler_csv(linhas):
+    texto = "".join(exportacao._csv(["email", "telefone", "total", "data"], _lotes(linhas)))
+    return list(csv.reader(io.StringIO(texto.lstrip("﻿")), delimiter=";"))
+
+
+def test_csv_neutraliza_formulas():
+    linhas = _ler_csv([
+        ("=HYPERLINK(\"http://x\")", "+55 11 9999", Decimal("38.00"), date(2026, 1, 2)),
+        ("@SOMA(A1)", "-1", Decimal("0"), date(2026, 1, 3)),
+        ("cliente@exemplo.com", "(11) 91234-5678", None, date(2026, 1, 4)),
+    ])
+
+    assert linhas[1] == ["'=HYPERLINK(\"http://x\")", "'+55 11 9999", "38.00", "2026-01-02"]
+    assert linhas[2] == ["'@SOMA(A1)", "'-1", "0", "2026-01-03"]
+    assert linhas[3] == ["cliente@exemplo.com", "(11) 91234-5678", "", "2026-01-04"]
+
+
+def test_json_mantem_o_valor_original():
+    texto = "".join(exportacao._json(["email", "horario"], _lotes([("=1+1", timedelta(hours=9))])))
+
+    assert '"email":"=1+1"' in texto
+    assert '"horario":"09:00"' in texto
+
+
+def _admin(banco_sqlite):
+    from app import app
+
+    executar(banco_sqlite, "INSERT INTO usuario (codigo, email, senha, is_admin) VALUES (1,'dona@exemplo.com','x',1)")
+    cliente = app.test_client()
+    with cliente.session_transaction() as s:
+        s["usuario_id"] = 1
+        s["is_admin"] = 1
+    return cliente
+
+
+def test_historico_sem_arquivo_e_recusado(banco_sqlite, monkeypatch):
+    monkeypatch.delenv("MANUTENCAO_ARQUIVAR", raising=False)
+    cliente = _admin(banco_sqlite)
+    ontem = relogio.hoje() - timedelta(days=1)
+
+    resposta = cliente.get("/admin/exportar", query_string={"inicio": ontem})
+    assert resposta.status_code == 409
+
+    # o resumo diário segue valendo para os dias já limpos
+    resposta = cliente.get("/admin/exportar", query_string={"tipo": "resumo", "inicio": ontem})
+    assert resposta.status_code == 200
+    resposta.close()
+
+    # sem datas, começa hoje
+    resposta = cliente.get("/admin/exportar")
+    assert resposta.status_code == 200
+    hoje = relogio.hoje()
+    assert f"agendamentos_{hoje:%Y-%m-%d}_" in resposta.headers["Content-Disposition"]
+    resposta.close()
+
+
+def test_historico_com_arquivo(monkeypatch):
+    monkeypatch.setenv("MANUTENCAO_ARQUIVAR", "1")
+    ontem = relogio.hoje() - timedelta(days=1)
+
+    assert not exportacao.historico_apagado("agendamentos", ontem)
+    assert exportacao.inicio_padrao("agendamentos", ontem + timedelta(days=1)).day == 1
@@ -0,0 +1,114 @@
+import sqlite3
+import time
+
+import pytest
+
+import fila_email
+
+
+@pytest.fixture
+def fila(tmp_path, monkeypatch):
+    monkeypatch.setenv("EMAIL_FILA_ARQUIVO", str(tmp_path / "fila_email.db"))
+    monkeypatch.setenv("EMAIL_BACKOFF_BASE", "0")
+    monkeypatch.setattr(fila_email, "_schema_pronto", False)
+    # as threads da fila não sobem: o teste chama processar_lote()
+    monkeypatch.setattr(fila_email, "iniciar", lambda: None)
+    monkeypatch.setattr(fila_email, "_transporte", None)
+    return tmp_path / "fila_email.db"
+
+
+def _linhas(caminho):
+    conn = sqlite3.connect(caminho)
+    linhas = conn.execute("SELECT tentativas, proxima_tentativa, erro FROM fila_email").fetchall()
+    conn.close()
+    return linhas
+
+
+def test_falha_volta_para_a_fila_ate_enviar(fila):
+    envio = fila_email.TransporteFake(falhar=2)
+    fila_email.usar_transporte(envio)
+    fila_email.enfileirar("a@exemplo.com", "Assunto", "Oi")
+
+    fila_email.processar_lote()
+    assert _linhas(fila)[0][0] == 1
+    fila_email.processar_lote()
+    assert _linhas(fila)[0][0] == 2
+    fila_email.processar_lote()
+
+    assert _linhas(fila) == []
+    assert [m["destinatario"] for m in envio.enviados] == ["a@exemplo.com"]
+
+
+def test_espera_exponencial(fila, monkeypatch):
+    monkeypatch.setenv("EMAIL_BACKOFF_BASE", "100")
+    fila_email.usar_transporte(fila_email.TransporteFake(falhar=5))
+    fila_email.enfileirar("a@exemplo.com", "Assunto", "Oi")
+
+    antes = time.time()
+    fila_email.processar_lote()
+    tentativas, proxima, erro = _linhas(fila)[0]
+    assert (tentativas, erro) == (1, "falha simulada")
+    assert 100 <= proxima - antes < 110
+
+    # ainda não chegou a hora: nada é reservado
+    assert fila_email.processar_lote() == 0
+
+    conn = sqlite3.connect(fila)
+    conn.execute("UPDATE fila_email SET proxima_tentativa = 0")
+    conn.commit()
+    conn.close()
+
+    antes = time.time()
+    fila_email.processar_lote()
+    assert 200 <= _linhas(fila)[0][1] - antes < 210
+
+
+def test_descarta_depois_do_maximo(fila, monkeypatch, caplog):
+    monkeypatch.setenv("EMAIL_MAX_TENTATIVAS", "3")
+    fila_email.usar_transporte(fila_email.TransporteFake(falhar=10))
+    fila_email.enfileirar("a@exemplo.com", "Assunto", "Oi")
+    descartados = fila_email.metricas["descartados"]
+
+    for _ in range(3):
+        fila_email.processar_lote()
+
+    assert _linhas(fila) == []
+    assert fila_email.metricas["descartados"] == descartados + 1
+    assert [r.levelname for r in caplog.records if r.name == "fila_email"] == ["ERROR"]
+    assert "falha simulada" in caplog.text
+
+
+def test_pendentes_sobrevivem_ao_reinicio(fila, monkeypatch):
+    fila_email.usar_transporte(fila_email.TransporteFake())
+    fila_email.enfileirar("a@exemplo.com", "Assunto", "Oi")
+
+    # o worker reservou o lote e morreu antes de enviar
+    conn = fila_email._conectar()
+    assert len(fila_email._reservar_lote(conn)) == 1
+    conn.close()
+    assert fila_email.processar_lote() == 0
+
+    # processo novo: a reserva venceu e a mensagem sai
+    monkeypatch.setattr(fila_email, "_schema_pronto", False)
+    envio = fila_email.TransporteFake()
+    fila_email.usar_transporte(envio)
+    conn = sqlite3.connect(fila)
+    conn.execute("UPDATE fila_email SET reservado_ate = ?", (time.time() - 1,))
+    conn.commit()
+    conn.close()
+
+    assert fila_email.processar_lote() == 1
+    assert len(envio.enviados) == 1
+    assert _linhas(fila) == []
+
+
+def test_sem_chave_da_api_conta_como_tentativa(fila, monkeypatch):
+    monkeypatch.delenv("EMAIL_TRANSPORTE", raising=False)
+    monkeypatch.delenv("BREVO_API_KEY", raising=False)
+    fila_email.enfileirar("a@exemplo.com", "Assunto", "Oi")
+
+    fila_email.processar_lote()
+
+    tentativas, _, erro = _linhas(fila)[0]
+    assert tentativas == 1
+    assert "BREVO_API_KEY" in erro
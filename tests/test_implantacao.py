@@ -0,0 +1,26 @@
+import pytest
+from flask import Flask
+
+import senhas
+import sessoes
+
+
+def test_sessao_local_recusa_os_workers_padrao(monkeypatch):
+    # sem WEB_CONCURRENCY o gunicorn.conf.py sobe 2 workers
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setenv("SESSAO_SERVIDOR", "1")
+    monkeypatch.setenv("CACHE_BACKEND", "local")
+
+    with pytest.raises(RuntimeError):
+        sessoes.init_app(Flask(__name__))
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    sessoes.init_app(Flask(__name__))
+
+
+def test_pool_de_senhas_divide_os_cpus_pelos_workers_padrao(monkeypatch):
+    monkeypatch.delenv("SENHA_PROCESSOS", raising=False)
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setattr(senhas.os, "cpu_count", lambda: 8)
+
+    assert senhas.num_processos() == 4
@@ -0,0 +1,54 @@
+import pytest
+from flask import Flask
+
+import limites
+
+
+@pytest.fixture
+def verificar(monkeypatch):
+    monkeypatch.setenv("CACHE_BACKEND", "local")
+    monkeypatch.setenv("LIMITE_LOGIN_IP", "1/60")
+    monkeypatch.setenv("LIMITE_LOGIN_EMAIL", "2/60")
+    monkeypatch.setattr(limites, "_baldes", None)
+    app = Flask(__name__)
+
+    def pedir(ip, email):
+        with app.test_request_context(
+            "/login", method="POST", data={"email": email}, environ_base={"REMOTE_ADDR": ip}
+        ):
+            return limites.verificar("login")
+    return pedir
+
+
+def test_recusa_pelo_ip_nao_gasta_a_ficha_do_email(verificar):
+    assert verificar("10.0.0.1", "a@exemplo.com") == 0
+    assert verificar("10.0.0.1", "a@exemplo.com") > 0
+
+    # o pedido recusado pelo IP não gastou a segunda ficha do email
+    assert verificar("10.0.0.2", "a@exemplo.com") == 0
+    assert verificar("10.0.0.3", "a@exemplo.com") > 0
+
+
+def test_limite_desligado(verificar, monkeypatch):
+    monkeypatch.setenv("LIMITE_LOGIN_IP", "0")
+    monkeypatch.setenv("LIMITE_LOGIN_EMAIL", "0")
+
+    assert all(verificar("10.0.0.1", "a@exemplo.com") == 0 for _ in range(50))
+
+
+def test_ip_vem_do_roteador_por_padrao(verificar, monkeypatch):
+    monkeypatch.delenv("LIMITES_PROXIES", raising=False)
+    app = Flask(__name__)
+
+    def pedir(encaminhado):
+        # todo pedido chega pelo mesmo roteador
+        with app.test_request_context(
+            "/login", method="POST", headers={"X-Forwarded-For": encaminhado},
+            environ_base={"REMOTE_ADDR": "10.1.1.1"}
+        ):
+            return limites.ip_cliente()
+
+    assert pedir("203.0.113.7") == "203.0.113.7"
+    # o que o cliente escreve antes do roteador não conta
+    assert pedir("1.2.3.4, 203.0.113.8") == "203.0.113.8"
+    assert verificar("10.1.1.1", "") == 0
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+import manutencao
+import relogio
+import sqlite_mysql
+from conftest import executar
+
+
+def test_limpeza_mantem_o_dia_de_hoje(banco_sqlite):
+    agora = datetime.combine(relogio.hoje(), datetime.min.time()) + timedelta(hours=18)
+    ontem = agora.date() - timedelta(days=1)
+
+    for id_ag, data, horario in [(1, ontem, "09:00:00"), (2, ontem, "17:00:00"), (3, agora.date(), "09:00:00"), (4, agora.date(), "20:00:00")]:
+        executar(
+            banco_sqlite,
+            "INSERT INTO agendamentos (id, usuario_id, data, horario) VALUES (%s,1,%s,%s)",
+            (id_ag, data, horario),
+        )
+
+    db = sqlite_mysql.Conexao(banco_sqlite)
+    cursor = db.cursor()
+    # o das 09:00 de hoje já passou, mas ainda não teve o pagamento registrado
+    assert manutencao._remover_lote(cursor, agora, 500, False) == 2
+    db.commit()
+
+    cursor.execute("SELECT id FROM agendamentos ORDER BY id")
+    assert [linha[0] for linha in cursor.fetchall()] == [3, 4]
+    cursor.close()
+    db.close()
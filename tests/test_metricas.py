@@ -0,0 +1,66 @@
+import time
+
+import pytest
+from flask import Flask, Response
+
+import metricas
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    metricas.init_app(app)
+
+    @app.route("/lento")
+    def lento():
+        def gerar():
+            yield "a"
+            time.sleep(0.3)
+            yield "b"
+        return Response(gerar())
+
+    return app
+
+
+def test_metrics_sem_token_nao_existe(app, monkeypatch):
+    monkeypatch.delenv("METRICAS_TOKEN", raising=False)
+    assert app.test_client().get("/metrics").status_code == 404
+
+
+def test_metrics_com_token(app, monkeypatch):
+    monkeypatch.setenv("METRICAS_TOKEN", "segredo")
+    cliente = app.test_client()
+
+    assert cliente.get("/metrics").status_code == 403
+    assert cliente.get("/metrics", headers={"Authorization": "Bearer segred"}).status_code == 403
+    resposta = cliente.get("/metrics", headers={"Authorization": "Bearer segredo"})
+    assert resposta.status_code == 200
+    assert b"# TYPE" in resposta.data
+
+
+def test_resposta_em_stream_conta_ate_o_fim(app):
+    chave = (("metodo", "GET"), ("rota", "lento"))
+    antes = metricas.requisicoes.series.get(chave, [None, 0.0, 0])[1]
+
+    resposta = app.test_client().get("/lento")
+    assert resposta.data == b"ab"
+    resposta.close()
+
+    assert metricas.requisicoes.series[chave][1] - antes >= 0.3
+
+
+def test_totais_saem_como_counter():
+    texto = metricas.exportar({
+        "email": {"enviados": 3, "tempo_envio_total": 1.5, "tempo_envio_max": 0.2},
+        "email_fila": lambda: {"profundidade": 4},
+        "cache": {"acertos": 10, "faltas": 2},
+        "limpeza": {"ultima_duracao": 0.1, "ultima_execucao": "2026-01-01 00:00:00"},
+    })
+
+    assert "# TYPE salao_email_enviados counter" in texto
+    assert "# TYPE salao_email_tempo_envio_total counter" in texto
+    assert "# TYPE salao_cache_acertos counter" in texto
+    assert "# TYPE salao_email_tempo_envio_max gauge" in texto
+    assert "# TYPE salao_email_fila_profundidade gauge" in texto
+    assert "# TYPE salao_limpeza_ultima_duracao gauge" in texto
+    assert "ultima_execucao" not in texto
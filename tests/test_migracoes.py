@@ -0,0 +1,52 @@
+import pytest
+
+import migracoes
+from conftest import executar
+
+
+@pytest.fixture
+def banco_antigo(tmp_path):
+    import sqlite_mysql
+
+    caminho = str(tmp_path / "salao.db")
+    sqlite_mysql.criar_banco(caminho, migrar=False)
+    for id_ag, horario in ((1, "09:00:00"), (2, "09:00:00"), (3, "10:00:00"), (4, "09:00:00")):
+        executar(
+            caminho,
+            "INSERT INTO agendamentos (id, usuario_id, data, horario) VALUES (%s,1,'2026-01-02',%s)",
+            (id_ag, horario),
+        )
+    return caminho
+
+
+def _ids(db, tabela):
+    cursor = db.cursor()
+    cursor.execute(f"SELECT id FROM {tabela} ORDER BY id")
+    ids = [linha[0] for linha in cursor.fetchall()]
+    cursor.close()
+    return ids
+
+
+def test_duplicados_bloqueiam_com_a_lista(banco_antigo):
+    import sqlite_mysql
+
+    db = sqlite_mysql.Conexao(banco_antigo)
+    with pytest.raises(migracoes.MigracaoBloqueada) as erro:
+        migracoes.migrar(db)
+
+    assert "2026-01-02 09:00: ids 1, 2, 4" in str(erro.value)
+    assert "10:00" not in str(erro.value)
+    assert _ids(db, "agendamentos") == [1, 2, 3, 4]
+    db.close()
+
+
+def test_mover_duplicados(banco_antigo):
+    import sqlite_mysql
+
+    db = sqlite_mysql.Conexao(banco_antigo)
+    aplicadas = migracoes.migrar(db, mover_duplicados=True)
+
+    assert [versao for versao, _ in aplicadas] == [versao for versao, _, _ in migracoes.MIGRACOES]
+    assert _ids(db, "agendamentos") == [1, 3]
+    assert _ids(db, "agendamentos_duplicados") == [2, 4]
+    db.close()
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+import permissoes
+from conftest import executar
+
+
+@pytest.fixture
+def usuario(banco_sqlite, monkeypatch):
+    monkeypatch.setenv("CACHE_BACKEND", "local")
+    monkeypatch.setattr(permissoes, "_cache", None)
+
+    def criar(is_admin):
+        executar(
+            banco_sqlite,
+            "INSERT INTO usuario (codigo, email, senha, is_admin) VALUES (%s,%s,%s,%s)",
+            (1, "dona@exemplo.com", "x", is_admin),
+        )
+        return 1
+    return criar
+
+
+def test_admin_fica_em_cache_por_pouco_tempo(usuario, banco_sqlite, monkeypatch):
+    monkeypatch.setenv("CACHE_PAPEIS_ADMIN_TTL", "0.05")
+    usuario_id = usuario(1)
+    assert permissoes.e_admin(usuario_id)
+
+    # o "flask definir-admin --remover" roda em outro processo: o invalidar()
+    # dele não alcança este cache, que segue respondendo sem ir ao banco...
+    executar(banco_sqlite, "UPDATE usuario SET is_admin=0 WHERE codigo=%s", (usuario_id,))
+    assert permissoes.e_admin(usuario_id)
+
+    # ...até o CACHE_PAPEIS_ADMIN_TTL passar
+    time.sleep(0.1)
+    assert not permissoes.e_admin(usuario_id)
+
+
+def test_nao_admin_fica_em_cache(usuario):
+    usuario_id = usuario(0)
+
+    assert not permissoes.e_admin(usuario_id)
+    assert permissoes.cache_papeis().get(str(usuario_id)) == 0
+
+
+def test_definir_admin_invalida(usuario):
+    usuario_id = usuario(0)
+    assert not permissoes.e_admin(usuario_id)
+
+    assert permissoes.definir_admin("dona@exemplo.com", True)
+    assert permissoes.e_admin(usuario_id)
+    assert not permissoes.definir_admin("ninguem@exemplo.com", True)
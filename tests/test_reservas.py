@@ -0,0 +1,52 @@
+from collections import Counter
+from datetime import date, datetime, time as hora, timedelta
+from threading import Barrier, Thread
+
+import reservas
+import sqlite_mysql
+
+# A mesma corrida do bench/concorrencia_reservas.py, com asserções: 200
+# clientes largam juntos para o mesmo horário, cada um com a sua conexão.
+CLIENTES = 200
+
+
+def test_so_uma_reserva_vence_a_corrida(banco_sqlite):
+    data_hora = datetime.combine(date.today() + timedelta(days=7), hora(9, 0))
+    conexoes = [sqlite_mysql.Conexao(banco_sqlite) for _ in range(CLIENTES)]
+    largada = Barrier(CLIENTES)
+    resultados = [None] * CLIENTES
+
+    def cliente(i):
+        largada.wait()
+        try:
+            status, _ = reservas.reservar(
+                conexoes[i],
+                900000 + i,
+                f"cliente{i}@exemplo.com",
+                data_hora,
+                ["Corte de Cabelo"],
+                38,
+                "(11) 91234-5678"
+            )
+        except Exception as e:
+            status = f"erro: {type(e).__name__}: {e}"
+        resultados[i] = status
+
+    threads = [Thread(target=cliente, args=(i,)) for i in range(CLIENTES)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    cursor = conexoes[0].cursor()
+    cursor.execute(
+        "SELECT COUNT(*) FROM agendamentos WHERE data=%s AND horario=%s",
+        (data_hora.date(), data_hora.time())
+    )
+    gravados = cursor.fetchone()[0]
+    cursor.close()
+    for conn in conexoes:
+        conn.close()
+
+    assert Counter(resultados) == {reservas.RESERVADO: 1, reservas.OCUPADO: CLIENTES - 1}
+    assert gravados == 1
@@ -0,0 +1,94 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+
+import relogio
+import resumo
+from conftest import executar
+
+
+def _agendar(caminho, id_ag, data, valor):
+    executar(
+        caminho,
+        "INSERT INTO agendamentos (id, usuario_id, data, horario, valor_pix, valor_dinheiro, valor_final, finalizado) "
+        "VALUES (%s,1,%s,%s,%s,0,%s,1)",
+        (id_ag, data, "09:00:00" if id_ag % 2 else "14:00:00", valor, valor),
+    )
+
+
+def _resumo(db, data):
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("SELECT total, atendimentos FROM resumo_diario WHERE data=%s", (data,))
+    linha = cursor.fetchone()
+    cursor.close()
+    return linha
+
+
+def test_reconstruir_mantem_dia_ja_limpo_em_parte(banco_sqlite, monkeypatch):
+    import sqlite_mysql
+
+    monkeypatch.delenv("MANUTENCAO_ARQUIVAR", raising=False)
+    hoje = relogio.hoje()
+    ontem = hoje - timedelta(days=1)
+
+    # ontem: dois atendimentos no resumo, mas a limpeza já apagou um deles
+    executar(banco_sqlite, "INSERT INTO resumo_diario (data, pix, dinheiro, total, atendimentos) VALUES (%s,80,0,80,2)", (ontem,))
+    _agendar(banco_sqlite, 2, ontem, 30)
+    # hoje: resumo errado, agendamentos completos (a limpeza não toca em hoje)
+    executar(banco_sqlite, "INSERT INTO resumo_diario (data, pix, dinheiro, total, atendimentos) VALUES (%s,1,0,1,1)", (hoje,))
+    _agendar(banco_sqlite, 3, hoje, 40)
+    _agendar(banco_sqlite, 4, hoje, 45)
+
+    db = sqlite_mysql.Conexao(banco_sqlite)
+    resumo.reconstruir(db)
+
+    assert _resumo(db, ontem) == {"total": Decimal("80"), "atendimentos": 2}
+    assert _resumo(db, hoje) == {"total": Decimal("85"), "atendimentos": 2}
+    db.close()
+
+
+@pytest.mark.parametrize("texto", ["abc", "NaN", "Infinity", "-1", "100000000", None, [1]])
+def test_ler_valor_recusa(texto):
+    if texto is None:
+        assert resumo.ler_valor(texto) == 0
+        return
+    with pytest.raises(ValueError):
+        resumo.ler_valor(texto)
+
+
+def test_ler_valor_arredonda():
+    assert resumo.ler_valor("38.005") == Decimal("38.00")
+    assert resumo.ler_valor("") == 0
+
+
+def test_finalizar_com_valor_invalido_volta_400(banco_sqlite):
+    from app import app
+
+    executar(banco_sqlite, "INSERT INTO usuario (codigo, email, senha, is_admin) VALUES (1,'dona@exemplo.com','x',1)")
+    cliente = app.test_client()
+    with cliente.session_transaction() as s:
+        s["usuario_id"] = 1
+        s["is_admin"] = 1
+
+    resposta = cliente.post("/admin/finalizar", data={"id": "1", "pagamento": "pix", "valor": "abc"})
+    assert resposta.status_code == 400
+
+    resposta = cliente.post("/admin/salvar_pagamento", data={"id": "1", "valor_pix": "x"})
+    assert resposta.status_code == 400
+
+
+def test_pagamento_de_agendamento_apagado_volta_404(banco_sqlite):
+    from app import app
+
+    executar(banco_sqlite, "INSERT INTO usuario (codigo, email, senha, is_admin) VALUES (1,'dona@exemplo.com','x',1)")
+    cliente = app.test_client()
+    with cliente.session_transaction() as s:
+        s["usuario_id"] = 1
+        s["is_admin"] = 1
+
+    resposta = cliente.post("/admin/finalizar", data={"id": "99", "pagamento": "pix", "valor": "38"})
+    assert resposta.status_code == 404
+
+    resposta = cliente.post("/admin/salvar_pagamento", data={"id": "99", "valor_pix": "38"})
+    assert resposta.status_code == 404
@@ -0,0 +1,27 @@
+from werkzeug.security import generate_password_hash
+
+import senhas
+from conftest import executar
+
+
+def test_login_ok_mesmo_sem_vaga_para_refazer_o_hash(banco_sqlite, monkeypatch):
+    from app import app
+
+    # hash num método antigo: o login tenta refazer, mas o pool está cheio
+    executar(
+        banco_sqlite,
+        "INSERT INTO usuario (codigo, email, senha, is_admin) VALUES (1,'cliente@exemplo.com',%s,0)",
+        (generate_password_hash("segredo123", method="pbkdf2:sha256:1000"),),
+    )
+
+    def sobrecarga(*args):
+        raise senhas.Sobrecarga()
+
+    monkeypatch.setattr(senhas, "atualizar", sobrecarga)
+
+    cliente = app.test_client()
+    resposta = cliente.post("/login", data={"email": "cliente@exemplo.com", "senha": "segredo123"})
+
+    assert resposta.headers["Location"].endswith("/index")
+    with cliente.session_transaction() as s:
+        assert s["usuario_id"] == 1